@@ -1,9 +1,20 @@
 # backend/api/chat.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Cookie, HTTPException
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Cookie, HTTPException, Query
 from backend.model.messages import Message
 from backend.databases.database import Database
 from backend.services.chat import Herobot
 from backend.services.connection_manager import ConnectionManager
+from backend.core.config import ProtocolConfig
+from backend.core.telemetry import bind_session, span
+from backend.services.http_client import http_client_stats
+from backend.services.intent_classifier import intent_classifier
+from backend.vectorstore.response_cache import response_cache
+from backend.vectorstore.embedding_cache import CachedEmbeddings
+from backend.services.flight_cache import flight_search_cache
+from backend.services.vision_cache import vision_result_cache
+from backend.services.vision_executor import vision_executor
+from backend.services.history_writer import history_writer
+from backend.services.history_window import flight_history_window
 import json
 
 router = APIRouter()
@@ -16,12 +27,15 @@ db = Database()
 herobot = Herobot(db)
 
 @router.websocket("/ws/chat")
-async def websocket_endpoint(websocket: WebSocket, session_id: str = Cookie(None)):
+async def websocket_endpoint(websocket: WebSocket, session_id: str = Cookie(None),
+                             protocol: int = Query(ProtocolConfig.VERSION_SINGLE)):
     if not session_id:
         await websocket.close(code=1008)
         raise HTTPException(status_code=400, detail="Session ID not found")
 
     await manager.connect(websocket, session_id)
+    # 이 연결에서 남기는 로그와 단계 기록에 세션 ID를 붙인다
+    bind_session(session_id)
     try:
         while True:
             try:
@@ -29,10 +43,50 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str = Cookie(None
                 data_dict = json.loads(data)
                 data_dict['session_id'] = session_id
                 user_message = Message(**data_dict)
-                response_message = herobot.response(user_message)
-                await manager.send_json(response_message, session_id)
+                with span("turn", protocol=protocol):
+                    if protocol >= ProtocolConfig.VERSION_STREAM:
+                        await stream_response(user_message, session_id)
+                    else:
+                        response_message = await herobot.aresponse(user_message)
+                        await manager.send_json(response_message, session_id)
             except WebSocketDisconnect:
                 manager.disconnect(session_id)
                 break
     except WebSocketDisconnect:
         manager.disconnect(session_id)
+
+
+# 외부 API 커넥션 풀/지연시간과 항공권 캐시 통계
+@router.get("/stats")
+async def get_chat_stats():
+    return {
+        "http": http_client_stats(),
+        "flight_cache": flight_search_cache.get_stats(),
+        "flight_providers": herobot.flight_search.stats,
+        "intent_classifier": intent_classifier.get_stats(),
+        "speculative_flight": herobot.speculation_stats,
+        "response_cache": response_cache.get_stats(),
+        "embedding_cache": CachedEmbeddings().get_stats(),
+        "vision_cache": vision_result_cache.get_stats(),
+        "vision_executor": vision_executor.get_stats(),
+        "history_writer": history_writer.get_stats(),
+        "flight_history_window": flight_history_window.get_stats()
+    }
+
+
+# 스트리밍 프로토콜(v2) 응답 함수 - message 조각을 delta 프레임으로 보내고 마지막에 final 프레임 전송
+async def stream_response(user_message: Message, session_id: str):
+    async def send_delta(delta: str):
+        await manager.send_frame({
+            "version": ProtocolConfig.VERSION_STREAM,
+            "event": ProtocolConfig.EVENT_DELTA,
+            "session_id": session_id,
+            "message": delta
+        }, session_id)
+
+    response_message = await herobot.aresponse(user_message, on_delta=send_delta)
+    await manager.send_frame({
+        "version": ProtocolConfig.VERSION_STREAM,
+        "event": ProtocolConfig.EVENT_FINAL,
+        **response_message.dict()
+    }, session_id)
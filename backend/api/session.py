@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Request, Response, HTTPException
 from datetime import timedelta
 from backend.utils import generate_session_id, get_session_id_from_cookie
+from backend.services.session_state import session_state_stats
 
 router = APIRouter()
 
@@ -17,4 +18,8 @@ async def get_session(request: Request):
     session_id = get_session_id_from_cookie(request)
     if not session_id:
         raise HTTPException(status_code=400, detail="Session ID not found")
-    return {"session_id": session_id}
\ No newline at end of file
+    return {"session_id": session_id}
+
+@router.get("/stats")
+async def get_session_stats():
+    return {"stores": session_state_stats()}
\ No newline at end of file
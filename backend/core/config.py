@@ -35,6 +35,16 @@ class DatabaseSettings:
         self.DB_CONFIG = self.load_db_config(db_config_path)['mysql']
         self.CONNECTION_STRING = self.make_connection_string(self.DB_CONFIG)
         self.SQLITE_CONNECTION_STRING = os.getenv("SQLITE_CONNECTION_STRING")
+        self.DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 1000))
+        # 대화 기록 write-behind 저장 - 한 트랜잭션에 모을 최대 메시지 수와 최대 대기 시간(초)
+        self.HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "true").lower() == "true"
+        self.HISTORY_FLUSH_SIZE = int(os.getenv("HISTORY_FLUSH_SIZE", 200))
+        self.HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", 0.5))
+        # 대기열 최대 메시지 수, 배치 저장 재시도 횟수 - 넘치거나 끝내 저장하지 못한 메시지는 dead-letter 파일(JSON lines)로
+        self.HISTORY_MAX_QUEUE = int(os.getenv("HISTORY_MAX_QUEUE", 10000))
+        self.HISTORY_MAX_RETRIES = int(os.getenv("HISTORY_MAX_RETRIES", 5))
+        self.HISTORY_DEAD_LETTER_PATH = os.getenv("HISTORY_DEAD_LETTER_PATH", os.path.join(
+            os.getenv("ROOT_DIR", "."), "backend", "datas", "history_dead_letter.jsonl"))
 
     def load_db_config(self, config_path='db_config.yaml') -> Dict:
         with open(config_path, 'r') as f:
@@ -43,6 +53,114 @@ class DatabaseSettings:
     def make_connection_string(self, config: Dict) -> str:
         return URL.create(**config)
 
+class CacheSettings:
+    def __init__(self):
+        self.DATA_DIR = os.path.join(os.getenv("ROOT_DIR", "."), "backend", "datas")
+        # 프롬프트 캐시 유지 시간(초), 0이면 만료 없음. 프롬프트 이름에 ':커밋해시'를 붙이면 버전 고정
+        self.PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL", 3600))
+        self.PROMPT_SNAPSHOT_DIR = os.getenv("PROMPT_SNAPSHOT_DIR", os.path.join(self.DATA_DIR, "prompts"))
+        # 항공권 검색 캐시 - fresh TTL 동안은 그대로, stale TTL까지는 이전 결과를 주면서 백그라운드 갱신(초)
+        self.FLIGHT_CACHE_PATH = os.getenv("FLIGHT_CACHE_PATH", os.path.join(self.DATA_DIR, "flight_cache.db"))
+        self.FLIGHT_CACHE_MAX_ENTRIES = int(os.getenv("FLIGHT_CACHE_MAX_ENTRIES", 1000))
+        self.FLIGHT_CACHE_FRESH_TTL = int(os.getenv("FLIGHT_CACHE_FRESH_TTL", 600))
+        self.FLIGHT_CACHE_STALE_TTL = int(os.getenv("FLIGHT_CACHE_STALE_TTL", 3600))
+        # 일반 질문 답변 시맨틱 캐시 - 코사인 유사도 임계값, 유지 시간(초), 디스크 저장 주기(저장 건수)
+        self.RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        self.RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(self.DATA_DIR, "response_cache"))
+        self.RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", 0.95))
+        self.RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 86400))
+        self.RESPONSE_CACHE_SAVE_EVERY = int(os.getenv("RESPONSE_CACHE_SAVE_EVERY", 20))
+        # 세션 대화 검색용 공유 벡터 인덱스 - 저장 위치와 인덱스 파일 저장 주기(변경 건수)
+        self.VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(self.DATA_DIR, "vector_index"))
+        self.VECTOR_INDEX_SAVE_EVERY = int(os.getenv("VECTOR_INDEX_SAVE_EVERY", 100))
+        # 임베딩 캐시 - 메모리 최대 개수, 한 번에 임베딩할 최대 문장 수와 모으는 시간(초)
+        self.EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(self.DATA_DIR, "embedding_cache.db"))
+        self.EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 50000))
+        self.EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+        self.EMBEDDING_BATCH_WINDOW = float(os.getenv("EMBEDDING_BATCH_WINDOW", 0.02))
+        # 임베딩 결과 대기 시간(초) - 배치 스레드가 멈춰도 호출 측이 무한정 기다리지 않도록
+        self.EMBEDDING_WAIT_TIMEOUT = float(os.getenv("EMBEDDING_WAIT_TIMEOUT", 60))
+        # Vision 분석 결과 캐시 - 지각 해시 해밍 거리 허용치(64비트 중), 유지 시간(초)
+        self.VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true"
+        self.VISION_CACHE_PATH = os.getenv("VISION_CACHE_PATH", os.path.join(self.DATA_DIR, "vision_cache.db"))
+        self.VISION_CACHE_MAX_DISTANCE = int(os.getenv("VISION_CACHE_MAX_DISTANCE", 6))
+        self.VISION_CACHE_TTL = int(os.getenv("VISION_CACHE_TTL", 604800))
+
+class SessionSettings:
+    def __init__(self):
+        # 세션 상태 보관 정책 - 유휴 TTL(초), 최대 세션 수, 저장소별 대략적인 메모리 한도(byte), 만료 점검 주기(초)
+        self.SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", 1800))
+        self.SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", 10000))
+        self.SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", 256 * 1024 * 1024))
+        self.SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", 60))
+        # 세션 상태 저장소 - memory(단일 워커), sqlite(SQLite 파일 경로), redis(redis:// URL)
+        self.SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+        self.SESSION_BACKEND_URL = os.getenv(
+            "SESSION_BACKEND_URL", os.path.join(os.getenv("ROOT_DIR", "."), "backend", "datas", "sessions.db")
+        )
+
+class HTTPSettings:
+    def __init__(self):
+        # 외부 API용 HTTP 커넥션 풀/타임아웃(초)/재시도 설정
+        self.HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+        self.HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+        self.HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+        self.HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 15))
+        self.HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+        self.HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+        self.HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.3))
+        self.HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 3))
+        self.HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", 50))
+
+class FlightSearchSettings:
+    def __init__(self):
+        # 공급자 동시 조회 마감 시간(초)과 첫 결과 이후 다른 공급자를 더 기다리는 시간(초)
+        self.FLIGHT_SEARCH_DEADLINE = float(os.getenv("FLIGHT_SEARCH_DEADLINE", 8))
+        self.FLIGHT_SEARCH_GRACE = float(os.getenv("FLIGHT_SEARCH_GRACE", 1))
+        # 답변에 보여줄 항공편 선택 전략 (cheapest, fastest, fewest_stops, best_value)
+        self.FLIGHT_RANKING_STRATEGIES = [name.strip() for name in os.getenv("FLIGHT_RANKING_STRATEGIES", "cheapest,fastest").split(",")
+                                          if name.strip()]
+        # 날짜 유연 검색 - 날짜별 개별 검색(대체 경로)의 동시 실행 수와 최대 검색 일 수
+        self.FLEXIBLE_SEARCH_CONCURRENCY = int(os.getenv("FLEXIBLE_SEARCH_CONCURRENCY", 4))
+        self.FLEXIBLE_SEARCH_MAX_DAYS = int(os.getenv("FLEXIBLE_SEARCH_MAX_DAYS", 31))
+        # 항공 체인에 넘길 대화 기록의 토큰 예산과 예산과 무관하게 항상 넘길 최근 메시지 수
+        self.FLIGHT_HISTORY_MAX_TOKENS = int(os.getenv("FLIGHT_HISTORY_MAX_TOKENS", 1500))
+        self.FLIGHT_HISTORY_MIN_MESSAGES = int(os.getenv("FLIGHT_HISTORY_MIN_MESSAGES", 2))
+
+class IntentSettings:
+    def __init__(self):
+        # 로컬 의도 분류기 - 신뢰도가 임계값 이상일 때만 의도 LLM 호출을 건너뛴다
+        self.INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "true").lower() == "true"
+        self.INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", 0.9))
+        # 대화 기록이 이 개수보다 적으면 모델을 학습하지 않고 규칙만 사용
+        self.INTENT_MIN_TRAINING_SAMPLES = int(os.getenv("INTENT_MIN_TRAINING_SAMPLES", 200))
+        self.INTENT_MODEL_PATH = os.getenv(
+            "INTENT_MODEL_PATH", os.path.join(os.getenv("ROOT_DIR", "."), "backend", "datas", "intent_model.json")
+        )
+        # 예약 대화 중에는 의도 체인과 항공 체인을 동시에 실행하고, 의도가 flight가 아니면 항공 결과를 버린다
+        self.SPECULATIVE_FLIGHT_ENABLED = os.getenv("SPECULATIVE_FLIGHT_ENABLED", "true").lower() == "true"
+
+class VisionSettings:
+    def __init__(self):
+        # Vision 요청 이미지 - 긴 변 최대 픽셀 수와 최대 바이트 수 (넘으면 메모리에서 축소/재인코딩)
+        self.VISION_MAX_RESOLUTION = int(os.getenv("VISION_MAX_RESOLUTION", 1024))
+        self.VISION_MAX_IMAGE_BYTES = int(os.getenv("VISION_MAX_IMAGE_BYTES", 1024 * 1024))
+        self.VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", 85))
+        # Vision 실행기 - 동시 API 호출 수, 한 번에 묶을 최대 이미지 수(API 한도 16), 요청을 모으는 시간(초)
+        self.VISION_MAX_WORKERS = int(os.getenv("VISION_MAX_WORKERS", 4))
+        self.VISION_BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", 16))
+        self.VISION_BATCH_WINDOW = float(os.getenv("VISION_BATCH_WINDOW", 0.05))
+
+class TelemetrySettings:
+    def __init__(self):
+        # 로그 레벨과 INFO 이하 로그를 남길 비율 (WARNING 이상은 항상 남긴다)
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+        # 단계별 소요시간 - /metrics 히스토그램, 경로를 지정하면 구간 기록을 JSON lines로도 저장 (기록 비율)
+        self.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")
+        self.TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0))
+
 class Settings:
     _instance = None
 
@@ -56,19 +174,37 @@ class Settings:
         self.project_settings = ProjectSettings()
         self.api_settings = APISettings()
         self.database_settings = DatabaseSettings()
+        self.cache_settings = CacheSettings()
+        self.session_settings = SessionSettings()
+        self.http_settings = HTTPSettings()
+        self.flight_search_settings = FlightSearchSettings()
+        self.intent_settings = IntentSettings()
+        self.vision_settings = VisionSettings()
+        self.telemetry_settings = TelemetrySettings()
         # 노출할 속성들
         self._expose_attributes()
 
     def _expose_attributes(self):
-        for settings in (self.project_settings, self.api_settings, self.database_settings):
+        for settings in (self.project_settings, self.api_settings, self.database_settings, self.cache_settings,
+                         self.session_settings, self.http_settings, self.flight_search_settings,
+                         self.intent_settings, self.vision_settings, self.telemetry_settings):
             for attr, value in settings.__dict__.items():
                 setattr(self, attr, value)
 
 class LLMConfig:
     CHAIN_TYPE_FLIGHT = "flight"
+    # 대화 기록을 직접 넘기는 항공 체인 (추측 실행용, 기록 저장은 호출 측에서 처리)
+    CHAIN_TYPE_FLIGHT_CORE = "flight_core"
     CHAIN_TYPE_INTENT = "intent"
     CHAIN_TYPE_MESSAGE = "message"
 
+class ProtocolConfig:
+    # 1: 응답 완료 후 Message 한 번 전송, 2: message 조각(delta) 스트리밍 후 final 프레임 전송
+    VERSION_SINGLE = 1
+    VERSION_STREAM = 2
+    EVENT_DELTA = "delta"
+    EVENT_FINAL = "final"
+
 settings = Settings()
 
 if __name__ == "__main__":
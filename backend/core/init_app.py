@@ -1,14 +1,31 @@
+import asyncio
 import ssl
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from backend.core.config import settings
+from backend.core.telemetry import configure_logging, render_metrics, stop_logging
 from backend.api.session import router as session_router
-from backend.api.chat import router as chat_router
+from backend.api.chat import router as chat_router, herobot
+from backend.databases.reference_index import reference_index
+from backend.utils import validate_strategies
+from backend.services.prompt_store import prompt_store
+from backend.services.session_state import run_session_sweeper
+from backend.services.session_backend import session_backend
+from backend.services.flight_cache import flight_search_cache
+from backend.services.http_client import close_http_clients
+from backend.services.intent_classifier import intent_classifier
+from backend.services.vision_cache import vision_result_cache
+from backend.services.history_writer import history_writer
+from backend.vectorstore.response_cache import response_cache
 
 # 테스트용 ssl 설정 - Amadeus API https 요청을 위한 설정
 ssl._create_default_https_context = ssl._create_unverified_context
 
 def create_app() -> FastAPI:
+    # 로그 출력은 큐를 거쳐 별도 스레드에서 (요청 처리 중 stdout/파일 쓰기를 기다리지 않는다)
+    configure_logging()
+    # 잘못된 항공편 순위 전략 설정은 첫 검색이 아니라 시작 시 바로 실패
+    validate_strategies(settings.FLIGHT_RANKING_STRATEGIES)
     app = FastAPI()
 
     # CORS 설정
@@ -25,8 +42,39 @@ def create_app() -> FastAPI:
     app.include_router(session_router, prefix="/session", tags=["session"])
     app.include_router(chat_router, prefix="/chat", tags=["chat"])
 
+    # 단계별 소요시간 히스토그램 (Prometheus 텍스트 형식)
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
     # 앱 시작 시 실행되는 초기화 함수
     @app.on_event("startup")
     async def startup_event():
-        pass
+        # 공항/항공사 참조 인덱스를 미리 로드
+        reference_index.refresh()
+        # 프롬프트를 한 번만 받아 캐시 (실패 시 디스크 스냅샷 사용)
+        await asyncio.to_thread(prompt_store.preload, [settings.LANGCHAIN_INTENT_PROMPT_NAME, settings.LANGCHAIN_FLIGHT_PROMPT_NAME])
+        # 로컬 의도 분류 모델 로드 (없으면 대화 기록으로 학습)
+        await asyncio.to_thread(intent_classifier.load_or_train)
+        # 일반 질문 답변 시맨틱 캐시 인덱스 로드
+        await asyncio.to_thread(response_cache.load)
+        # 모든 세션이 공유할 체인을 미리 생성
+        herobot.create_chain()
+        # 유휴 세션 상태 정리 작업 시작
+        asyncio.create_task(run_session_sweeper(purge_callbacks=[
+            session_backend.purge_expired,
+            flight_search_cache.purge_expired,
+            response_cache.purge_expired,
+            vision_result_cache.purge_expired
+        ]))
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        session_backend.close()
+        # 아직 저장되지 않은 대화 기록을 모두 저장
+        history_writer.close()
+        response_cache.save()
+        await close_http_clients()
+        # 큐에 남은 로그를 모두 출력
+        stop_logging()
     return app
@@ -0,0 +1,170 @@
+import asyncio
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from backend.core.config import settings
+
+# 현재 처리 중인 대화의 세션 ID - asyncio 태스크와 to_thread 호출에도 그대로 전달된다
+session_context: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+
+# 단계별 소요시간 히스토그램 구간(초)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# configure_logging이 붙인 (logger, QueueHandler, QueueListener) - stop_logging에서 모두 떼어낸다
+_queue_handlers: List[Tuple[logging.Logger, logging.Handler, logging.handlers.QueueListener]] = []
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def bind_session(session_id: Optional[str]):
+    session_context.set(session_id)
+
+
+class SessionFilter(logging.Filter):
+    """로그 레코드에 현재 세션 ID를 붙인다"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session_id = session_context.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """WARNING 이상은 모두 남기고, 그 아래 레벨은 rate 비율만 남긴다"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+# 로그는 큐에 넣기만 하고 출력은 별도 스레드에서 (요청 경로에서 stdout/파일 쓰기를 기다리지 않는다)
+def _queue_logger(logger: logging.Logger, handler: logging.Handler, *filters: logging.Filter):
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    for log_filter in filters:
+        queue_handler.addFilter(log_filter)
+    logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _queue_handlers.append((logger, queue_handler, listener))
+
+
+def configure_logging():
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        logger = logging.getLogger("backend")
+        logger.setLevel(settings.LOG_LEVEL)
+        logger.propagate = False
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(session_id)s] %(message)s"))
+        _queue_logger(logger, stream_handler, SessionFilter(), SamplingFilter(settings.LOG_SAMPLE_RATE))
+        if settings.TRACE_LOG_PATH:
+            file_handler = logging.FileHandler(settings.TRACE_LOG_PATH, encoding="utf-8")
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            _queue_logger(trace_logger, file_handler)
+        _configured = True
+
+
+# 남은 로그를 모두 출력하고 출력 스레드 종료 - 큐 핸들러도 떼어내서 다시 설정해도 중복 출력되지 않는다
+def stop_logging():
+    global _configured
+    with _configure_lock:
+        while _queue_handlers:
+            logger, queue_handler, listener = _queue_handlers.pop()
+            logger.removeHandler(queue_handler)
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        _configured = False
+
+
+atexit.register(stop_logging)
+
+
+trace_logger = logging.getLogger("herobot.trace")
+trace_logger.setLevel(logging.INFO)
+trace_logger.propagate = False
+
+
+class StageHistogram:
+    """단계별 소요시간 히스토그램 - Prometheus 텍스트 형식으로 내보낸다"""
+
+    def __init__(self, name: str, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        # (stage, status) -> [구간별 개수, 합계, 개수]
+        self.series: Dict[Tuple[str, str], list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage: str, status: str, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            entry = self.series.get((stage, status))
+            if entry is None:
+                entry = self.series[(stage, status)] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} Time spent in each stage of a chat turn.", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self.series.items()}
+        for (stage, status), (counts, total, count) in sorted(series.items()):
+            labels = f'stage="{stage}",status="{status}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+stage_histogram = StageHistogram("herobot_stage_duration_seconds")
+
+
+def record_span(stage: str, seconds: float, status: str = "ok", **attributes):
+    if settings.METRICS_ENABLED:
+        stage_histogram.observe(stage, status, seconds)
+    if trace_logger.handlers and (settings.TRACE_SAMPLE_RATE >= 1 or random.random() < settings.TRACE_SAMPLE_RATE):
+        trace_logger.info(json.dumps({
+            "ts": time.time(), "stage": stage, "duration": round(seconds, 6), "status": status,
+            "session_id": session_context.get(), **attributes
+        }, ensure_ascii=False, default=str))
+
+
+# 단계 소요시간 측정 - 예외는 error, 취소는 cancelled 상태로 기록하고 그대로 전달
+@contextmanager
+def span(stage: str, **attributes):
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record_span(stage, time.perf_counter() - started, status, **attributes)
+
+
+def render_metrics() -> str:
+    return stage_histogram.render()
@@ -1,36 +1,80 @@
-from sqlalchemy import create_engine, Table, MetaData, select, text
+from sqlalchemy import create_engine, Table, MetaData, select, text, bindparam
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Dict
+from typing import List, Dict, Tuple, Any, Callable, Optional
 import csv
+import logging
+import threading
 from functools import wraps
 from backend.core.config import settings
+from backend.core.telemetry import span
 
-metadata = MetaData()
+logger = logging.getLogger(__name__)
 
 def db_connect(func):
+    # 호출마다 독립된 세션을 열어 메서드에 전달 (스레드 간 세션 공유 없음)
     @wraps(func)
     def with_connection(self, *args, **kwargs):
+        session = self.Session()
         try:
-            result = func(self, *args, **kwargs)
-            self.session.commit()
+            with span("db_query", operation=func.__name__):
+                result = func(self, session, *args, **kwargs)
+                session.commit()
             return result
         except SQLAlchemyError as e:
-            self.session.rollback()
-            print(f"Error: {e}")
+            session.rollback()
+            logger.error("Database error in %s: %s", func.__name__, e)
             return None
         finally:
-            self.session.close()
+            session.close()
     return with_connection
 
 class Database:
     def __init__(self):
         self.engine = self.create_engine()
         self.Session = sessionmaker(bind=self.engine)
-        self.session = self.Session()
+        self.metadata = MetaData()
+        # 리플렉션한 테이블 스키마와 쿼리 형태별 statement 캐시
+        self.tables: Dict[str, Table] = {}
+        self.statements: Dict[Tuple, Any] = {}
+        self.lock = threading.Lock()
 
     def create_engine(self):
-        return create_engine(settings.CONNECTION_STRING, pool_size=10, pool_pre_ping=True)
+        return create_engine(
+            settings.CONNECTION_STRING,
+            pool_size=10,
+            pool_pre_ping=True,
+            query_cache_size=settings.DB_QUERY_CACHE_SIZE
+        )
+
+    # 테이블 스키마 조회 함수 - 최초 1회만 리플렉션
+    def get_table(self, table: str) -> Table:
+        table_ref = self.tables.get(table)
+        if table_ref is None:
+            with self.lock:
+                table_ref = self.tables.get(table)
+                if table_ref is None:
+                    table_ref = Table(table, self.metadata, autoload_with=self.engine)
+                    self.tables[table] = table_ref
+        return table_ref
+
+    # 스키마 캐시 무효화 함수 - 테이블 변경(마이그레이션) 후 호출
+    def invalidate_schema(self, table: Optional[str] = None):
+        with self.lock:
+            targets = [table] if table else list(self.tables)
+            for name in targets:
+                table_ref = self.tables.pop(name, None)
+                if table_ref is not None:
+                    self.metadata.remove(table_ref)
+            self.statements = {key: stmt for key, stmt in self.statements.items() if key[1] not in targets}
+
+    # 쿼리 형태별 statement 재사용 함수 - 같은 형태의 쿼리는 SQLAlchemy 컴파일 캐시를 그대로 탄다
+    def get_statement(self, key: Tuple, build: Callable[[], Any]):
+        stmt = self.statements.get(key)
+        if stmt is None:
+            stmt = build()
+            self.statements[key] = stmt
+        return stmt
 
     def load_data(self, filename='') -> List:
         data = []
@@ -49,52 +93,56 @@ class Database:
         return data
 
     @db_connect
-    def insert_datas(self, table: str, data: List[Dict]) -> int:
+    def insert_datas(self, session, table: str, data: List[Dict]) -> int:
         if not data:
             return 0
 
-        table_ref = Table(table, metadata, autoload_with=self.engine)
-        self.session.bulk_insert_mappings(table_ref, data)
-        print(f"Data inserted into {table}")
+        table_ref = self.get_table(table)
+        stmt = self.get_statement(('insert', table), table_ref.insert)
+        session.execute(stmt, data)
+        logger.debug("Data inserted into %s", table)
         return len(data)
 
     @db_connect
-    def insert_data(self, table: str, data: Dict) -> int:
-        table_ref = Table(table, metadata, autoload_with=self.engine)
-        ins = table_ref.insert().values(**data)
-        self.session.execute(ins)
-        print(f"Data inserted into {table}")
+    def insert_data(self, session, table: str, data: Dict) -> int:
+        table_ref = self.get_table(table)
+        stmt = self.get_statement(('insert', table), table_ref.insert)
+        session.execute(stmt, data)
+        logger.debug("Data inserted into %s", table)
         return 1
 
     @db_connect
-    def fetch_data(self, table: str, params:Dict=None, columns:str='*') -> List:
-        table_ref = Table(table, metadata, autoload_with=self.engine)
-        selected_columns = [table_ref.c[col] for col in columns.split(', ')] if columns != '*' else [table_ref]
-
-        stmt = select(*selected_columns)
-        first_key = next(iter(params))
-        if params:
-            stmt = stmt.where(table_ref.c[first_key] == params[first_key])
-        else:
-            params={}
-        result = self.session.execute(stmt, params).fetchall()
-        print(f"result:{result}")
+    def fetch_data(self, session, table: str, params:Dict=None, columns:str='*') -> List:
+        table_ref = self.get_table(table)
+        first_key = next(iter(params)) if params else None
+
+        def build():
+            selected_columns = [table_ref.c[col] for col in columns.split(', ')] if columns != '*' else [table_ref]
+            stmt = select(*selected_columns)
+            if first_key:
+                stmt = stmt.where(table_ref.c[first_key] == bindparam(first_key))
+            return stmt
+
+        stmt = self.get_statement(('select', table, columns, first_key), build)
+        result = session.execute(stmt, {first_key: params[first_key]} if first_key else {}).fetchall()
+        logger.debug("result: %s", result)
         return result
 
     @db_connect
-    def update_data(self, table:str, data: Dict, where_clause:str) -> int:
-        table_ref = Table(table, metadata, autoload_with=self.engine)
-        update_stmt = table_ref.update().where(text(where_clause)).values(**data)
-        self.session.execute(update_stmt)
-        print(f"Data updated in {table}")
+    def update_data(self, session, table:str, data: Dict, where_clause:str) -> int:
+        table_ref = self.get_table(table)
+        # 텍스트 where 절은 리터럴이 섞이면 키가 끝없이 늘어나므로 캐시하지 않는다
+        stmt = table_ref.update().where(text(where_clause))
+        session.execute(stmt, data)
+        logger.debug("Data updated in %s", table)
         return 1
 
     @db_connect
-    def delete_data(self, table:str, where_clause:str) -> int:
-        table_ref = Table(table, metadata, autoload_with=self.engine)
-        delete_stmt = table_ref.delete().where(text(where_clause))
-        self.session.execute(delete_stmt)
-        print(f"Data deleted from {table}")
+    def delete_data(self, session, table:str, where_clause:str) -> int:
+        table_ref = self.get_table(table)
+        stmt = table_ref.delete().where(text(where_clause))
+        session.execute(stmt)
+        logger.debug("Data deleted from %s", table)
         return 1
 
 # if __name__ == "__main__":
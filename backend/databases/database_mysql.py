@@ -3,10 +3,13 @@ from backend.core.config import settings
 import csv
 from typing import List, Dict
 from dotenv import load_dotenv
+import logging
 import os
 from functools import wraps
 from backend.model.messages import Message
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 def db_connect(func):
@@ -17,13 +20,13 @@ def db_connect(func):
         try:
             connection = instance.connection_pool.get_connection()
             if connection.is_connected():
-                print("데이터베이스 연결 성공")
+                logger.debug("데이터베이스 연결 성공")
                 cursor = connection.cursor(dictionary=True)
                 result = func(instance, cursor, *args, **kwargs)
                 connection.commit()
                 return result
         except Error as e:
-            print(f"Error: {e}")
+            logger.error("Database error in %s: %s", func.__name__, e)
         finally:
             if cursor:
                 cursor.close()
@@ -48,7 +51,7 @@ class Database:
                 **db_config
             )
         except Error as e:
-            print(e)
+            logger.error("Connection pool creation failed: %s", e)
     def insert_message(self, cursor, session_id: str, message: Message):
         role = message.sender
         content = message.message
@@ -80,7 +83,7 @@ class Database:
 
         values = [list(row.values()) for row in data]
         cursor.executemany(sql, values)
-        print(f"Data inserted into {table}")
+        logger.debug("Data inserted into %s", table)
         return cursor.rowcount
     @db_connect
     def insert_data(self, cursor, table, data) -> int:
@@ -88,7 +91,7 @@ class Database:
         columns = ", ".join(data.keys())
         sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
         cursor.execute(sql, list(data.values()))
-        print(f"Data inserted into {table}")
+        logger.debug("Data inserted into %s", table)
         return cursor.rowcount
 
     @db_connect
@@ -102,14 +105,14 @@ class Database:
         set_clause = ", ".join([f"{key} = %s" for key in data.keys()])
         sql = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
         cursor.execute(sql, list(data.values()))
-        print(f"Data updated in {table}")
+        logger.debug("Data updated in %s", table)
         return cursor.rowcount
 
     @db_connect
     def delete_data(self, cursor, table, where_clause) -> int:
         sql = f"DELETE FROM {table} WHERE {where_clause}"
         cursor.execute(sql)
-        print(f"Data deleted from {table}")
+        logger.debug("Data deleted from %s", table)
         return cursor.rowcount
 
 
@@ -0,0 +1,85 @@
+import csv
+import os
+import threading
+from typing import Dict, Optional
+from backend.core.config import settings
+
+
+class ReferenceIndex:
+    """공항/항공사 참조 데이터를 프로세스 메모리에 올려두고 코드로 조회하는 읽기 전용 인덱스"""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(ReferenceIndex, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):  # 초기화 여부 확인
+            self.data_dir = os.path.join(settings.ROOT_DIR, "backend", "datas", "flights")
+            self.airports_by_iata: Dict[str, Dict] = {}
+            self.airports_by_icao: Dict[str, Dict] = {}
+            self.carriers_by_code: Dict[str, str] = {}
+            self.loaded = False
+            self.initialized = True  # 초기화 상태 표시
+
+    # CSV 파일 읽기 함수
+    def _read_csv(self, filename: str):
+        with open(os.path.join(self.data_dir, filename), 'rt', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    # 인덱스 생성 함수 - db가 주어지면 DB 테이블에서, 아니면 CSV 데이터셋에서 한 번에 로드
+    def refresh(self, db=None):
+        if db is not None:
+            airports = [dict(row._mapping) for row in db.fetch_data("airports") or []]
+            carriers = [dict(row._mapping) for row in db.fetch_data("carriers") or []]
+        else:
+            airports = self._read_csv("airports_dataset.csv")
+            carriers = self._read_csv("carrier_dataset.csv")
+
+        airports_by_iata = {}
+        airports_by_icao = {}
+        for airport in airports:
+            iata = (airport.get('IATA') or '').strip().upper()
+            icao = (airport.get('ICAO') or '').strip().upper()
+            if iata:
+                airports_by_iata[iata] = airport
+            if icao:
+                airports_by_icao[icao] = airport
+        carriers_by_code = {
+            carrier['carrierCode'].strip().upper(): carrier['carrierName']
+            for carrier in carriers if carrier.get('carrierCode')
+        }
+
+        # 새 딕셔너리를 다 만든 뒤 한 번에 교체하여 조회 중인 스레드가 중간 상태를 보지 않도록 함
+        with self._lock:
+            self.airports_by_iata = airports_by_iata
+            self.airports_by_icao = airports_by_icao
+            self.carriers_by_code = carriers_by_code
+            self.loaded = True
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.refresh()
+
+    def get_airport(self, iata: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self.airports_by_iata.get((iata or '').upper())
+
+    def get_airport_by_icao(self, icao: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self.airports_by_icao.get((icao or '').upper())
+
+    def get_airport_name(self, iata: str) -> Optional[str]:
+        airport = self.get_airport(iata)
+        return airport['AIRPORT_NAME'] if airport else None
+
+    def get_carrier_name(self, carrier_code: str) -> Optional[str]:
+        self._ensure_loaded()
+        return self.carriers_by_code.get((carrier_code or '').upper())
+
+
+reference_index = ReferenceIndex()
@@ -0,0 +1,4 @@
+from backend.loadtest.harness import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from backend.model.flight import SkyscannerAPI
+from backend.model.flight_amadeus import AmadeusAPI
+from backend.services.flight_cache import flight_search_cache
+
+INTENT_MARKER = "[loadtest:intent]"
+FLIGHT_MARKER = "[loadtest:flight]"
+
+CITY_CODES = {"서울": "ICN", "도쿄": "NRT", "오사카": "KIX", "방콕": "BKK", "파리": "CDG", "뉴욕": "JFK", "타이베이": "TPE"}
+CARRIERS = ["Korean Air", "Asiana Airlines", "Jeju Air", "Japan Airlines", "Thai Airways", "Air France"]
+FLIGHT_WORDS = re.compile(r"항공권|비행기|출발|\d+\s*명|\d{4}-\d{2}-\d{2}|에서 .+ 가")
+SEARCH_WORDS = re.compile(r"검색|찾아|추천")
+
+
+class LatencyModel:
+    """지연시간 분포 - fixed:초, uniform:최소,최대, normal:평균,표준편차, lognormal:중앙값,sigma"""
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value] or [0.0]
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self.lock:
+            if self.kind == "uniform":
+                value = self.random.uniform(self.params[0], self.params[1])
+            elif self.kind == "normal":
+                value = self.random.gauss(self.params[0], self.params[1])
+            elif self.kind == "lognormal":
+                value = self.params[0] * self.random.lognormvariate(0, self.params[1])
+            else:
+                value = self.params[0]
+        return max(0.0, value)
+
+
+class StageRecorder:
+    """단계별(LLM, 항공 공급자, Vision, 임베딩) 소요시간 기록 - 서버 스레드와 클라이언트에서 함께 사용"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self.lock:
+            return {stage: list(values) for stage, values in self.samples.items()}
+
+
+recorder = StageRecorder()
+
+
+class QuestionPlaceholder(MessagesPlaceholder):
+    """체인 입력의 question(메시지 하나)을 그대로 넣는 자리 - 실제 hub 프롬프트의 사용자 메시지 위치"""
+
+    def format_messages(self, **kwargs: Any) -> List[BaseMessage]:
+        value = kwargs[self.variable_name]
+        return super().format_messages(**{self.variable_name: value if isinstance(value, list) else [value]})
+
+
+def build_prompts() -> Dict[str, ChatPromptTemplate]:
+    """hub 프롬프트 대신 쓰는 프롬프트 - 가짜 LLM이 체인 종류와 입력을 알 수 있도록 표시를 넣는다"""
+    return {
+        "intent": ChatPromptTemplate.from_messages([
+            ("system", INTENT_MARKER + " session_id={session_id}\n{client_info}"),
+            QuestionPlaceholder(variable_name="question"),
+        ]),
+        "flight": ChatPromptTemplate.from_messages([
+            ("system", FLIGHT_MARKER + " session_id={session_id}\n{client_info}"),
+            QuestionPlaceholder(variable_name="question"),
+        ]),
+    }
+
+
+class FakeHub:
+    def __init__(self, prompts: Dict[str, ChatPromptTemplate], names: Dict[str, str]):
+        self.prompts = prompts
+        self.names = names
+
+    def pull(self, name: str) -> ChatPromptTemplate:
+        return self.prompts[self.names[name]]
+
+
+class FakeChatModel(BaseChatModel):
+    """ChatOpenAI 대체 모델 - 의도/항공 체인 입력을 보고 프롬프트 형식(JSON)에 맞는 답을 지연시간 분포에 따라 생성"""
+    latency_spec: str = "fixed:0"
+    chunk_size: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "loadtest-fake"
+
+    def latency(self) -> LatencyModel:
+        return LATENCY_MODELS.setdefault(self.latency_spec, LatencyModel(self.latency_spec))
+
+    @staticmethod
+    def parse_prompt(messages: List[BaseMessage]):
+        system = str(messages[0].content)
+        stage = "llm_flight" if system.startswith(FLIGHT_MARKER) else "llm_intent"
+        session_id = re.search(r"session_id=(\S*)", system).group(1)
+        client_info = json.loads(system.split("\n", 1)[1])
+        return stage, session_id, client_info, str(messages[1].content)
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        stage, session_id, client_info, question = self.parse_prompt(messages)
+        if stage == "llm_flight":
+            return json.dumps(self.flight_answer(session_id, client_info, question), ensure_ascii=False)
+        if FLIGHT_WORDS.search(question):
+            answer = {"type": "flight", "message": ""}
+        elif SEARCH_WORDS.search(question):
+            answer = {"type": "search", "message": f"'{question}'에 대한 검색 결과입니다. " + "여행 정보 " * 20}
+        else:
+            answer = {"type": "message", "message": f"'{question}'에 대한 답변입니다. " + "안내 문장 " * 30}
+        return json.dumps({"session_id": session_id, "sender": "hero", **answer}, ensure_ascii=False)
+
+    @staticmethod
+    def flight_answer(session_id: str, client_info: Dict, question: str) -> Dict:
+        update = {}
+        route = re.search(r"(\S+)에서\s+(\S+?)(?:\s|로|으로|가는|까지|$)", question)
+        if route and route.group(1) in CITY_CODES and route.group(2) in CITY_CODES:
+            update.update(origin=route.group(1), origin_location_code=CITY_CODES[route.group(1)],
+                          destination=route.group(2), destination_location_code=CITY_CODES[route.group(2)])
+        date = re.search(r"\d{4}-\d{2}-\d{2}", question)
+        if date:
+            update["departure_date"] = date.group(0)
+        adults = re.search(r"(\d+)\s*명", question)
+        if adults:
+            update["adults"] = int(adults.group(1))
+        merged = {**client_info, **update}
+        missing = [field for field in ("origin", "destination", "departure_date") if not merged.get(field)]
+        message = f"{', '.join(missing)}을(를) 알려주세요." if missing else "항공권을 검색합니다."
+        return {"session_id": session_id, "type": "flight", "sender": "hero", "message": message,
+                "client_info": update}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        time.sleep(self.latency().sample())
+        content = self.respond(messages)
+        recorder.record(self.parse_prompt(messages)[0], time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency().sample())
+        content = self.respond(messages)
+        recorder.record(self.parse_prompt(messages)[0], time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    # 전체 지연시간의 절반은 첫 토큰까지, 나머지는 조각마다 나누어 대기
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        total = self.latency().sample()
+        content = self.respond(messages)
+        chunks = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+        await asyncio.sleep(total / 2)
+        for chunk in chunks:
+            await asyncio.sleep(total / 2 / len(chunks))
+            generation = ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk, chunk=generation)
+            yield generation
+        recorder.record(self.parse_prompt(messages)[0], time.perf_counter() - started)
+
+
+LATENCY_MODELS: Dict[str, LatencyModel] = {}
+
+
+def synthetic_flights(client_info: Dict, provider: str) -> List[Dict]:
+    """노선/날짜별로 항상 같은 항공편 목록 (parse_flight_info 형식)"""
+    key = f"{provider}|{client_info['origin_location_code']}|{client_info['destination_location_code']}|{client_info['departure_date']}"
+    rng = random.Random(int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16))
+    departure_day = datetime.fromisoformat(str(client_info['departure_date'])[:10])
+    flights = []
+    for _ in range(rng.randint(5, 15)):
+        departure = departure_day + timedelta(minutes=rng.randrange(6 * 60, 22 * 60, 5))
+        duration = rng.randint(90, 900)
+        carrier = rng.choice(CARRIERS)
+        flights.append({
+            'price': float(rng.randrange(90000, 1500000, 100)),
+            'departure_time': departure.strftime('%Y-%m-%d %H:%M:%S'),
+            'arrival_time': (departure + timedelta(minutes=duration)).strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_minutes': duration,
+            'origin_airport': client_info['origin_location_code'],
+            'destination_airport': client_info['destination_location_code'],
+            'direct': rng.choice([0, 0, 1, 2]),
+            'marketing_carriers': [carrier],
+            'operating_carriers': [carrier],
+            'tags': []
+        })
+    return flights
+
+
+class FakeSkyscannerAPI(SkyscannerAPI):
+    """RapidAPI 호출 없이 같은 캐시 경로를 타는 Skyscanner 대체"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.cache = flight_search_cache
+
+    def get_flight_info(self, client_info: Dict) -> List[Dict]:
+        def fetch():
+            started = time.perf_counter()
+            time.sleep(self.latency.sample())
+            recorder.record("skyscanner", time.perf_counter() - started)
+            return synthetic_flights(client_info, "skyscanner")
+
+        return self.cache.get_or_fetch_sync(self.cache.make_key("skyscanner", client_info), fetch)
+
+    async def aget_flight_info(self, client_info: Dict) -> List[Dict]:
+        async def fetch():
+            started = time.perf_counter()
+            await asyncio.sleep(self.latency.sample())
+            recorder.record("skyscanner", time.perf_counter() - started)
+            return synthetic_flights(client_info, "skyscanner")
+
+        return await self.cache.get_or_fetch(self.cache.make_key("skyscanner", client_info), fetch)
+
+
+class FakeAmadeusAPI(AmadeusAPI):
+    """Amadeus SDK 대체 - 오퍼를 Amadeus 응답 형식으로 만들어 실제 parse_flight_offers를 거친다"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def search_flight_offers(self, client_info: Dict) -> List[Dict]:
+        started = time.perf_counter()
+        time.sleep(self.latency.sample())
+        info = {
+            'origin_location_code': client_info['originLocationCode'],
+            'destination_location_code': client_info['destinationLocationCode'],
+            'departure_date': client_info['departureDate'],
+        }
+        adults = int(client_info.get('adults') or 1)
+        offers = [{
+            'itineraries': [{
+                'duration': f"PT{flight['duration_minutes'] // 60}H{flight['duration_minutes'] % 60}M",
+                'segments': [{
+                    'carrierCode': flight['marketing_carriers'][0][:2].upper(),
+                    'departure': {'iataCode': flight['origin_airport'], 'at': flight['departure_time'].replace(' ', 'T')},
+                    'arrival': {'iataCode': flight['destination_airport'], 'at': flight['arrival_time'].replace(' ', 'T')},
+                }]
+            }],
+            # 실제 응답처럼 price.total은 전체 여행자 합계, 여행자별 금액은 travelerPricings
+            'price': {'total': str(flight['price'] * adults)},
+            'travelerPricings': [{'travelerId': str(index + 1), 'travelerType': 'ADULT',
+                                  'price': {'total': str(flight['price'])}} for index in range(adults)]
+        } for flight in synthetic_flights(info, "amadeus")]
+        recorder.record("amadeus", time.perf_counter() - started)
+        return offers
+
+    def search_cheapest_date(self, origin: str, destination: str, start_date: str, end_date: str) -> Optional[List[Dict]]:
+        started = time.perf_counter()
+        time.sleep(self.latency.sample())
+        start, end = datetime.fromisoformat(start_date), datetime.fromisoformat(end_date)
+        rng = random.Random(f"{origin}|{destination}|{start_date}")
+        dates = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        recorder.record("amadeus", time.perf_counter() - started)
+        return [{'departureDate': day.strftime('%Y-%m-%d'), 'price': {'total': str(rng.randrange(90000, 900000, 100))}}
+                for day in dates]
+
+
+class FakeVisionClient:
+    """Google Vision ImageAnnotatorClient 대체 - 배치 요청 한 번에 지연시간 한 번, 요청마다 web detection 결과 반환"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def batch_annotate_images(self, requests: List[Any]) -> SimpleNamespace:
+        started = time.perf_counter()
+        time.sleep(self.latency.sample())
+        recorder.record("vision", time.perf_counter() - started)
+        return SimpleNamespace(responses=[SimpleNamespace(
+            error=SimpleNamespace(code=0, message=""),
+            web_detection=SimpleNamespace(
+                pages_with_matching_images=[SimpleNamespace(url="https://example.com/nyhavn")],
+                partial_matching_images=[SimpleNamespace(url="https://example.com/nyhavn.jpg")],
+                web_entities=[SimpleNamespace(score=0.9, description="Nyhavn"),
+                              SimpleNamespace(score=0.7, description="Copenhagen")],
+            )
+        ) for _ in requests])
+
+
+class FakeEmbeddings(Embeddings):
+    """OpenAIEmbeddings 대체 - 문장 해시로 만든 고정 벡터 (같은 문장은 같은 벡터)"""
+
+    def __init__(self, latency: LatencyModel, size: int = 256):
+        self.latency = latency
+        self.size = size
+        self.model = "loadtest-fake"
+
+    def vector(self, text: str) -> List[float]:
+        seed = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.size).astype(np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        time.sleep(self.latency.sample())
+        recorder.record("embeddings", time.perf_counter() - started)
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeDatabase:
+    """MySQL Database 대체 - 공항/항공사 이름은 reference_index(CSV)에서 찾으므로 빈 결과만 반환"""
+
+    def fetch_data(self, *args, **kwargs) -> List:
+        return []
+
+    def insert_data(self, *args, **kwargs):
+        return None
+
+    def insert_datas(self, *args, **kwargs):
+        return None
+
+    def update_data(self, *args, **kwargs):
+        return None
+
+    def delete_data(self, *args, **kwargs):
+        return None
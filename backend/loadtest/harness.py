@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+# 이 모듈은 backend 패키지를 최상단에서 import하지 않는다 - 설정(환경 변수)과 가짜 공급자를 먼저 설치해야 하기 때문
+
+PROMPT_NAMES = {"intent": "loadtest/intent", "flight": "loadtest/flight"}
+
+IMAGE_VARIANTS = 8
+
+
+def sample_image(variant: int) -> str:
+    """이미지 검색 대화용 사진 (data URL) - 변형 번호가 같으면 같은 이미지라 Vision 결과 캐시도 함께 측정된다"""
+    from PIL import Image
+
+    image = Image.linear_gradient('L').rotate(variant * 360 / IMAGE_VARIANTS).resize((1280, 960)).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def percentiles(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def at(ratio: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": at(0.5),
+        "p90": at(0.9),
+        "p99": at(0.99),
+        "max": ordered[-1],
+    }
+
+
+def dialogues(seed: int) -> Dict[str, List[Dict]]:
+    """대화 유형별 사용자 메시지 목록 - 항공 대화는 여러 턴에 걸쳐 입력사항을 채운다"""
+    rng = random.Random(seed)
+    cities = ["도쿄", "오사카", "방콕", "파리", "뉴욕", "타이베이"]
+    destination = rng.choice(cities)
+    departure = (date.today() + timedelta(days=rng.randint(14, 90))).isoformat()
+    return {
+        "flight": [
+            {"message": f"서울에서 {destination} 가는 항공권 알아봐줘"},
+            {"message": f"{departure} 출발이요"},
+            {"message": f"{rng.randint(1, 3)}명"},
+        ],
+        "search": [
+            {"message": f"{destination} 맛집 추천해줘"},
+            {"message": "이 사진 어디야?", "image": sample_image(rng.randrange(IMAGE_VARIANTS))},
+        ],
+        "message": [
+            {"message": rng.choice(["일본 비자 필요해?", "환전은 어디서 하는게 좋아?", "여행자 보험 필요해?"])},
+            {"message": "고마워"},
+        ],
+    }
+
+
+def configure_environment(workdir: str):
+    """임시 디렉터리에 모든 로컬 저장소(SQLite, 인덱스, 스냅샷)를 두도록 환경 변수 설정"""
+    db_config_path = os.path.join(workdir, "db_config.yaml")
+    with open(db_config_path, "w") as f:
+        f.write("mysql:\n  drivername: sqlite\n  database: ':memory:'\n")
+    defaults = {
+        "ROOT_DIR": os.getcwd(),
+        "DB_CONFIG_PATH": db_config_path,
+        "SQLITE_CONNECTION_STRING": f"sqlite:///{os.path.join(workdir, 'chat_history.db')}",
+        "OPENAI_API_KEY": "loadtest",
+        "LANGCHAIN_INTENT_PROMPT_NAME": PROMPT_NAMES["intent"],
+        "LANGCHAIN_FLIGHT_PROMPT_NAME": PROMPT_NAMES["flight"],
+        "PROMPT_SNAPSHOT_DIR": os.path.join(workdir, "prompts"),
+        "FLIGHT_CACHE_PATH": os.path.join(workdir, "flight_cache.db"),
+        "SESSION_BACKEND_URL": os.path.join(workdir, "sessions.db"),
+        "INTENT_MODEL_PATH": os.path.join(workdir, "intent_model.json"),
+        "RESPONSE_CACHE_PATH": os.path.join(workdir, "response_cache"),
+        "VECTOR_INDEX_DIR": os.path.join(workdir, "vector_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.db"),
+        "VISION_CACHE_PATH": os.path.join(workdir, "vision_cache.db"),
+        "HISTORY_DEAD_LETTER_PATH": os.path.join(workdir, "history_dead_letter.jsonl"),
+    }
+    for key, value in defaults.items():
+        os.environ[key] = value
+
+
+def install_fakes(args: argparse.Namespace):
+    """외부 공급자를 가짜로 교체 - backend.api.chat(Herobot 생성) import 전에 호출해야 한다"""
+    from backend.loadtest import fakes
+
+    latency = {name: fakes.LatencyModel(getattr(args, f"{name}_latency"), seed=args.seed + index)
+               for index, name in enumerate(("llm", "skyscanner", "amadeus", "vision", "embedding"))}
+    fakes.LATENCY_MODELS[args.llm_latency] = latency["llm"]
+
+    import backend.services.prompt_store as prompt_store_module
+    prompt_store_module.hub = fakes.FakeHub(fakes.build_prompts(), {name: key for key, name in PROMPT_NAMES.items()})
+
+    # 싱글톤이므로 먼저 만들어 두면 VectorStore/시맨틱 캐시가 같은 가짜 임베딩을 사용
+    from backend.vectorstore.embedding_cache import CachedEmbeddings
+    CachedEmbeddings(fakes.FakeEmbeddings(latency["embedding"]))
+
+    # Vision 실행기(배치/스레드 풀)와 결과 캐시는 실제 코드를 쓰고 API 클라이언트만 교체
+    from backend.services.vision_executor import vision_executor
+    vision_executor.client = fakes.FakeVisionClient(latency["vision"])
+
+    import backend.databases.database as database_module
+    database_module.Database = fakes.FakeDatabase
+
+    import backend.services.flight_search as flight_search_module
+    flight_search_module.AmadeusAPI = lambda: fakes.FakeAmadeusAPI(latency["amadeus"])
+
+    import backend.services.chat as chat_module
+    chat_module.ChatOpenAI = lambda **kwargs: fakes.FakeChatModel(latency_spec=args.llm_latency)
+    chat_module.SkyscannerAPI = lambda: fakes.FakeSkyscannerAPI(latency["skyscanner"])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """create_app으로 만든 앱을 별도 스레드의 uvicorn에서 실행"""
+    import uvicorn
+    from backend.core.init_app import create_app
+
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+class SessionResult:
+    def __init__(self, dialogue: str):
+        self.dialogue = dialogue
+        self.turns: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
+
+
+async def run_session(index: int, port: int, args: argparse.Namespace, started_at: float) -> SessionResult:
+    import websockets
+
+    rng = random.Random(args.seed * 100003 + index)
+    kinds, weights = zip(*args.mix.items())
+    dialogue = rng.choices(kinds, weights=weights)[0]
+    result = SessionResult(dialogue)
+    await asyncio.sleep(rng.uniform(0, args.ramp_up))
+    session_id = f"loadtest-{args.seed}-{index}"
+    url = f"ws://127.0.0.1:{port}/chat/ws/chat?protocol={args.protocol}"
+    try:
+        async with websockets.connect(url, additional_headers={"Cookie": f"session_id={session_id}"},
+                                      max_size=None) as websocket:
+            for repeat in range(args.repeat):
+                for turn, message in enumerate(dialogues(args.seed + index + repeat)[dialogue]):
+                    payload = {"type": "", "sender": "user", "image": "", **message}
+                    sent = time.perf_counter()
+                    await websocket.send(json.dumps(payload, ensure_ascii=False))
+                    first_delta = None
+                    while True:
+                        frame = json.loads(await asyncio.wait_for(websocket.recv(), args.timeout))
+                        if frame.get("event") == "delta":
+                            if first_delta is None:
+                                first_delta = time.perf_counter() - sent
+                            continue
+                        break
+                    result.turns.append({
+                        "turn": turn,
+                        "kind": f"{dialogue}:{turn}",
+                        "type": frame.get("type"),
+                        "latency": time.perf_counter() - sent,
+                        "first_delta": first_delta,
+                        "at": time.perf_counter() - started_at,
+                    })
+                    await asyncio.sleep(rng.uniform(0, args.think_time))
+    except Exception as e:
+        result.errors.append(f"{type(e).__name__}: {e}")
+    return result
+
+
+def fetch_server_stats(port: int) -> Dict[str, Any]:
+    import httpx
+
+    stats = {}
+    for name, path in (("chat", "/chat/stats"), ("session", "/session/stats")):
+        try:
+            stats[name] = httpx.get(f"http://127.0.0.1:{port}{path}", timeout=10).json()
+        except Exception as e:
+            stats[name] = {"error": str(e)}
+    return stats
+
+
+def build_report(args: argparse.Namespace, results: List[SessionResult], elapsed: float,
+                 stages: Dict[str, List[float]], server_stats: Dict[str, Any]) -> Dict[str, Any]:
+    turns = [turn for result in results for turn in result.turns]
+    by_dialogue: Dict[str, List[float]] = {}
+    by_kind: Dict[str, List[float]] = {}
+    for result in results:
+        for turn in result.turns:
+            by_dialogue.setdefault(result.dialogue, []).append(turn["latency"])
+            by_kind.setdefault(turn["kind"], []).append(turn["latency"])
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsed_seconds": elapsed,
+        "sessions": len(results),
+        "failed_sessions": sum(1 for result in results if result.errors),
+        "errors": [error for result in results for error in result.errors][:50],
+        "turns": len(turns),
+        "throughput_turns_per_second": len(turns) / elapsed if elapsed else None,
+        "latency": {
+            "all": percentiles([turn["latency"] for turn in turns]),
+            "first_delta": percentiles([turn["first_delta"] for turn in turns if turn["first_delta"] is not None]),
+            "by_dialogue": {name: percentiles(values) for name, values in sorted(by_dialogue.items())},
+            "by_turn": {name: percentiles(values) for name, values in sorted(by_kind.items())},
+        },
+        "stages": {name: {**percentiles(values), "total": sum(values)} for name, values in sorted(stages.items())},
+        "server": server_stats,
+    }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="채팅 WebSocket 부하 테스트 (외부 API는 로컬 가짜로 대체)")
+    parser.add_argument("--sessions", type=int, default=20, help="동시 WebSocket 세션 수")
+    parser.add_argument("--repeat", type=int, default=1, help="세션마다 대화를 반복할 횟수")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("flight=0.5,search=0.25,message=0.25"),
+                        help="대화 유형 비율 (flight, search, message)")
+    parser.add_argument("--protocol", type=int, default=2, help="1: 단일 응답, 2: 스트리밍")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="세션 시작을 분산할 시간(초)")
+    parser.add_argument("--think-time", type=float, default=0.2, help="턴 사이 최대 대기 시간(초)")
+    parser.add_argument("--timeout", type=float, default=60, help="응답 대기 제한 시간(초)")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--skyscanner-latency", default="lognormal:1.2,0.5")
+    parser.add_argument("--amadeus-latency", default="lognormal:1.5,0.5")
+    parser.add_argument("--vision-latency", default="uniform:0.4,1.2")
+    parser.add_argument("--embedding-latency", default="uniform:0.05,0.2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="로컬 저장소 디렉터리 (기본값: 임시 디렉터리)")
+    parser.add_argument("--output", default="loadtest_report.json", help="JSON 보고서 경로 (-: 표준 출력)")
+    return parser.parse_args(argv)
+
+
+async def drive(args: argparse.Namespace, port: int) -> List[SessionResult]:
+    started_at = time.perf_counter()
+    return await asyncio.gather(*[run_session(index, port, args, started_at) for index in range(args.sessions)])
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="herobot-loadtest-")
+    os.makedirs(workdir, exist_ok=True)
+    configure_environment(workdir)
+    install_fakes(args)
+    from backend.loadtest.fakes import recorder
+
+    port = free_port()
+    server, thread = start_server(port)
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(drive(args, port))
+        elapsed = time.perf_counter() - started
+        report = build_report(args, results, elapsed, recorder.snapshot(), fetch_server_stats(port))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        latency = report["latency"]["all"]
+        print(f"{report['turns']} turns in {elapsed:.1f}s ({report['throughput_turns_per_second']:.2f} turns/s), "
+              f"p50 {latency.get('p50', 0):.3f}s p99 {latency.get('p99', 0):.3f}s, "
+              f"{report['failed_sessions']} failed sessions -> {args.output}")
+    return report
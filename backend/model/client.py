@@ -6,4 +6,6 @@ class Client(BaseModel):
     origin_location_code: Optional[str] = Field(description="출발지 공항 코드")
     destination: Optional[str] = Field(description="도착지 공항 이름")
     destination_location_code: Optional[str] = Field(description="도착지 공항 코드")
-    departure_date: Optional[str] = Field(description="출발일")
\ No newline at end of file
+    departure_date: Optional[str] = Field(description="출발일(YYYY-MM-DD), 한 달 전체를 찾을 때는 YYYY-MM")
+    flexible_days: Optional[int] = Field(description="출발일 앞뒤로 함께 찾아볼 일 수", default=None)
+    flexible_month: Optional[bool] = Field(description="출발 월 전체를 찾을지 여부", default=None)
\ No newline at end of file
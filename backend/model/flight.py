@@ -1,13 +1,18 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List
 from backend.core.config import settings
 from backend.databases.database import Database
 from backend.utils import (
     parse_flight_info,
+    rank_flights,
     summarize_flight_information,
     validate_date
 )
 from backend.model.client import Client
+from backend.services.flight_cache import flight_search_cache
+from backend.services.http_client import PooledHTTPClient, RETRY_STATUSES
 
 class SkyscannerAPI:
     def __init__(self):
@@ -17,21 +22,56 @@ class SkyscannerAPI:
             'x-rapidapi-host': settings.X_RAPIDAPI_HOST
         }
 
-    def get_flight_info(self, client_info: Dict) -> List[Dict]:
-        querystring = {
+        self.http = PooledHTTPClient("skyscanner", headers=self.headers)
+        self.session = self.create_session()
+        self.cache = flight_search_cache
+
+    # 동기 경로용 세션 - 커넥션 재사용과 재시도 정책 적용
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self.headers)
+        retry = Retry(total=settings.HTTP_MAX_RETRIES, backoff_factor=settings.HTTP_BACKOFF_BASE,
+                      status_forcelist=sorted(RETRY_STATUSES), allowed_methods=["GET"])
+        session.mount("https://", HTTPAdapter(pool_maxsize=settings.HTTP_MAX_KEEPALIVE, max_retries=retry))
+        return session
+
+    # adults를 보내지 않으므로 금액은 성인 1인 기준 (다른 공급자도 1인 금액으로 맞춘다)
+    def build_querystring(self, client_info: Dict) -> Dict:
+        return {
             "fromEntityId": client_info['origin_location_code'],
             "toEntityId": client_info['destination_location_code'],
             "departDate": validate_date(client_info['departure_date']),
             "currency": "KRW"
         }
-        response = requests.get(self.base_url, headers=self.headers, params=querystring).json()
+
+    def parse_response(self, response: Dict) -> List[Dict]:
         if not response.get('status', False):
             return []
         itineraries = response['data']['itineraries']
         return parse_flight_info(itineraries)
 
+    def get_flight_info(self, client_info: Dict) -> List[Dict]:
+        def fetch():
+            response = self.session.get(self.base_url, params=self.build_querystring(client_info),
+                                        timeout=(settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_TIMEOUT))
+            return self.parse_response(response.json())
+
+        return self.cache.get_or_fetch_sync(self.cache.make_key("skyscanner", client_info), fetch)
+
+    # 비동기 항공권 조회 함수 - 이벤트 루프를 막지 않는 HTTP 클라이언트 사용, 같은 노선/날짜 검색은 캐시 공유
+    async def aget_flight_info(self, client_info: Dict) -> List[Dict]:
+        async def fetch():
+            response = await self.http.get(self.base_url, params=self.build_querystring(client_info))
+            return self.parse_response(response.json())
+
+        return await self.cache.get_or_fetch(self.cache.make_key("skyscanner", client_info), fetch)
+
     def get_cheapest_flight_info(self, db:Database, client_info: Dict) -> str:
-        flight_info_list = self.get_flight_info(client_info)
+        flight_info_list = rank_flights(self.get_flight_info(client_info), settings.FLIGHT_RANKING_STRATEGIES)
+        return summarize_flight_information(db, flight_info_list)
+
+    async def aget_cheapest_flight_info(self, db: Database, client_info: Dict) -> str:
+        flight_info_list = rank_flights(await self.aget_flight_info(client_info), settings.FLIGHT_RANKING_STRATEGIES)
         return summarize_flight_information(db, flight_info_list)
 
 
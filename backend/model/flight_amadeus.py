@@ -1,10 +1,19 @@
+import asyncio
 from amadeus import Client, ResponseError
+import logging
 import os
+import re
 from dotenv import load_dotenv
 import certifi
 from backend.databases.database import Database
-from typing import Dict, Optional
-from backend.utils import summarize_flight_information
+from typing import Dict, List, Optional
+from backend.utils import rank_flights, summarize_flight_information
+from backend.databases.reference_index import reference_index
+
+logger = logging.getLogger(__name__)
+
+# Amadeus 여정 소요시간 (ISO-8601, 예: PT11H5M, P1DT2H)
+DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?$')
 
 class AmadeusAPI:
     def __init__(self):
@@ -24,96 +33,131 @@ class AmadeusAPI:
             ssl_ca_file=certifi.where()
         )
 
+    def build_search_params(self, client_info: Dict) -> Dict:
+        travelers = [{
+            'id': str(i + 1),
+            'travelerType': 'ADULT',
+            'fareOptions': ['STANDARD']
+        } for i in range(client_info['adults'])]
+
+        return {
+            'originDestinations': [{
+                'id': '1',
+                'originLocationCode': client_info['originLocationCode'],
+                'destinationLocationCode': client_info['destinationLocationCode'],
+                'departureDateTimeRange': {
+                    'date': client_info['departureDate'],
+                }
+            }],
+            'travelers': travelers,
+            'sources': ['GDS'],
+            'searchCriteria': {
+                'maxFlightOffers': 250,  # 최대 항공권 수를 설정하여 더 많은 결과를 가져옵니다.
+                'flightFilters': {
+                    'cabinRestrictions': [{
+                        'cabin': 'ECONOMY',
+                        'coverage': 'MOST_SEGMENTS',
+                        'originDestinationIds': ['1']
+                    }]
+                }
+            },
+            'currencyCode': 'KRW'
+        }
+
+    # 항공권 오퍼 조회 함수 - API 오류는 호출자에게 전달
+    def search_flight_offers(self, client_info: Dict) -> List[Dict]:
+        response = self.amadeus.shopping.flight_offers_search.post(body=self.build_search_params(client_info))
+        if response.result and response.result.get('data'):
+            return response.result['data']
+        return []
+
+    # 성인 1인 금액 - price.total은 전체 여행자 합계이므로 Skyscanner/최저가 날짜 API와 같은 1인 기준으로 맞춘다
+    @staticmethod
+    def price_per_adult(offer: Dict) -> float:
+        traveler_pricings = offer.get('travelerPricings') or []
+        for pricing in traveler_pricings:
+            if pricing.get('travelerType') == 'ADULT':
+                return float(pricing['price']['total'])
+        return float(offer['price']['total']) / max(1, len(traveler_pricings))
+
+    # 여정 소요시간(분) - 출도착 시각(at)은 현지 시각이라 시간대가 다른 노선에서는 차이로 계산할 수 없다
+    @staticmethod
+    def parse_duration(duration: Optional[str]) -> Optional[int]:
+        match = DURATION_PATTERN.match(duration or '')
+        if not match or not any(match.groups()):
+            return None
+        days, hours, minutes = (int(value or 0) for value in match.groups())
+        return days * 1440 + hours * 60 + minutes
+
+    # 오퍼를 parse_flight_info와 같은 형식의 항공편 정보로 변환
+    def parse_flight_offers(self, flight_offers: List[Dict]) -> List[Dict]:
+        flight_data = []
+        for offer in flight_offers:
+            try:
+                itinerary = offer['itineraries'][0]
+                segments = itinerary['segments']
+                first_segment, last_segment = segments[0], segments[-1]
+                carrier_codes = list(dict.fromkeys(segment['carrierCode'] for segment in segments))
+                operating_codes = list(dict.fromkeys(
+                    segment.get('operating', {}).get('carrierCode', segment['carrierCode']) for segment in segments
+                ))
+                flight_data.append({
+                    'marketing_carriers': [reference_index.get_carrier_name(code) or code for code in carrier_codes],
+                    'operating_carriers': [reference_index.get_carrier_name(code) or code for code in operating_codes],
+                    'departure_time': first_segment['departure']['at'].replace('T', ' '),
+                    'arrival_time': last_segment['arrival']['at'].replace('T', ' '),
+                    'origin_airport': first_segment['departure']['iataCode'],
+                    'destination_airport': last_segment['arrival']['iataCode'],
+                    'direct': len(segments) - 1,
+                    'duration_minutes': self.parse_duration(itinerary.get('duration')),
+                    'price': self.price_per_adult(offer),
+                    'tags': []
+                })
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning("Error parsing flight offer: %s", e)
+                continue
+        return flight_data
+
     def search_lowest_fare_flight(self, db: Database, client_info: Dict) -> Optional[str]:
         try:
-            travelers = [{
-                'id': str(i + 1),
-                'travelerType': 'ADULT',
-                'fareOptions': ['STANDARD']
-            } for i in range(client_info['adults'])]
-
-            search_params = {
-                'originDestinations': [{
-                    'id': '1',
-                    'originLocationCode': client_info['originLocationCode'],
-                    'destinationLocationCode': client_info['destinationLocationCode'],
-                    'departureDateTimeRange': {
-                        'date': client_info['departureDate'],
-                    }
-                }],
-                'travelers': travelers,
-                'sources': ['GDS'],
-                'searchCriteria': {
-                    'maxFlightOffers': 250,  # 최대 항공권 수를 설정하여 더 많은 결과를 가져옵니다.
-                    'flightFilters': {
-                        'cabinRestrictions': [{
-                            'cabin': 'ECONOMY',
-                            'coverage': 'MOST_SEGMENTS',
-                            'originDestinationIds': ['1']
-                        }]
-                    }
-                },
-                'currencyCode': 'KRW'
-            }
-
-            response = self.amadeus.shopping.flight_offers_search.post(body=search_params)
-            print(response.result)  # 응답 데이터 확인
+            flight_offers = self.search_flight_offers(client_info)
+            logger.debug("Amadeus flight offers: %s", flight_offers)  # 응답 데이터 확인
 
-            if response.result and response.result.get('data'):
-                flight_offers = response.result['data']
-                # 최저가 항공권을 선택하는 로직 추가
-                lowest_fare = float('inf')
-                lowest_fare_offer = None
-
-                for offer in flight_offers:
-                    price = float(offer['price']['total'])
-                    if price < lowest_fare:
-                        lowest_fare = price
-                        lowest_fare_offer = offer
-
-                if lowest_fare_offer:
-                    airline_code = lowest_fare_offer['itineraries'][0]['segments'][0]['carrierCode']
-                    first_segment = lowest_fare_offer['itineraries'][0]['segments'][0]
-                    last_segment = lowest_fare_offer['itineraries'][0]['segments'][-1]
-                    return summarize_flight_information(db, {
-                        'originCode': lowest_fare_offer['itineraries'][0]['segments'][0]['departure']['iataCode'],
-                        'destinationCode': lowest_fare_offer['itineraries'][0]['segments'][-1]['arrival']['iataCode'],
-                        'departureDate': lowest_fare_offer['itineraries'][0]['segments'][0]['departure']['at'].split('T')[0],
-                        'departureTime': first_segment['departure']['at'].split('T')[1],
-                        'arrivalTime': last_segment['arrival']['at'].split('T')[1],
-                        'price': lowest_fare_offer['price']['total'],
-                        'airlineCode': airline_code,
-                        'airline': "",
-                        'airlineLogo': f'https://pic.tripcdn.com/airline_logo/3x/{airline_code.lower()}.webp'
-                    })
+            # 전체 오퍼를 열 단위로 변환해 한 번에 최저가를 고른다
+            lowest_fare = rank_flights(self.parse_flight_offers(flight_offers), ("cheapest",))
+            if lowest_fare:
+                return summarize_flight_information(db, lowest_fare)
 
         except ResponseError as error:
-            print(f"API 호출 중 오류 발생: {error}")
+            logger.error("API 호출 중 오류 발생: %s", error)
             if error.response:
-                print(f"응답 코드: {error.response.status_code}")
-                print(f"응답 내용: {error.response.result}")
+                logger.error("응답 코드: %s, 응답 내용: %s", error.response.status_code, error.response.result)
             return "검색된 정보가 없습니다."
 
+    # 비동기 최저가 조회 함수 - Amadeus SDK는 블로킹이므로 스레드풀에서 실행
+    async def asearch_lowest_fare_flight(self, db: Database, client_info: Dict) -> Optional[str]:
+        return await asyncio.to_thread(self.search_lowest_fare_flight, db, client_info)
+
 
-    def search_cheapest_date(self, origin: str, destination: str, start_date: str, end_date: str) -> Optional[Dict]:
+    # 출발일 범위(start_date ~ end_date)의 날짜별 최저가 조회 (편도)
+    def search_cheapest_date(self, origin: str, destination: str, start_date: str, end_date: str) -> Optional[List[Dict]]:
         try:
             response = self.amadeus.shopping.flight_dates.get(
-                originLocationCode=origin,
-                destinationLocationCode=destination,
-                departureDate=start_date,
-                returnDate=end_date
+                origin=origin,
+                destination=destination,
+                departureDate=f"{start_date},{end_date}",
+                oneWay='true'
             )
 
-            print(response.result)  # 응답 데이터 확인
+            logger.debug("Amadeus cheapest dates: %s", response.result)  # 응답 데이터 확인
 
             if response.result and response.result.get('data'):
                 return response.result['data']
 
         except ResponseError as error:
-            print(f"API 호출 중 오류 발생: {error}")
+            logger.error("API 호출 중 오류 발생: %s", error)
             if error.response:
-                print(f"응답 코드: {error.response.status_code}")
-                print(f"응답 내용: {error.response.result}")
+                logger.error("응답 코드: %s, 응답 내용: %s", error.response.status_code, error.response.result)
             return None
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple
+class Itinerary(BaseModel):
+    provider: str = Field(description="검색 결과를 제공한 공급자(skyscanner, amadeus)")
+    marketing_carriers: List[str] = Field(description="마케팅 항공사 이름 목록", default_factory=list)
+    operating_carriers: List[str] = Field(description="운영 항공사 이름 목록", default_factory=list)
+    departure_time: str = Field(description="출발 시각(YYYY-MM-DD HH:MM:SS)")
+    arrival_time: str = Field(description="도착 시각(YYYY-MM-DD HH:MM:SS)")
+    origin_airport: str = Field(description="출발 공항 IATA 코드")
+    destination_airport: str = Field(description="도착 공항 IATA 코드")
+    direct: int = Field(description="경유 횟수(0이면 직항)", default=0)
+    duration_minutes: Optional[float] = Field(description="공급자가 제공한 소요 시간(분)", default=None)
+    price: float = Field(description="성인 1인 금액 (모든 공급자 공통 기준)")
+    tags: List[str] = Field(description="cheapest, shortest 등 결과 태그", default_factory=list)
+
+    # 공급자가 달라도 같은 항공편으로 보는 기준 (구간과 출도착 시각)
+    def dedupe_key(self) -> Tuple:
+        return (self.origin_airport, self.destination_airport, self.departure_time, self.arrival_time)
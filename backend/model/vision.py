@@ -1,62 +1,92 @@
+import asyncio
+import logging
+from concurrent.futures import Future
+from typing import Optional, Tuple
 from google.cloud import vision
 from backend.model.location import Location
-import json
-from backend.utils.vision_utils import load_image_from_path, load_image_from_base64, web_detection_to_dict
+from backend.core.config import settings
+from backend.core.telemetry import span
+from backend.services.vision_cache import vision_result_cache
+from backend.services.vision_executor import vision_executor
+from backend.utils.vision_utils import load_image_from_path, load_image_from_base64, prepare_image, web_detection_to_dict
+
+logger = logging.getLogger(__name__)
 
 class VisionProcessor:
-    _client = None
-    @classmethod
-    def get_client(cls):
-        if cls._client is None:
-            cls._client = vision.ImageAnnotatorClient()
-        return cls._client
-    def annotate(self, path: str) -> vision.WebDetection:
+    # 요청에 보낼 이미지 바이트 (원격 이미지는 None) - base64는 한 번만 디코딩하고 큰 사진은 메모리에서 축소
+    @staticmethod
+    def load_image(path: str) -> Optional[bytes]:
         if path.startswith("http") or path.startswith("gs:"):
+            return None
+        if path.startswith("data"):
+            return prepare_image(load_image_from_base64(path))
+        return load_image_from_path(path)
+
+    # web detection 요청을 Vision 실행기에 넘기고 결과 Future를 반환 (동시 요청은 한 배치로 묶인다)
+    def submit(self, path: str, content: Optional[bytes] = None) -> Future:
+        if content is None:
+            content = self.load_image(path)
+        if content is None:
             image = vision.Image()
             image.source.image_uri = path
-        elif path.startswith("data"):
-            image_data = load_image_from_base64(path)
-            image = vision.Image({"content": image_data})
         else:
-            image_data = load_image_from_path(path)
-            image = vision.Image({"content": image_data})
-        client = self.get_client()
-        web_detection = client.web_detection(image=image).web_detection
-        return web_detection
+            image = vision.Image({"content": content})
+        return vision_executor.submit(image)
+
+    def annotate(self, path: str, content: Optional[bytes] = None) -> vision.WebDetection:
+        return self.submit(path, content).result()
+
+    # 이미지 디코딩 후 캐시 조회 - (요청 바이트, 지각 해시, 캐시된 Location JSON)
+    def lookup_cached(self, path: str) -> Tuple[Optional[bytes], Optional[int], Optional[str]]:
+        content = self.load_image(path)
+        # 같은 이미지나 거의 같은 이미지(재업로드, 전달된 사진)는 이전 분석 결과를 재사용
+        fingerprint = None
+        if content is not None and settings.VISION_CACHE_ENABLED:
+            fingerprint = vision_result_cache.fingerprint(content)
+        if fingerprint is not None:
+            return content, fingerprint, vision_result_cache.lookup(fingerprint)
+        return content, fingerprint, None
 
     def report(self, path: str) -> str:
         """Prints detected features in the provided web annotations.
         Args:
             path: 이미지 파일의 경로를 전달
         """
-        annotations = self.annotate(path)
-        if annotations.pages_with_matching_images:
-            print(
-                f"\n{len(annotations.pages_with_matching_images)} Pages with matching images retrieved"
-            )
-            for page in annotations.pages_with_matching_images:
-                print(f"Url   : {page.url}")
+        with span("vision") as attributes:
+            content, fingerprint, cached = self.lookup_cached(path)
+            attributes["cache_hit"] = cached is not None
+            if cached is not None:
+                return cached
+            return self.to_location(self.annotate(path, content), fingerprint)
 
-        if annotations.partial_matching_images:
-            print(f"\n{len(annotations.partial_matching_images)} Partial Matches found: ")
-            for image in annotations.partial_matching_images:
-                print(f"Url  : {image.url}")
-
-        if annotations.web_entities:
-            print(f"\n{len(annotations.web_entities)} Web entities found: ")
-            for entity in annotations.web_entities:
-                print(f"Score      : {entity.score}")
-                print(f"Description: {entity.description}")
+    def to_location(self, annotations: vision.WebDetection, fingerprint: Optional[int] = None) -> str:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%d Pages with matching images retrieved: %s", len(annotations.pages_with_matching_images),
+                         [page.url for page in annotations.pages_with_matching_images])
+            logger.debug("%d Partial Matches found: %s", len(annotations.partial_matching_images),
+                         [image.url for image in annotations.partial_matching_images])
+            logger.debug("%d Web entities found: %s", len(annotations.web_entities),
+                         [(entity.score, entity.description) for entity in annotations.web_entities])
 
         annotations_dict = web_detection_to_dict(annotations)
-
-        with open('annotations.json', 'w', encoding='utf-8') as f:
-            json.dump(annotations_dict, f, ensure_ascii=False, indent=4)
-        return Location(
+        location = Location(
             url=annotations_dict['urls'][0],
             image_url=annotations_dict['images'][0],
             entity=annotations_dict['entities']
         ).json()
+        if fingerprint is not None:
+            vision_result_cache.store(fingerprint, location)
+        return location
+
+    # 비동기 분석 함수 - 디코딩/캐시 조회·저장(SQLite 커밋)은 스레드에서 하고 Vision 응답은 이벤트 루프에서 기다린다
+    async def areport(self, path: str) -> str:
+        with span("vision") as attributes:
+            content, fingerprint, cached = await asyncio.to_thread(self.lookup_cached, path)
+            attributes["cache_hit"] = cached is not None
+            if cached is not None:
+                return cached
+            annotations = await asyncio.wrap_future(self.submit(path, content))
+            return await asyncio.to_thread(self.to_location, annotations, fingerprint)
 
 if __name__ == "__main__":
     processor = VisionProcessor()
@@ -1,127 +1,384 @@
+import asyncio
+import hashlib
 import json
+import logging
+from operator import itemgetter
 
-from langchain_community.chat_message_histories import SQLChatMessageHistory
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import MessagesPlaceholder, ChatPromptTemplate
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.messages.base import BaseMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain import hub
 from backend.model.messages import Message, CustomAIMessage, CustomHumanMessage
 from backend.model.flight import SkyscannerAPI
+from backend.services.flight_search import create_flight_search
+from backend.services.flexible_dates import FlexibleDateSearch, is_flexible_request, parse_flexible_dates
+from backend.services.intent_classifier import intent_classifier
+from backend.vectorstore.response_cache import response_cache
 from backend.model.vision import VisionProcessor
 from backend.databases.database import Database
 from backend.core.config import settings, LLMConfig
-from backend.utils.output_parsers import MessageOutputParser
-from sqlalchemy import create_engine
-from typing import List, Dict, Any, Tuple
+from backend.core.telemetry import bind_session, span
+from backend.utils.output_parsers import MessageOutputParser, MessageFieldStreamer
+from backend.services.prompt_store import prompt_store
+from backend.services.session_state import SessionStateStore
+from backend.services.session_backend import session_backend, BackendChatMessageHistory
+from backend.services.history_writer import history_writer, BufferedChatMessageHistory
+from backend.services.history_window import flight_history_window
+from typing import List, Dict, Any, Tuple, Optional, Callable, Awaitable
 
+logger = logging.getLogger(__name__)
+
+CLIENT_INFO_NAMESPACE = "client_info"
+REQUIRED_CLIENT_INFO = ("adults", "origin", "destination", "origin_location_code",
+                        "destination_location_code", "departure_date")
+
+# 대화 기록에 이미지 대신 남기는 표식 - 업로드 data URL(수 MB)은 Vision 요청에만 메모리로 사용
+HISTORY_IMAGE_PREFIX = "image:sha1:"
+HISTORY_IMAGE_MAX_LENGTH = 512
+
+# 스트리밍 응답 조각을 전달받는 콜백 타입
+DeltaCallback = Callable[[str], Awaitable[None]]
 
 
 class Herobot:
     def __init__(self, db: Database):
         self.vision_api = VisionProcessor()
         self.skyscanner_api = SkyscannerAPI()
+        self.flight_search = create_flight_search(self.skyscanner_api)
+        self.flexible_search = FlexibleDateSearch(self.flight_search)
         self.llm = ChatOpenAI(model_name="gpt-4o", temperature=1)
         self.output_parser = MessageOutputParser()
         self.db = db
-        self.chat_histories: Dict[str, Dict[str, Any]] = {}
-        self.chains: Dict[str, Dict[str, Any]] = {}
-        self.client_info_store: Dict[str, Dict[str, Any]] = {}
-        self.engine = create_engine(settings.SQLITE_CONNECTION_STRING)
+        # SQL 대화 기록 객체 캐시 (내용은 DB에 있으므로 개수/TTL 제한만 적용)
+        self.chat_histories = SessionStateStore("chat_histories", max_bytes=0, sizeof=lambda histories: 0)
+        # client_info와 항공 대화 기록은 세션 상태 저장소를 통해 읽고 쓴다 (멀티 워커 공유)
+        self.session_backend = session_backend
+        # 프로세스 전체에서 공유하는 체인 (세션 상태는 configurable.session_id로만 구분)
+        self.chains: Dict[str, Any] = {}
+        self.prompt_revision = 0
+        # 항공 체인 추측 실행 통계
+        self.speculation_stats = {"started": 0, "used": 0, "discarded": 0, "failed": 0}
 
     # 프롬프트 로드 함수
     def load_prompt(self) -> Tuple:
-        intent_prompt = hub.pull(settings.LANGCHAIN_INTENT_PROMPT_NAME)
-        flight_prompt = hub.pull(settings.LANGCHAIN_FLIGHT_PROMPT_NAME)
+        intent_prompt = prompt_store.get(settings.LANGCHAIN_INTENT_PROMPT_NAME)
+        flight_prompt = prompt_store.get(settings.LANGCHAIN_FLIGHT_PROMPT_NAME)
         flight_prompt.append(MessagesPlaceholder(variable_name="history"))
         return (intent_prompt, flight_prompt)
 
-    # 체인 생성 함수
-    def create_chain(self, session_id: str):
+    # 체인 생성 함수 - 세션과 무관한 체인을 한 번만 만들어 모든 세션이 공유
+    def create_chain(self):
+        self.prompt_revision = prompt_store.revision
         intent_prompt, flight_prompt = self.load_prompt()
-        self.chains[session_id] = {
+        # 대화 기록은 토큰 예산 안의 최근 턴만 프롬프트에 넣는다 (잘린 턴의 입력사항은 client_info로)
+        flight_chain = RunnableLambda(flight_history_window.apply) | flight_prompt | self.llm | self.output_parser
+        self.chains = {
             LLMConfig.CHAIN_TYPE_INTENT: (intent_prompt | self.llm | self.output_parser),
+            LLMConfig.CHAIN_TYPE_FLIGHT_CORE: flight_chain,
+            # 기록에는 응답 Message를 JSON으로 담은 AIMessage를 저장하고, 호출 측에는 Message를 그대로 반환
             LLMConfig.CHAIN_TYPE_FLIGHT: RunnableWithMessageHistory(
-                (flight_prompt | self.llm | self.output_parser),
-                get_session_history=lambda session_id: self.get_flight_history(session_id),
+                flight_chain | RunnableLambda(lambda response: {
+                    "response": response, "history_message": self.to_history_message(response)
+                }),
+                get_session_history=self.get_flight_history,
                 input_messages_key="question",
-                history_messages_key="history"
-            )
+                history_messages_key="history",
+                output_messages_key="history_message"
+            ) | RunnableLambda(itemgetter("response"))
         }
+
+    # 항공 대화 기록에 저장할 응답 메시지 (다음 턴 프롬프트와 기록 창의 client_info 접기에 사용)
+    @staticmethod
+    def to_history_message(response: Message) -> AIMessage:
+        return AIMessage(content=json.dumps(response.dict(), ensure_ascii=False))
+
+    # 체인 조회 함수 - 프롬프트가 갱신되었으면 공유 체인을 다시 생성
+    def get_chain(self, chain_type: str):
+        prompt_store.refresh_expired()
+        if not self.chains or self.prompt_revision != prompt_store.revision:
+            self.create_chain()
+        return self.chains[chain_type]
     # 대화 기록을 가져오는 함수
-    def get_chat_history(self, session_id: str) -> SQLChatMessageHistory:
+    def get_chat_history(self, session_id: str) -> BufferedChatMessageHistory:
         if session_id not in self.chat_histories:
             self.chat_histories[session_id] = {}
         if LLMConfig.CHAIN_TYPE_INTENT not in self.chat_histories[session_id]:
-            self.chat_histories[session_id][LLMConfig.CHAIN_TYPE_INTENT] = SQLChatMessageHistory(session_id=session_id, connection=self.engine)
+            self.chat_histories[session_id][LLMConfig.CHAIN_TYPE_INTENT] = BufferedChatMessageHistory(history_writer, session_id)
         return self.chat_histories[session_id][LLMConfig.CHAIN_TYPE_INTENT]
 
     # 항공 기록을 가져오는 함수
-    def get_flight_history(self, session_id: str) -> ChatMessageHistory:
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = {}
-        if LLMConfig.CHAIN_TYPE_FLIGHT not in self.chat_histories[session_id]:
-            self.chat_histories[session_id][LLMConfig.CHAIN_TYPE_FLIGHT] = ChatMessageHistory()
-        return self.chat_histories[session_id][LLMConfig.CHAIN_TYPE_FLIGHT]
+    def get_flight_history(self, session_id: str) -> BackendChatMessageHistory:
+        return BackendChatMessageHistory(self.session_backend, LLMConfig.CHAIN_TYPE_FLIGHT, session_id)
+
+    # 세션 저장소 호출 - SQLite/Redis 저장소는 디스크/네트워크 I/O이므로 스레드풀에서, 메모리 저장소는 바로 실행
+    async def run_backend(self, func: Callable, *args):
+        if not self.session_backend.shared:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    # 항공권 예약 입력사항을 가져오는 함수 - 없으면 기본값으로 생성
+    def get_client_info(self, session_id: str) -> Dict:
+        client_info = self.session_backend.get(CLIENT_INFO_NAMESPACE, session_id)
+        if client_info is None:
+            client_info = {
+                "adults": 1,
+                "origin": "",
+                "destination": "",
+                "origin_location_code": "",
+                "destination_location_code": "",
+                "departure_date": ""
+            }
+            self.session_backend.set(CLIENT_INFO_NAMESPACE, session_id, client_info)
+        return client_info
 
     # 프롬프트 생성 함수
     def prompt_func(self, message: Message) -> BaseMessage:
         user_message = HumanMessage(content=message.message)
         return user_message
 
+    # 체인 입력 생성 함수
+    def build_chain_input(self, input_prompt: BaseMessage, session_id: str,
+                          client_info: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+        if client_info is None:
+            client_info = self.get_client_info(session_id)
+        return {
+            "session_id": session_id,
+            "question": input_prompt,
+            "client_info": json.dumps(client_info, ensure_ascii=False, indent=4),
+        }, {
+            "configurable": {"session_id": session_id}
+        }
+
     # 응답 생성 함수
     def generate_response(self, input_prompt: BaseMessage, session_id: str,
                           chain_type: str = LLMConfig.CHAIN_TYPE_INTENT) -> Message:
-        chain = self.chains[session_id][chain_type]
-        client_info = self.client_info_store[session_id]
+        chain = self.get_chain(chain_type)
         try:
-            print(f"Sending to LLM: {input_prompt.content}")  # 요청 로깅
-            response_message = chain.invoke({
-                "session_id": session_id,
-                "question": input_prompt,
-                "client_info": json.dumps(client_info, ensure_ascii=False, indent=4),
-            }, {
-                "configurable": {"session_id": session_id}
-            })
-            print(f"response: {response_message}, type: {type(response_message)}")
-
-            # print(f"LLM Response: Type: {response_message.type}, Message: {response_message.message}")  # 응답 로깅
+            logger.debug("Sending to LLM (%s): %s", chain_type, input_prompt.content)  # 요청 로깅
+            with span(f"llm_{chain_type}"):
+                response_message = chain.invoke(*self.build_chain_input(input_prompt, session_id))
+            logger.debug("LLM response (%s): %s", chain_type, response_message)  # 응답 로깅
         except Exception as e:
-            print(f"Error during LLM invocation: {e}")
+            logger.error("Error during LLM invocation (%s): %s", chain_type, e)
             raise
         return response_message
 
+    # 비동기 응답 생성 함수 - on_delta가 주어지면 message 필드를 생성되는 대로 전달
+    async def agenerate_response(self, input_prompt: BaseMessage, session_id: str,
+                                 chain_type: str = LLMConfig.CHAIN_TYPE_INTENT,
+                                 on_delta: Optional[DeltaCallback] = None,
+                                 client_info: Optional[Dict] = None) -> Message:
+        chain = self.get_chain(chain_type)
+        chain_input, config = self.build_chain_input(input_prompt, session_id, client_info)
+        try:
+            logger.debug("Sending to LLM (%s): %s", chain_type, input_prompt.content)  # 요청 로깅
+            with span(f"llm_{chain_type}", streaming=on_delta is not None):
+                if on_delta is None:
+                    response_message = await chain.ainvoke(chain_input, config)
+                else:
+                    response_message = await self.astream_chain(chain, chain_input, config, chain_type, on_delta)
+            logger.debug("LLM response (%s): %s", chain_type, response_message)  # 응답 로깅
+        except Exception as e:
+            logger.error("Error during LLM invocation (%s): %s", chain_type, e)
+            raise
+        return response_message
+
+    # 체인 스트리밍 함수 - 토큰을 message 필드 단위로 전달하고 파싱된 최종 Message를 반환
+    async def astream_chain(self, chain, chain_input: Dict, config: Dict, chain_type: str,
+                            on_delta: DeltaCallback) -> Message:
+        # 의도 체인은 일반 답변(message)일 때만 사용자에게 바로 보여준다
+        accept_types = [LLMConfig.CHAIN_TYPE_MESSAGE] if chain_type == LLMConfig.CHAIN_TYPE_INTENT else None
+        streamer = MessageFieldStreamer(accept_types)
+        response_message = None
+        async for event in chain.astream_events(chain_input, config, version="v2"):
+            if event["event"] == "on_chat_model_stream":
+                if streamer is None:
+                    continue
+                try:
+                    delta = streamer.feed(event["data"]["chunk"].content)
+                except Exception as e:
+                    # 스트리밍 디코딩 실패로 턴이 끊기지 않도록 이번 턴의 스트리밍만 중단 (답변은 최종 Message로 전달)
+                    logger.warning("Stopped streaming %s response: %s", chain_type, e)
+                    streamer = None
+                    continue
+                if delta:
+                    await on_delta(delta)
+            elif event["event"] == "on_chain_end" and not event.get("parent_ids"):
+                response_message = event["data"]["output"]
+        return response_message
+
+    # 기록용 이미지 값 - 짧은 URL/경로는 그대로, 업로드된 이미지는 내용 해시 표식으로 대체
+    @staticmethod
+    def history_image(image: str) -> str:
+        if not image or (len(image) <= HISTORY_IMAGE_MAX_LENGTH and not image.startswith("data")):
+            return image
+        return HISTORY_IMAGE_PREFIX + hashlib.sha1(image.encode('utf-8')).hexdigest()[:16]
+
     # 메시지 저장 함수
     def save_messages(self, message: Message, response_message: Message):
         if response_message.sender == 'assist':
             return
+        # 대기열에 넣기만 하고 저장은 write-behind 저장기가 배치로 처리
         chat_history = self.get_chat_history(message.session_id)
-        chat_history.add_message(CustomHumanMessage(**message.dict()))
-        chat_history.add_message(CustomAIMessage(**response_message.dict()))
+        chat_history.add_messages([
+            CustomHumanMessage(**{**message.dict(), "image": self.history_image(message.image)}),
+            CustomAIMessage(**{**response_message.dict(), "image": self.history_image(response_message.image)})
+        ])
+
+    # 비동기 경로용 저장 함수 - write-behind가 꺼져 있거나 종료 중이면 DB에 바로 쓰므로 스레드풀에서 실행
+    async def asave_messages(self, message: Message, response_message: Message):
+        if history_writer.buffered:
+            self.save_messages(message, response_message)
+        else:
+            await asyncio.to_thread(self.save_messages, message, response_message)
 
     # 응답 처리 함수
     def response(self, message: Message) -> Message:
         session_id = message.session_id
-        if session_id not in self.chains:
-            self.create_chain(session_id)
-        if session_id not in self.client_info_store:
-            self.client_info_store[session_id] = {
-                "adults": 1,
-                "origin": "",
-                "destination": "",
-                "origin_location_code": "",
-                "destination_location_code": "",
-                "departure_date": ""
-            }
+        bind_session(session_id)
+        client_info = self.get_client_info(session_id)
         user_input = self.prompt_func(message)
-        intent_message = self.generate_response(user_input, session_id, LLMConfig.CHAIN_TYPE_INTENT)
+        intent_message = self.classify_intent(message, client_info)
+        cacheable = intent_message is None and self.is_response_cacheable(message, client_info)
+        if cacheable:
+            cached = self.lookup_cached_response(message)
+            if cached is not None:
+                self.save_messages(message, cached)
+                return cached
+        intent_message = intent_message or self.generate_response(user_input, session_id, LLMConfig.CHAIN_TYPE_INTENT)
         final_message = self.branch_type(intent_message, message)
 
+        if cacheable:
+            self.cache_response(message, intent_message, final_message)
         self.save_messages(message, final_message)
         return final_message
 
+    # 비동기 응답 처리 함수 - 이벤트 루프를 막는 작업은 모두 await 또는 스레드풀에서 실행
+    async def aresponse(self, message: Message, on_delta: Optional[DeltaCallback] = None) -> Message:
+        session_id = message.session_id
+        bind_session(session_id)
+        # 입력사항은 턴마다 한 번만 읽고 이후 단계에 그대로 넘긴다
+        client_info = await self.run_backend(self.get_client_info, session_id)
+        user_input = self.prompt_func(message)
+        intent_message = self.classify_intent(message, client_info)
+        cacheable = intent_message is None and self.is_response_cacheable(message, client_info)
+        if cacheable:
+            cached = await asyncio.to_thread(self.lookup_cached_response, message)
+            if cached is not None:
+                if on_delta is not None and cached.message:
+                    await on_delta(cached.message)
+                await self.asave_messages(message, cached)
+                return cached
+        speculative = None
+        if intent_message is None:
+            # 예약 대화 중이면 의도 분류를 기다리지 않고 항공 체인을 먼저 시작
+            speculative = self.start_speculative_flight(message, client_info)
+            try:
+                intent_message = await self.agenerate_response(user_input, session_id, LLMConfig.CHAIN_TYPE_INTENT,
+                                                               on_delta, client_info)
+            except BaseException:
+                self.discard_speculative_flight(speculative)
+                raise
+            if intent_message.type != LLMConfig.CHAIN_TYPE_FLIGHT:
+                self.discard_speculative_flight(speculative)
+                speculative = None
+        final_message = await self.abranch_type(intent_message, message, on_delta, speculative, client_info)
+
+        if cacheable:
+            await asyncio.to_thread(self.cache_response, message, intent_message, final_message)
+        await self.asave_messages(message, final_message)
+        return final_message
+
+    # 시맨틱 캐시 대상 확인 - 예약 대화와 무관한 사용자의 텍스트 질문만 (의도 체인 입력이 질문뿐인 경우)
+    def is_response_cacheable(self, message: Message, client_info: Optional[Dict] = None) -> bool:
+        if not settings.RESPONSE_CACHE_ENABLED or message.sender == 'assist' or message.image:
+            return False
+        if client_info is None:
+            client_info = self.get_client_info(message.session_id)
+        return not any(client_info.get(field) for field in REQUIRED_CLIENT_INFO if field != "adults")
+
+    # 시맨틱 캐시 조회 함수 - 실패하면 캐시 없이 진행
+    def lookup_cached_response(self, message: Message) -> Optional[Message]:
+        try:
+            cached = response_cache.lookup(message.message)
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", e)
+            return None
+        if cached is None:
+            return None
+        cached["session_id"] = message.session_id
+        return Message(**cached)
+
+    # 의도 체인이 바로 답한 일반 답변(message)만 캐시에 저장
+    def cache_response(self, message: Message, intent_message: Message, final_message: Message):
+        if final_message is not intent_message or final_message.type != LLMConfig.CHAIN_TYPE_MESSAGE:
+            return
+        try:
+            response_cache.store_response(message.message, final_message.dict())
+        except Exception as e:
+            logger.warning("Response cache store failed: %s", e)
+
+    # 로컬 의도 분류 함수 - 확신할 수 있는 항공/이미지 검색 요청은 의도 LLM 호출 없이 바로 분기
+    def classify_intent(self, message: Message, client_info: Optional[Dict] = None) -> Optional[Message]:
+        # 이미지 검색 후속 메시지(assist)는 LLM이 답변해야 한다
+        if not settings.INTENT_CLASSIFIER_ENABLED or message.sender == 'assist':
+            return None
+        if client_info is None:
+            client_info = self.get_client_info(message.session_id)
+        intent = intent_classifier.fast_path(message, client_info)
+        if intent is None:
+            return None
+        return Message(session_id=message.session_id, type=intent, image=message.image, sender="hero")
+
+    # 예약 입력사항이 일부만 채워진 상태(예약 대화 진행 중)인지 확인
+    @staticmethod
+    def is_booking_active(client_info: Dict) -> bool:
+        filled = [bool(client_info.get(field)) for field in REQUIRED_CLIENT_INFO if field != "adults"]
+        return any(filled) and not all(filled)
+
+    # 항공 체인 추측 실행 시작 함수 - 대화 기록 스냅샷으로 실행하고 기록은 저장하지 않는다
+    def start_speculative_flight(self, message: Message, client_info: Dict) -> Optional[asyncio.Task]:
+        if (not settings.SPECULATIVE_FLIGHT_ENABLED or message.sender == 'assist' or message.image
+                or not self.is_booking_active(client_info)):
+            return None
+        self.speculation_stats["started"] += 1
+        return asyncio.create_task(self.aspeculate_flight(self.prompt_func(message), message.session_id, client_info))
+
+    async def aspeculate_flight(self, input_prompt: BaseMessage, session_id: str, client_info: Dict) -> Message:
+        chain = self.get_chain(LLMConfig.CHAIN_TYPE_FLIGHT_CORE)
+        chain_input, config = self.build_chain_input(input_prompt, session_id, client_info)
+        history = self.get_flight_history(session_id)
+        chain_input["history"] = await asyncio.to_thread(lambda: history.messages)
+        with span("llm_flight_speculative"):
+            return await chain.ainvoke(chain_input, config)
+
+    # 추측 실행 결과 폐기 함수 - 의도가 flight가 아니면 취소
+    def discard_speculative_flight(self, speculative: Optional[asyncio.Task]):
+        if speculative is None:
+            return
+        self.speculation_stats["discarded"] += 1
+        if speculative.done():
+            if not speculative.cancelled():
+                speculative.exception()  # 실패한 결과도 소비해서 경고를 남기지 않음
+        else:
+            speculative.cancel()
+
+    # 추측 실행 결과 사용 함수 - 선택된 경우에만 항공 대화 기록에 저장, 실패하면 None
+    async def use_speculative_flight(self, speculative: asyncio.Task, input_prompt: BaseMessage,
+                                     session_id: str) -> Optional[Message]:
+        try:
+            response = await speculative
+        except Exception as e:
+            self.speculation_stats["failed"] += 1
+            logger.warning("Speculative flight chain failed, running it again: %s", e)
+            return None
+        self.speculation_stats["used"] += 1
+        history = self.get_flight_history(session_id)
+        await asyncio.to_thread(history.add_messages, [input_prompt, self.to_history_message(response)])
+        return response
+
     # 응답 유형에 따른 분기 처리 함수
     def branch_type(self, intent_message: Message, original_message: Message) -> Message:
         if intent_message.type == "message":
@@ -133,33 +390,97 @@ class Herobot:
                 chain_type=LLMConfig.CHAIN_TYPE_FLIGHT
             )
 
-            client_info = self.client_info_store[original_message.session_id]
-
-            if response.client_info:
-                client_info.update(response.client_info)
-
-            if not all(client_info.values()):
-                self.client_info_store[original_message.session_id] = client_info
+            client_info = self.update_client_info(original_message.session_id, response,
+                                                  message=original_message.message)
+            if not self.is_client_info_complete(client_info):
                 return response
 
-            flight_info = self.skyscanner_api.get_cheapest_flight_info(self.db, client_info)
-            intent_message.message = flight_info
+            # 동기 경로(CLI)는 실행 중인 이벤트 루프가 없으므로 비동기 검색을 그대로 실행
+            intent_message.message = asyncio.run(self.search_flights(client_info))
 
             self.clear_flight_messages(intent_message.session_id)
 
         elif intent_message.type == 'search':
             if intent_message.image:
                 description = self.vision_api.report(intent_message.image)
-                intent_message.message = f"\n{description}: user의 이전 질문에 description을 참고해서 한국어로 답변하고 url, image_url을 같이 제공해줘\n답변 예시:\nmessage: 이미지에 나온 위치는 '뉘하운'입니다.\n가장 유사한 이미지가 있는 홈페이지: #url\n가장 유사한 이미지: #image_url"
-                intent_message.sender = "assist"
-                intent_message.image = ""
-                return self.response(intent_message)
+                return self.response(self.search_followup_message(intent_message, description))
+        return intent_message
+
+    # 비동기 응답 유형 분기 처리 함수
+    async def abranch_type(self, intent_message: Message, original_message: Message,
+                           on_delta: Optional[DeltaCallback] = None,
+                           speculative: Optional[asyncio.Task] = None,
+                           client_info: Optional[Dict] = None) -> Message:
+        if client_info is None:
+            client_info = await self.run_backend(self.get_client_info, original_message.session_id)
+        if intent_message.type == 'flight':
+            response = None
+            if speculative is not None:
+                response = await self.use_speculative_flight(
+                    speculative, self.prompt_func(original_message), original_message.session_id
+                )
+                # 추측 실행 결과는 스트리밍되지 않았으므로 한 번에 전달
+                if response is not None and on_delta is not None and response.message:
+                    await on_delta(response.message)
+            if response is None:
+                response = await self.agenerate_response(
+                    input_prompt=self.prompt_func(original_message),
+                    session_id=intent_message.session_id,
+                    chain_type=LLMConfig.CHAIN_TYPE_FLIGHT,
+                    on_delta=on_delta,
+                    client_info=client_info
+                )
+
+            await self.run_backend(self.update_client_info, original_message.session_id, response, client_info,
+                                   original_message.message)
+            if not self.is_client_info_complete(client_info):
+                return response
+
+            intent_message.message = await self.search_flights(client_info)
+
+            await self.run_backend(self.clear_flight_messages, intent_message.session_id)
+
+        elif intent_message.type == 'search':
+            if intent_message.image:
+                description = await self.vision_api.areport(intent_message.image)
+                return await self.aresponse(self.search_followup_message(intent_message, description), on_delta)
+        return intent_message
+
+    # 항공편 검색 함수 - 한 달 전체나 앞뒤 일 수 조건이 있으면 날짜별 최저가 달력으로 응답
+    async def search_flights(self, client_info: Dict) -> str:
+        if is_flexible_request(client_info):
+            return await self.flexible_search.search_summary(self.db, client_info)
+        return await self.flight_search.search_summary(self.db, client_info)
+
+    # 검색에 필요한 입력사항이 모두 채워졌는지 확인 (flexible_days 등 선택 항목 제외)
+    @staticmethod
+    def is_client_info_complete(client_info: Dict) -> bool:
+        return all(client_info.get(field) for field in REQUIRED_CLIENT_INFO)
+
+    # 항공 체인 응답으로 사용자 입력사항 갱신 함수
+    # 날짜 유연 검색 조건("3월 중 아무 때나", "앞뒤로 3일")은 체인 출력이 아니라 사용자 메시지에서 직접 추출
+    def update_client_info(self, session_id: str, response: Message, client_info: Optional[Dict] = None,
+                           message: Optional[str] = None) -> Dict:
+        if client_info is None:
+            client_info = self.get_client_info(session_id)
+        updates = dict(response.client_info or {})
+        updates.update(parse_flexible_dates(message or ""))
+        if updates:
+            client_info.update(updates)
+            self.session_backend.set(CLIENT_INFO_NAMESPACE, session_id, client_info)
+        return client_info
+
+    # 이미지 검색 결과를 LLM에 다시 전달할 메시지 생성 함수
+    def search_followup_message(self, intent_message: Message, description: str) -> Message:
+        intent_message.message = f"\n{description}: user의 이전 질문에 description을 참고해서 한국어로 답변하고 url, image_url을 같이 제공해줘\n답변 예시:\nmessage: 이미지에 나온 위치는 '뉘하운'입니다.\n가장 유사한 이미지가 있는 홈페이지: #url\n가장 유사한 이미지: #image_url"
+        intent_message.sender = "assist"
+        intent_message.image = ""
         return intent_message
 
     # 항공 메시지 삭제 함수
     def clear_flight_messages(self, session_id: str):
-        self.client_info_store.pop(session_id, None)
-        self.chat_histories[session_id][LLMConfig.CHAIN_TYPE_FLIGHT].clear()
+        self.session_backend.delete(CLIENT_INFO_NAMESPACE, session_id)
+        self.get_flight_history(session_id).clear()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,21 @@
-from typing import Dict
+import asyncio
+from typing import Dict, Any
 from fastapi import WebSocket
 from backend.model.messages import Message
+from backend.services.session_state import SessionStateStore
+from backend.core.telemetry import span
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        # 연결은 disconnect로 제거되므로 TTL 없이 개수 제한만 적용
+        self.active_connections = SessionStateStore("connections", idle_ttl=0, max_bytes=0, sizeof=lambda websocket: 0)
+        self.active_connections.add_evict_hook(self.close_evicted)
+
+    # 개수 제한으로 밀려난 연결은 닫아서 클라이언트가 재연결하도록 함
+    def close_evicted(self, session_id: str, websocket: WebSocket, reason: str):
+        try:
+            asyncio.get_running_loop().create_task(websocket.close(code=1013))
+        except RuntimeError:
+            pass
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
@@ -16,4 +28,11 @@ class ConnectionManager:
     async def send_json(self, message: Message, session_id: str):
         websocket = self.active_connections.get(session_id)
         if websocket:
-            await websocket.send_json(message)
+            with span("websocket_send"):
+                await websocket.send_json(message)
+
+    async def send_frame(self, frame: Dict[str, Any], session_id: str):
+        websocket = self.active_connections.get(session_id)
+        if websocket:
+            with span("websocket_send", event=frame.get("event")):
+                await websocket.send_json(frame)
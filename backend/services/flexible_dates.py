@@ -0,0 +1,151 @@
+import asyncio
+import calendar
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from backend.core.config import settings
+from backend.databases.database import Database
+from backend.services.flight_cache import flight_search_cache
+from backend.services.flight_search import FlightSearchAggregator
+from backend.utils import rank_flights, summarize_price_calendar, validate_date
+
+logger = logging.getLogger(__name__)
+
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+# 사용자 메시지의 날짜 유연 검색 표현 - "±3일", "앞뒤로 3일", "전후 3일", "plus or minus 3 days"
+# ("5일 전후"는 5일 무렵이라는 뜻일 수 있으므로 제외)
+FLEXIBLE_DAYS_PATTERNS = (
+    re.compile(r'(?:±|\+-|\+/-)\s*(\d{1,2})\s*(?:일|days?)', re.IGNORECASE),
+    re.compile(r'(?:앞뒤|전후)\s*(?:로)?\s*(\d{1,2})\s*일'),
+    re.compile(r'plus\s+or\s+minus\s+(\d{1,2})\s+days?', re.IGNORECASE),
+)
+# 한 달 전체 - "3월 중 아무 때나", "3월 전체", "한 달 내내", "any time in March" 등
+WHOLE_MONTH_NUMBER_PATTERN = re.compile(r'(\d{1,2})\s*월\s*(?:중|전체|내내|아무|한\s*달|에서\s*가장\s*싼)')
+WHOLE_MONTH_PATTERN = re.compile(r'한\s*달\s*(?:전체|내내|중)|(?:whole|entire)\s+month|any\s*time\s+(?:in|that)\s+month',
+                                 re.IGNORECASE)
+
+
+# 사용자 메시지에서 날짜 유연 검색 조건 추출 - 항공 체인 출력과 별개로 client_info에 합칠 값을 반환
+def parse_flexible_dates(text: str) -> Dict:
+    if not text:
+        return {}
+    for pattern in FLEXIBLE_DAYS_PATTERNS:
+        match = pattern.search(text)
+        if match and int(match.group(1)) > 0:
+            return {'flexible_days': int(match.group(1))}
+    match = WHOLE_MONTH_NUMBER_PATTERN.search(text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        today = date.today()
+        month = int(match.group(1))
+        return {'flexible_month': True,
+                'departure_date': f"{today.year + (1 if month < today.month else 0)}-{month:02d}"}
+    if WHOLE_MONTH_PATTERN.search(text):
+        return {'flexible_month': True}
+    return {}
+
+
+# 출발일이 YYYY-MM(한 달 전체)이거나 한 달 전체/flexible_days 조건이 있으면 날짜 유연 검색
+def is_flexible_request(client_info: Dict) -> bool:
+    return bool(MONTH_PATTERN.match(str(client_info.get('departure_date', '')).strip())
+                or client_info.get('flexible_month') or client_info.get('flexible_days'))
+
+
+class FlexibleDateSearch:
+    """날짜 범위(±N일 또는 한 달)의 날짜별 최저가 달력 - Amadeus 최저가 날짜 API를 우선 사용하고, 없으면 날짜별 검색을 제한된 동시성으로 실행"""
+
+    def __init__(self, flight_search: FlightSearchAggregator, max_concurrency: Optional[int] = None):
+        self.flight_search = flight_search
+        self.amadeus_api = getattr(flight_search, 'amadeus_api', None)
+        self.max_concurrency = settings.FLEXIBLE_SEARCH_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.cache = flight_search_cache
+
+    # 검색할 날짜 목록 - 오늘 이전 날짜는 제외
+    def target_dates(self, client_info: Dict) -> List[date]:
+        today = date.today()
+        departure_date = str(client_info['departure_date']).strip()
+        if MONTH_PATTERN.match(departure_date) or client_info.get('flexible_month'):
+            year, month = map(int, departure_date[:7].split('-'))
+            first = date(year, month, 1)
+            if first < today.replace(day=1):
+                first = first.replace(year=today.year + (1 if month < today.month else 0))
+            days = calendar.monthrange(first.year, first.month)[1]
+            dates = [first + timedelta(days=offset) for offset in range(days)]
+        else:
+            center = datetime.fromisoformat(validate_date(departure_date)).date()
+            flexible_days = int(client_info.get('flexible_days') or 0)
+            dates = [center + timedelta(days=offset) for offset in range(-flexible_days, flexible_days + 1)]
+        return [day for day in dates if day >= today][:settings.FLEXIBLE_SEARCH_MAX_DAYS]
+
+    # 노선/월 단위 캐시 키
+    def month_key(self, client_info: Dict, month: str) -> str:
+        return "|".join([
+            "calendar",
+            str(client_info['origin_location_code']).strip().upper(),
+            str(client_info['destination_location_code']).strip().upper(),
+            month,
+            str(int(client_info.get('adults') or 1)),
+            "KRW"
+        ])
+
+    # Amadeus 최저가 날짜 API로 날짜 범위를 한 번에 조회 (금액은 성인 1인 기준 - 날짜별 검색 결과와 같은 기준)
+    async def search_with_dates_api(self, client_info: Dict, dates: List[date]) -> Dict[str, Dict]:
+        if self.amadeus_api is None:
+            return {}
+        results = await asyncio.to_thread(
+            self.amadeus_api.search_cheapest_date,
+            client_info['origin_location_code'], client_info['destination_location_code'],
+            dates[0].isoformat(), dates[-1].isoformat()
+        )
+        return {
+            result['departureDate']: {'date': result['departureDate'], 'price': float(result['price']['total'])}
+            for result in results or []
+        }
+
+    # 날짜별 검색 (동시 실행 수 제한)
+    async def search_each_day(self, client_info: Dict, dates: List[date]) -> Dict[str, Dict]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def search_day(day: date) -> Optional[Dict]:
+            async with semaphore:
+                flight_data = await self.flight_search.search({**client_info, 'departure_date': day.isoformat()})
+            cheapest = rank_flights(flight_data, ("cheapest",))
+            if not cheapest:
+                return None
+            return {
+                'date': day.isoformat(),
+                'price': float(cheapest[0]['price']),
+                'direct': cheapest[0].get('direct'),
+                'marketing_carriers': cheapest[0].get('marketing_carriers', [])
+            }
+
+        fares = await asyncio.gather(*[search_day(day) for day in dates], return_exceptions=True)
+        return {fare['date']: fare for fare in fares if isinstance(fare, dict)}
+
+    # 날짜별 최저가 달력 조회 - 월 단위 캐시에 없는 날짜만 새로 조회
+    async def search(self, client_info: Dict) -> Dict[str, Dict]:
+        dates = self.target_dates(client_info)
+        fares: Dict[str, Dict] = {}
+        for month in sorted({day.strftime('%Y-%m') for day in dates}):
+            month_dates = [day for day in dates if day.strftime('%Y-%m') == month]
+            key = self.month_key(client_info, month)
+            cached = await self.cache.alookup(key)
+            month_fares = dict(cached[0]) if cached and cached[1] < self.cache.fresh_ttl else {}
+            missing = [day for day in month_dates if day.isoformat() not in month_fares]
+            if missing:
+                found = {}
+                try:
+                    found = await self.search_with_dates_api(client_info, missing)
+                except Exception as e:
+                    logger.warning("Cheapest date search failed, falling back to daily searches: %s", e)
+                still_missing = [day for day in missing if day.isoformat() not in found]
+                if still_missing:
+                    found.update(await self.search_each_day(client_info, still_missing))
+                month_fares.update(found)
+                await self.cache.astore(key, month_fares)
+            fares.update({day.isoformat(): month_fares[day.isoformat()]
+                          for day in month_dates if day.isoformat() in month_fares})
+        return fares
+
+    async def search_summary(self, db: Database, client_info: Dict) -> str:
+        return summarize_price_calendar(db, client_info, await self.search(client_info))
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from backend.core.config import settings
+from backend.utils import validate_date
+
+logger = logging.getLogger(__name__)
+
+
+class FlightSearchCache:
+    """항공권 검색 결과 2단계 캐시 - 메모리 LRU + SQLite, 만료 후 일정 시간은 이전 결과를 주고 백그라운드 갱신"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 fresh_ttl: Optional[int] = None, stale_ttl: Optional[int] = None):
+        self.max_entries = settings.FLIGHT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.fresh_ttl = settings.FLIGHT_CACHE_FRESH_TTL if fresh_ttl is None else fresh_ttl
+        self.stale_ttl = settings.FLIGHT_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+        self.memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # 메모리 계층과 디스크 계층 잠금을 분리 - 디스크 쓰기 중에도 이벤트 루프의 메모리 조회가 기다리지 않는다
+        self.lock = threading.Lock()
+        self.disk_lock = threading.Lock()
+        self.connection = sqlite3.connect(path or settings.FLIGHT_CACHE_PATH, check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS flight_search_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        # 같은 검색이 동시에 들어오면 하나의 업스트림 호출을 함께 기다린다
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.background_tasks = set()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stale_served": 0, "coalesced": 0, "refreshes": 0}
+
+    # 정규화된 캐시 키 (공급자, 출발지, 도착지, 날짜, 인원, 통화)
+    @staticmethod
+    def make_key(provider: str, client_info: Dict, currency: str = "KRW") -> str:
+        return "|".join([
+            provider,
+            str(client_info['origin_location_code']).strip().upper(),
+            str(client_info['destination_location_code']).strip().upper(),
+            validate_date(str(client_info['departure_date']).strip()),
+            str(int(client_info.get('adults') or 1)),
+            currency.upper()
+        ])
+
+    def lookup_memory(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return entry[0], time.time() - entry[1]
+
+    # 디스크에서 찾으면 메모리로 올린다
+    def lookup_disk(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self.disk_lock:
+            row = self.connection.execute(
+                "SELECT value, stored_at FROM flight_search_cache WHERE key = ? AND stored_at >= ?",
+                (key, time.time() - self.stale_ttl)
+            ).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["disk_hits"] += 1
+        value, stored_at = json.loads(row[0]), row[1]
+        with self.lock:
+            self._remember(key, value, stored_at)
+        return value, time.time() - stored_at
+
+    # 메모리 -> 디스크 순으로 조회
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self.lookup_memory(key)
+        return entry if entry is not None else self.lookup_disk(key)
+
+    # 비동기 조회 - 메모리 계층은 바로, 디스크 계층은 스레드풀에서
+    async def alookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self.lookup_memory(key)
+        return entry if entry is not None else await asyncio.to_thread(self.lookup_disk, key)
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        self.memory[key] = (value, stored_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def store_disk(self, key: str, value: Any, stored_at: float):
+        with self.disk_lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO flight_search_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), stored_at)
+            )
+
+    def store(self, key: str, value: Any):
+        # 빈 결과(업스트림 오류 포함)는 캐시하지 않는다
+        if not value:
+            return
+        now = time.time()
+        with self.lock:
+            self._remember(key, value, now)
+        self.store_disk(key, value, now)
+
+    # 비동기 저장 - 메모리 계층은 바로, 디스크 쓰기는 스레드풀에서
+    async def astore(self, key: str, value: Any):
+        if not value:
+            return
+        now = time.time()
+        with self.lock:
+            self._remember(key, value, now)
+        await asyncio.to_thread(self.store_disk, key, value, now)
+
+    # 업스트림 호출은 어느 한 호출자에 묶이지 않은 별도 태스크로 실행 - 기다리던 검색이 마감 시간으로 취소되어도
+    # 호출은 끝까지 진행되어 캐시를 채우고, 함께 기다리는 다른 세션의 검색에는 취소가 전파되지 않는다
+    async def _fetch_coalesced(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.get_running_loop().create_task(self._fetch_and_store(key, fetch))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        await self.astore(key, value)
+        return value
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        # 기다리는 호출이 모두 취소되어도 경고가 남지 않도록 예외를 소비
+        if not task.cancelled():
+            task.exception()
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        if key in self.inflight:
+            return
+        self.stats["refreshes"] += 1
+
+        async def refresh():
+            try:
+                await self._fetch_coalesced(key, fetch)
+            except Exception as e:
+                logger.warning("Flight cache refresh failed for %s: %s", key, e)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        entry = await self.alookup(key)
+        if entry is not None:
+            value, age = entry
+            if age < self.fresh_ttl:
+                return value
+            if age < self.stale_ttl:
+                self.stats["stale_served"] += 1
+                self._refresh_in_background(key, fetch)
+                return value
+        return await self._fetch_coalesced(key, fetch)
+
+    # 동기 경로용 조회 함수 (요청 병합 없음)
+    def get_or_fetch_sync(self, key: str, fetch: Callable[[], Any]) -> Any:
+        entry = self.lookup(key)
+        if entry is not None and entry[1] < self.fresh_ttl:
+            return entry[0]
+        value = fetch()
+        self.store(key, value)
+        return value
+
+    def purge_expired(self) -> int:
+        with self.disk_lock:
+            return self.connection.execute("DELETE FROM flight_search_cache WHERE stored_at < ?",
+                                           (time.time() - self.stale_ttl,)).rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "memory_entries": len(self.memory), "inflight": len(self.inflight)}
+
+
+flight_search_cache = FlightSearchCache()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+from backend.core.config import settings
+from backend.core.telemetry import span
+from backend.databases.database import Database
+from backend.model.flight import SkyscannerAPI
+from backend.model.flight_amadeus import AmadeusAPI
+from backend.model.itinerary import Itinerary
+from backend.services.flight_cache import flight_search_cache
+from backend.utils import rank_flights, summarize_flight_information, validate_date
+
+# 공급자 검색 함수 타입 - client_info를 받아 parse_flight_info 형식의 항공편 목록을 반환
+ProviderSearch = Callable[[Dict], Awaitable[List[Dict]]]
+
+logger = logging.getLogger(__name__)
+
+
+class FlightSearchAggregator:
+    """여러 항공권 공급자를 하나의 마감 시간 안에 동시에 조회하고 결과를 병합/중복 제거"""
+
+    def __init__(self, skyscanner_api: SkyscannerAPI, amadeus_api: Optional[AmadeusAPI] = None,
+                 deadline: Optional[float] = None, grace: Optional[float] = None):
+        self.deadline = settings.FLIGHT_SEARCH_DEADLINE if deadline is None else deadline
+        # 첫 결과가 도착한 뒤 다른 공급자를 더 기다리는 시간 (0이면 가장 빠른 결과로 바로 응답)
+        self.grace = settings.FLIGHT_SEARCH_GRACE if grace is None else grace
+        self.providers: Dict[str, ProviderSearch] = {"skyscanner": skyscanner_api.aget_flight_info}
+        if amadeus_api is not None:
+            self.amadeus_api = amadeus_api
+            self.providers["amadeus"] = self.search_amadeus
+        self.stats = {name: {"ok": 0, "empty": 0, "error": 0, "timeout": 0} for name in self.providers}
+
+    # Amadeus SDK는 블로킹이므로 스레드풀에서 실행하고 같은 캐시를 사용
+    async def search_amadeus(self, client_info: Dict) -> List[Dict]:
+        params = {
+            'adults': int(client_info.get('adults') or 1),
+            'originLocationCode': client_info['origin_location_code'],
+            'destinationLocationCode': client_info['destination_location_code'],
+            'departureDate': validate_date(client_info['departure_date'])
+        }
+
+        async def fetch():
+            offers = await asyncio.to_thread(self.amadeus_api.search_flight_offers, params)
+            return self.amadeus_api.parse_flight_offers(offers)
+
+        return await flight_search_cache.get_or_fetch(flight_search_cache.make_key("amadeus", client_info), fetch)
+
+    # 공급자 결과를 공통 Itinerary 모델로 변환
+    def normalize(self, provider: str, flight_data: List[Dict]) -> List[Itinerary]:
+        itineraries = []
+        for data in flight_data:
+            try:
+                itineraries.append(Itinerary(provider=provider, **data))
+            except Exception as e:
+                logger.warning("Error normalizing %s itinerary: %s", provider, e)
+        return itineraries
+
+    # 같은 항공편은 더 싼 결과만 남긴다
+    def merge(self, itineraries: List[Itinerary]) -> List[Itinerary]:
+        merged: Dict = {}
+        for itinerary in itineraries:
+            key = itinerary.dedupe_key()
+            if key not in merged or itinerary.price < merged[key].price:
+                merged[key] = itinerary
+        return list(merged.values())
+
+    # 공급자별 소요시간 기록 - 마감 시간이 지나 취소된 조회는 cancelled로 남는다
+    async def timed_search(self, name: str, search: ProviderSearch, client_info: Dict) -> List[Dict]:
+        with span(f"provider_search.{name}") as attributes:
+            flight_data = await search(client_info)
+            attributes["results"] = len(flight_data)
+            return flight_data
+
+    # 모든 공급자를 동시에 조회 - 첫 결과 후 grace 시간 또는 전체 마감 시간이 지나면 도착한 결과만으로 응답
+    async def search(self, client_info: Dict) -> List[Dict]:
+        with span("flight_search"):
+            return await self.search_providers(client_info)
+
+    async def search_providers(self, client_info: Dict) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        tasks = {asyncio.create_task(self.timed_search(name, search, client_info)): name for name, search in self.providers.items()}
+        pending = set(tasks)
+        deadline = loop.time() + self.deadline
+        itineraries: List[Itinerary] = []
+        while pending:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                # 공급자 조회가 (공유 업스트림 호출 취소 등으로) 취소되었으면 이 검색만 실패로 처리
+                if task.cancelled():
+                    logger.warning("Flight provider %s was cancelled", name)
+                    self.stats[name]["error"] += 1
+                    continue
+                try:
+                    flight_data = task.result()
+                except (Exception, asyncio.CancelledError) as e:
+                    logger.warning("Flight provider %s failed: %s", name, e)
+                    self.stats[name]["error"] += 1
+                    continue
+                self.stats[name]["ok" if flight_data else "empty"] += 1
+                itineraries.extend(self.normalize(name, flight_data))
+            if itineraries:
+                deadline = min(deadline, loop.time() + self.grace)
+
+        for task in pending:
+            self.stats[tasks[task]]["timeout"] += 1
+            task.cancel()
+        merged = [itinerary.dict() for itinerary in self.merge(itineraries)]
+        return rank_flights(merged, settings.FLIGHT_RANKING_STRATEGIES)
+
+    async def search_summary(self, db: Database, client_info: Dict) -> str:
+        return summarize_flight_information(db, await self.search(client_info))
+
+
+# 환경 변수가 없는 등 Amadeus를 쓸 수 없으면 Skyscanner만으로 조회
+def create_flight_search(skyscanner_api: SkyscannerAPI) -> FlightSearchAggregator:
+    try:
+        amadeus_api = AmadeusAPI()
+    except Exception as e:
+        logger.warning("Amadeus provider disabled: %s", e)
+        amadeus_api = None
+    return FlightSearchAggregator(skyscanner_api, amadeus_api)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 메시지마다 붙는 역할/구분자 토큰 (OpenAI 채팅 형식 기준 대략값)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class HistoryWindow:
+    """항공 체인 대화 기록 창 - 토큰 예산 안의 최근 대화만 그대로 넘기고, 잘린 이전 대화의 입력사항은 client_info로 접는다"""
+
+    def __init__(self, max_tokens: Optional[int] = None, min_messages: Optional[int] = None,
+                 model: str = "gpt-4o", cache_size: int = 10000):
+        self.max_tokens = settings.FLIGHT_HISTORY_MAX_TOKENS if max_tokens is None else max_tokens
+        self.min_messages = settings.FLIGHT_HISTORY_MIN_MESSAGES if min_messages is None else min_messages
+        self.model = model
+        self.encoding = None
+        self.encoding_failed = False
+        # 메시지 내용 해시 -> 토큰 수 (대화 기록은 매 턴 다시 읽히므로 한 번만 센다)
+        self.token_counts: "OrderedDict[str, int]" = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.stats = {"windows": 0, "trimmed": 0, "messages_dropped": 0, "fields_folded": 0,
+                      "tokens_in": 0, "tokens_kept": 0, "tokens_saved": 0}
+
+    def encode_length(self, text: str) -> int:
+        if self.encoding is None and not self.encoding_failed:
+            try:
+                import tiktoken
+                self.encoding = tiktoken.encoding_for_model(self.model)
+            except Exception as e:
+                # 인코딩 파일을 받을 수 없으면 UTF-8 바이트 기반 근사값 사용
+                logger.warning("Tokenizer unavailable, estimating token counts: %s", e)
+                self.encoding_failed = True
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return len(text.encode('utf-8')) // 4 + 1
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+        key = hashlib.sha1(f"{message.type}\0{content}".encode('utf-8')).hexdigest()
+        with self.lock:
+            count = self.token_counts.get(key)
+            if count is not None:
+                self.token_counts.move_to_end(key)
+                return count
+        count = self.encode_length(content) + MESSAGE_OVERHEAD_TOKENS
+        with self.lock:
+            self.token_counts[key] = count
+            while len(self.token_counts) > self.cache_size:
+                self.token_counts.popitem(last=False)
+        return count
+
+    # 뒤에서부터 사용자 메시지 단위(턴)로 예산 안에 들어가는 만큼 유지, 최근 min_messages개는 항상 유지
+    def split(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage], int, int]:
+        counts = [self.count_tokens(message) for message in messages]
+        total = sum(counts)
+        if total <= self.max_tokens:
+            return [], messages, total, total
+        start, kept = len(messages), 0
+        index = len(messages)
+        while index > 0:
+            turn_start = index - 1
+            while turn_start > 0 and not isinstance(messages[turn_start], HumanMessage):
+                turn_start -= 1
+            turn_tokens = sum(counts[turn_start:index])
+            if kept + turn_tokens > self.max_tokens and len(messages) - start >= self.min_messages:
+                break
+            start, kept, index = turn_start, kept + turn_tokens, turn_start
+        return messages[:start], messages[start:], total, kept
+
+    # 잘린 항공 체인 답변의 client_info 중 현재 입력사항에 비어 있는 항목만 채운다 (최신 값 우선)
+    @staticmethod
+    def fold(dropped: List[BaseMessage], client_info: Dict) -> int:
+        folded = 0
+        for message in reversed(dropped):
+            if not isinstance(message, AIMessage):
+                continue
+            try:
+                update = json.loads(message.content).get("client_info") or {}
+            except (TypeError, ValueError, AttributeError):
+                continue
+            for field, value in update.items():
+                if value and not client_info.get(field):
+                    client_info[field] = value
+                    folded += 1
+        return folded
+
+    # 체인 입력의 history/client_info를 창 적용 결과로 바꾼 새 입력 반환
+    def apply(self, inputs: Dict) -> Dict:
+        history = inputs.get("history") or []
+        dropped, kept, total, kept_tokens = self.split(list(history))
+        self.stats["windows"] += 1
+        self.stats["tokens_in"] += total
+        self.stats["tokens_kept"] += kept_tokens
+        if not dropped:
+            return inputs
+        self.stats["trimmed"] += 1
+        self.stats["messages_dropped"] += len(dropped)
+        self.stats["tokens_saved"] += total - kept_tokens
+        client_info = json.loads(inputs["client_info"])
+        folded = self.fold(dropped, client_info)
+        self.stats["fields_folded"] += folded
+        return {
+            **inputs,
+            "history": kept,
+            "client_info": json.dumps(client_info, ensure_ascii=False, indent=4) if folded else inputs["client_info"],
+        }
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "max_tokens": self.max_tokens, "cached_counts": len(self.token_counts),
+                "estimated": self.encoding_failed}
+
+
+flight_history_window = HistoryWindow()
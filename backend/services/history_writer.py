@@ -0,0 +1,247 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from langchain_community.chat_message_histories import SQLChatMessageHistory
+from langchain_community.chat_message_histories.sql import DefaultMessageConverter
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict
+from sqlalchemy import create_engine, event
+from backend.core.config import settings
+from backend.core.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_TABLE = "message_store"
+
+
+class ChatHistoryWriter:
+    """대화 기록 write-behind 저장기 - 메시지를 메모리 대기열에 모았다가 단일 연결에서 배치 트랜잭션으로 저장"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(ChatHistoryWriter, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):  # 초기화 여부 확인
+            self.engine = create_engine(settings.SQLITE_CONNECTION_STRING)
+            if self.engine.dialect.name == "sqlite":
+                event.listen(self.engine, "connect", self.configure_sqlite)
+            self.converter = DefaultMessageConverter(MESSAGE_TABLE)
+            self.table = self.converter.get_sql_model_class().__table__
+            self.table.metadata.create_all(self.engine)
+            self.enabled = settings.HISTORY_WRITE_BEHIND
+            self.flush_size = settings.HISTORY_FLUSH_SIZE
+            self.flush_interval = settings.HISTORY_FLUSH_INTERVAL
+            self.max_queue = settings.HISTORY_MAX_QUEUE
+            self.max_retries = settings.HISTORY_MAX_RETRIES
+            self.dead_letter_path = settings.HISTORY_DEAD_LETTER_PATH
+            # 대기열이 가득 차서 받지 못한 메시지 (저장기 스레드가 dead-letter 파일로 옮긴다)
+            self.rejected: List[Tuple[str, BaseMessage]] = []
+            self.failures = 0
+            # 저장 순서 = 대기열 순서이므로 세션별 메시지 순서가 유지된다
+            self.queue: Deque[Tuple[str, BaseMessage]] = deque()
+            self.pending: Dict[str, List[BaseMessage]] = {}
+            self.condition = threading.Condition()
+            # 배치 저장과 (DB + 대기 메시지) 읽기가 겹치지 않도록 - 읽는 쪽이 같은 메시지를 두 번 보지 않는다
+            self.flush_lock = threading.RLock()
+            self.connection = None
+            self.writer: Optional[threading.Thread] = None
+            self.closed = False
+            self.stats = {"enqueued": 0, "written": 0, "flushes": 0, "errors": 0, "max_batch_size": 0,
+                          "write_seconds": 0.0, "retries": 0, "rejected": 0, "dead_lettered": 0}
+            self.initialized = True  # 초기화 상태 표시
+
+    # 기록 DB는 WAL 모드 - 저장 중에도 읽기가 막히지 않고, 커밋마다 전체 fsync를 하지 않는다
+    @staticmethod
+    def configure_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    # 대기열을 거쳐 저장하는지 여부 - 아니면 add_messages가 호출한 스레드에서 바로 DB에 쓴다
+    @property
+    def buffered(self) -> bool:
+        return self.enabled and not self.closed
+
+    def add_messages(self, session_id: str, messages: Sequence[BaseMessage]):
+        if not self.buffered:
+            self.write_batch([(session_id, message) for message in messages])
+            return
+        with self.condition:
+            if self.writer is None or not self.writer.is_alive():
+                self.writer = threading.Thread(target=self.run, name="history-writer", daemon=True)
+                self.writer.start()
+            # 저장이 따라가지 못하면(DB 장애 등) 대기열을 늘리지 않고 dead-letter 파일로 보낸다
+            if len(self.queue) + len(messages) > self.max_queue:
+                self.rejected.extend((session_id, message) for message in messages)
+                self.stats["rejected"] += len(messages)
+                logger.warning("History queue full (%d messages), dead-lettering %d messages",
+                               len(self.queue), len(messages))
+                self.condition.notify()
+                return
+            was_empty = not self.queue
+            for message in messages:
+                self.queue.append((session_id, message))
+            self.pending.setdefault(session_id, []).extend(messages)
+            self.stats["enqueued"] += len(messages)
+            # 대기 중인 저장기를 깨운다 - 빈 대기열에 첫 메시지가 들어왔을 때와 한 배치가 찼을 때
+            if was_empty or len(self.queue) >= self.flush_size:
+                self.condition.notify()
+
+    # 아직 저장되지 않은 세션 메시지 (읽기 경로에서 DB 결과 뒤에 붙인다)
+    def pending_messages(self, session_id: str) -> List[BaseMessage]:
+        with self.condition:
+            return list(self.pending.get(session_id, ()))
+
+    # 첫 메시지 이후 flush_interval이 지나거나 flush_size가 차면 한 트랜잭션으로 저장
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.rejected and not self.closed:
+                    self.condition.wait()
+                rejected, self.rejected = self.rejected, []
+                if not self.queue and not rejected:
+                    return
+                deadline = time.monotonic() + self.flush_interval
+                while self.queue and len(self.queue) < self.flush_size and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            if rejected:
+                self.dead_letter(rejected, "queue full")
+            if not self.flush_pending(limit=self.flush_size):
+                time.sleep(self.retry_delay())
+
+    # 연속 실패 횟수에 따라 늘어나는 재시도 대기 시간 (최대 30초)
+    def retry_delay(self) -> float:
+        return min(self.flush_interval * 2 ** max(self.failures - 1, 0), 30.0)
+
+    def flush_pending(self, limit: Optional[int] = None) -> bool:
+        with self.flush_lock:
+            with self.condition:
+                count = len(self.queue) if limit is None else min(limit, len(self.queue))
+                batch = [self.queue[index] for index in range(count)]
+            if not batch:
+                return True
+            try:
+                self.write_batch(batch)
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                if self.failures < self.max_retries:
+                    # 저장에 실패한 메시지는 대기열에 남겨 다음 주기에 다시 시도
+                    self.stats["retries"] += 1
+                    logger.error("History flush failed (%d messages, attempt %d/%d): %s",
+                                 len(batch), self.failures, self.max_retries, e)
+                    return False
+                # 계속 실패하는 배치는 한 건씩 저장하고, 그래도 실패하는 메시지만 dead-letter 파일로 옮긴다
+                logger.error("History flush failed %d times, saving %d messages one by one: %s",
+                             self.failures, len(batch), e)
+                self.failures = 0
+                for item in batch:
+                    try:
+                        self.write_batch([item])
+                    except Exception as item_error:
+                        self.dead_letter([item], str(item_error))
+            with self.condition:
+                for _ in range(count):
+                    session_id, _message = self.queue.popleft()
+                    messages = self.pending[session_id]
+                    messages.pop(0)
+                    if not messages:
+                        del self.pending[session_id]
+            return True
+
+    # 저장하지 못한 메시지를 JSON lines로 남긴다 (나중에 다시 넣을 수 있도록 메시지 전체를 기록)
+    def dead_letter(self, items: List[Tuple[str, BaseMessage]], reason: str):
+        self.stats["dead_lettered"] += len(items)
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for session_id, message in items:
+                    f.write(json.dumps({"session_id": session_id, "message": message_to_dict(message),
+                                        "reason": reason, "failed_at": time.time()},
+                                       ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.error("History dead-letter write failed, %d messages lost: %s", len(items), e)
+
+    def write_batch(self, batch: List[Tuple[str, BaseMessage]]):
+        started = time.monotonic()
+        rows = [{"session_id": session_id, "message": self.converter.to_sql_model(message, session_id).message}
+                for session_id, message in batch]
+        with self.flush_lock, span("history_write", messages=len(rows)):
+            try:
+                if self.connection is None or self.connection.closed:
+                    self.connection = self.engine.connect()
+                with self.connection.begin():
+                    self.connection.execute(self.table.insert(), rows)
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+        self.stats["written"] += len(rows)
+        self.stats["flushes"] += 1
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(rows))
+        self.stats["write_seconds"] += time.monotonic() - started
+
+    # 대기 중인 메시지를 모두 저장 (세션 기록 삭제 전, 종료 시)
+    def flush(self) -> bool:
+        while True:
+            with self.condition:
+                if not self.queue:
+                    return True
+            if not self.flush_pending():
+                return False
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.writer is not None:
+            self.writer.join(timeout=10)
+        if not self.flush():
+            logger.error("History writer closed with %d unsaved messages", len(self.queue))
+        with self.condition:
+            rejected, self.rejected = self.rejected, []
+        if rejected:
+            self.dead_letter(rejected, "queue full")
+        with self.flush_lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "queue_depth": len(self.queue), "pending_sessions": len(self.pending),
+                "mean_batch_size": self.stats["written"] / self.stats["flushes"] if self.stats["flushes"] else None}
+
+
+class BufferedChatMessageHistory(BaseChatMessageHistory):
+    """SQL 대화 기록 + 아직 저장되지 않은 메시지 - 쓰기는 write-behind 저장기에 맡기고 읽기는 둘을 합쳐서 반환"""
+
+    def __init__(self, writer: ChatHistoryWriter, session_id: str):
+        self.writer = writer
+        self.session_id = session_id
+        self.history = SQLChatMessageHistory(session_id=session_id, connection=writer.engine)
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self.writer.flush_lock:
+            return self.history.messages + self.writer.pending_messages(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.writer.add_messages(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.writer.flush()
+        self.history.clear()
+
+
+history_writer = ChatHistoryWriter()
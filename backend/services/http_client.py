@@ -0,0 +1,122 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+import httpx
+from backend.core.config import settings
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401 - httpx의 HTTP/2 지원은 h2 패키지가 있을 때만 동작
+        return True
+    except ImportError:
+        return False
+
+
+def percentile(values: List[float], ratio: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+class PooledHTTPClient:
+    """공급자별로 공유하는 비동기 HTTP 클라이언트 - 커넥션 풀/keep-alive, 호출별 타임아웃, 지터 재시도, 동시 요청 제한"""
+    registry: List['PooledHTTPClient'] = []
+
+    def __init__(self, name: str, headers: Optional[Dict[str, str]] = None,
+                 max_concurrency: Optional[int] = None, max_retries: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.headers = headers or {}
+        self.max_concurrency = settings.HTTP_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.max_retries = settings.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = settings.HTTP_TIMEOUT if timeout is None else timeout
+        self.http2 = http2_available()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.latencies = deque(maxlen=1000)
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "in_flight": 0, "waiting": 0}
+        PooledHTTPClient.registry.append(self)
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(
+                headers=self.headers,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.timeout, connect=settings.HTTP_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+        return self.client
+
+    # 지수 백오프에 전체 지터 적용
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(settings.HTTP_BACKOFF_MAX, settings.HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+        self.counters["waiting"] += 1
+        async with self.semaphore:
+            self.counters["waiting"] -= 1
+            self.counters["in_flight"] += 1
+            try:
+                for attempt in range(self.max_retries + 1):
+                    self.counters["requests"] += 1
+                    started = time.perf_counter()
+                    try:
+                        response = await self.get_client().request(
+                            method, url, timeout=timeout if timeout is not None else self.timeout, **kwargs
+                        )
+                    except httpx.TransportError:
+                        self.latencies.append(time.perf_counter() - started)
+                        if attempt >= self.max_retries:
+                            self.counters["failures"] += 1
+                            raise
+                    else:
+                        self.latencies.append(time.perf_counter() - started)
+                        if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                            if response.status_code >= 400:
+                                self.counters["failures"] += 1
+                            return response
+                    self.counters["retries"] += 1
+                    await asyncio.sleep(self.backoff(attempt))
+            finally:
+                self.counters["in_flight"] -= 1
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "name": self.name,
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE,
+            **self.counters,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p90": percentile(latencies, 0.9),
+            "latency_p99": percentile(latencies, 0.99),
+        }
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+def http_client_stats() -> List[Dict[str, Any]]:
+    return [client.stats() for client in PooledHTTPClient.registry]
+
+
+async def close_http_clients():
+    for client in PooledHTTPClient.registry:
+        await client.aclose()
@@ -0,0 +1,250 @@
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import create_engine, text
+from backend.core.config import settings
+from backend.databases.reference_index import reference_index
+from backend.model.messages import Message
+
+logger = logging.getLogger(__name__)
+
+# 의도 LLM 없이 처리할 수 있는 의도 - 일반 답변(message)과 이미지 없는 검색은 LLM이 답변을 만들어야 한다
+FAST_PATH_TYPES = ("flight", "search")
+
+FLIGHT_KEYWORDS = re.compile(r"항공권|항공편|비행기|비행편|직항|경유|편도|왕복|출국|귀국|공항|티켓|\bflights?\b|\btickets?\b",
+                             re.IGNORECASE)
+# 예약 대화 중의 짧은 답변 (날짜, 인원, 공항 코드 - 코드는 참조 인덱스에 있는 대문자 IATA 코드만)
+BOOKING_ANSWER = re.compile(r"^\s*(\d{4}[-./]\d{1,2}([-./]\d{1,2})?|\d{1,2}\s*월(\s*\d{1,2}\s*일)?|\d{1,2}\s*일|"
+                            r"\d+\s*명|(?P<code>[A-Z]{3}))\s*(이요|요|입니다|이에요|예요)?[.!]?\s*$")
+BOOKING_FIELDS = ("origin", "destination", "origin_location_code", "destination_location_code", "departure_date")
+
+
+def tokenize(message: str) -> List[str]:
+    """단어와 글자 2-gram/3-gram 특징 (한국어는 띄어쓰기가 일정하지 않아 글자 n-gram을 함께 사용)"""
+    normalized = re.sub(r"\s+", " ", message.lower()).strip()
+    tokens = [f"w:{word}" for word in normalized.split(" ") if word]
+    compact = normalized.replace(" ", "")
+    for size in (2, 3):
+        tokens.extend(f"c:{compact[i:i + size]}" for i in range(len(compact) - size + 1))
+    # 항공 키워드는 예약 대화 밖에서는 규칙이 아니라 모델 특징으로만 사용
+    if FLIGHT_KEYWORDS.search(message):
+        tokens.append("k:flight")
+    return tokens
+
+
+class IntentClassifier:
+    """규칙 + 다항 나이브 베이즈 의도 분류기 - 저장된 대화 기록(의도 LLM이 붙인 type)으로 학습"""
+
+    def __init__(self, model_path: Optional[str] = None, threshold: Optional[float] = None):
+        self.model_path = model_path or settings.INTENT_MODEL_PATH
+        self.threshold = settings.INTENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+        self.class_counts: Dict[str, int] = {}
+        self.token_counts: Dict[str, Dict[str, int]] = {}
+        self.token_totals: Dict[str, int] = {}
+        self.vocabulary_size = 0
+        self.stats = {"fast_path": 0, "fallback": 0, "rule_hits": 0, "model_hits": 0}
+
+    @property
+    def trained(self) -> bool:
+        return bool(self.class_counts)
+
+    def train(self, samples: Sequence[Tuple[str, str]]):
+        class_counts: Counter = Counter()
+        token_counts: Dict[str, Counter] = defaultdict(Counter)
+        for message, label in samples:
+            class_counts[label] += 1
+            token_counts[label].update(tokenize(message))
+        self.class_counts = dict(class_counts)
+        self.token_counts = {label: dict(counts) for label, counts in token_counts.items()}
+        self.token_totals = {label: sum(counts.values()) for label, counts in token_counts.items()}
+        self.vocabulary_size = len({token for counts in token_counts.values() for token in counts})
+
+    # 라플라스 스무딩을 적용한 의도별 사후 확률
+    def predict_proba(self, message: str) -> Dict[str, float]:
+        if not self.trained:
+            return {}
+        tokens = tokenize(message)
+        total = sum(self.class_counts.values())
+        log_scores = {}
+        for label, count in self.class_counts.items():
+            counts = self.token_counts.get(label, {})
+            denominator = self.token_totals.get(label, 0) + self.vocabulary_size + 1
+            log_scores[label] = math.log(count / total) + sum(
+                math.log((counts.get(token, 0) + 1) / denominator) for token in tokens
+            )
+        top = max(log_scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in log_scores.items()}
+        norm = sum(exp_scores.values())
+        return {label: score / norm for label, score in exp_scores.items()}
+
+    # 예약 대화 중의 짧은 답변인지 확인 - 공항 코드 형태면 실제 공항 코드일 때만
+    @staticmethod
+    def is_booking_answer(text: str) -> bool:
+        match = BOOKING_ANSWER.match(text)
+        if match is None:
+            return False
+        return match.group("code") is None or reference_index.get_airport(match.group("code")) is not None
+
+    # 규칙 분류 - 이미지가 있으면 검색, 예약 진행 중에 항공 키워드나 짧은 답변이면 항공
+    # (예약 대화 밖의 "인천공항 라운지 추천해줘" 같은 일반 질문은 모델/의도 LLM이 판단)
+    def classify_by_rules(self, message: Message, client_info: Optional[Dict] = None) -> Optional[Tuple[str, float]]:
+        if message.image:
+            return "search", 1.0
+        booking_active = client_info is not None and any(client_info.get(field) for field in BOOKING_FIELDS)
+        if not booking_active:
+            return None
+        text = message.message or ""
+        if FLIGHT_KEYWORDS.search(text) or self.is_booking_answer(text):
+            return "flight", 0.95
+        return None
+
+    def classify(self, message: Message, client_info: Optional[Dict] = None) -> Tuple[Optional[str], float]:
+        rule = self.classify_by_rules(message, client_info)
+        if rule is not None:
+            self.stats["rule_hits"] += 1
+            return rule
+        probabilities = self.predict_proba(message.message or "")
+        if not probabilities:
+            return None, 0.0
+        self.stats["model_hits"] += 1
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    # 의도 LLM 호출을 건너뛸 수 있으면 의도를, 아니면 None을 반환
+    def fast_path(self, message: Message, client_info: Optional[Dict] = None) -> Optional[str]:
+        label, confidence = self.classify(message, client_info)
+        # 이미지 없는 검색은 LLM이 답변을 생성해야 하므로 제외
+        if (label in FAST_PATH_TYPES and confidence >= self.threshold
+                and (label != "search" or message.image)):
+            self.stats["fast_path"] += 1
+            return label
+        self.stats["fallback"] += 1
+        return None
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.model_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "class_counts": self.class_counts,
+                "token_counts": self.token_counts,
+                "vocabulary_size": self.vocabulary_size
+            }, f, ensure_ascii=False)
+
+    def load(self, path: Optional[str] = None) -> bool:
+        path = path or self.model_path
+        if not os.path.exists(path):
+            return False
+        with open(path, "r", encoding="utf-8") as f:
+            model = json.load(f)
+        self.class_counts = model["class_counts"]
+        self.token_counts = model["token_counts"]
+        self.token_totals = {label: sum(counts.values()) for label, counts in self.token_counts.items()}
+        self.vocabulary_size = model["vocabulary_size"]
+        return True
+
+    # 저장된 모델을 불러오고, 없으면 대화 기록으로 학습 (기록이 부족하면 규칙만 사용)
+    def load_or_train(self, connection_string: Optional[str] = None):
+        try:
+            if self.load():
+                return
+            samples = load_labelled_history(connection_string)
+        except Exception as e:
+            logger.warning("Intent classifier load failed, using rules only: %s", e)
+            return
+        if len(samples) >= settings.INTENT_MIN_TRAINING_SAMPLES:
+            self.train(samples)
+            self.save()
+            logger.info("Intent classifier trained on %d messages", len(samples))
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "trained": self.trained, "threshold": self.threshold}
+
+
+# 대화 기록(message_store)에서 (사용자 메시지, 의도 LLM이 붙인 type) 쌍 추출
+def load_labelled_history(connection_string: Optional[str] = None) -> List[Tuple[str, str]]:
+    engine = create_engine(connection_string or settings.SQLITE_CONNECTION_STRING)
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT session_id, message FROM message_store ORDER BY id")).fetchall()
+    samples = []
+    pending: Dict[str, str] = {}
+    for session_id, raw in rows:
+        message = json.loads(raw)
+        data = message.get("data", {})
+        if message.get("type") == "human":
+            # 이미지 메시지는 규칙으로 처리하므로 학습에서 제외
+            if not data.get("additional_kwargs", {}).get("image"):
+                pending[session_id] = data.get("content", "")
+        elif message.get("type") == "ai" and session_id in pending:
+            label = data.get("additional_kwargs", {}).get("type")
+            if label:
+                samples.append((pending[session_id], label))
+            pending.pop(session_id, None)
+    return samples
+
+
+# 오프라인 평가 - k-fold로 학습/검증하며 의도 LLM 라벨과의 일치율, 임계값 이상 비율, 분류 시간을 측정
+def evaluate(samples: Sequence[Tuple[str, str]], threshold: float, folds: int = 5, seed: int = 0) -> Dict:
+    samples = list(samples)
+    random.Random(seed).shuffle(samples)
+    total = agree = covered = covered_agree = fast_path = fast_path_agree = 0
+    elapsed = 0.0
+    for fold in range(folds):
+        test = samples[fold::folds]
+        train = [sample for index, sample in enumerate(samples) if index % folds != fold]
+        classifier = IntentClassifier(model_path="", threshold=threshold)
+        classifier.train(train)
+        for message, label in test:
+            started = time.perf_counter()
+            predicted, confidence = classifier.classify(Message(session_id="", message=message))
+            elapsed += time.perf_counter() - started
+            total += 1
+            agree += predicted == label
+            if confidence >= threshold:
+                covered += 1
+                covered_agree += predicted == label
+                if predicted in FAST_PATH_TYPES:
+                    fast_path += 1
+                    fast_path_agree += predicted == label
+    return {
+        "samples": total,
+        "labels": dict(Counter(label for _, label in samples)),
+        "agreement": agree / total if total else None,
+        "threshold": threshold,
+        "coverage": covered / total if total else None,
+        "agreement_above_threshold": covered_agree / covered if covered else None,
+        "fast_path_rate": fast_path / total if total else None,
+        "fast_path_agreement": fast_path_agree / fast_path if fast_path else None,
+        "mean_latency_us": elapsed / total * 1e6 if total else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 의도 분류기 학습/평가")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--connection", default=None, help="대화 기록 DB 연결 문자열 (기본값: SQLITE_CONNECTION_STRING)")
+    parser.add_argument("--threshold", type=float, default=settings.INTENT_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = load_labelled_history(args.connection)
+    if args.command == "train":
+        classifier = IntentClassifier(threshold=args.threshold)
+        classifier.train(samples)
+        classifier.save()
+        print(f"Trained on {len(samples)} messages -> {classifier.model_path}")
+    else:
+        print(json.dumps(evaluate(samples, args.threshold, args.folds), ensure_ascii=False, indent=4))
+
+
+intent_classifier = IntentClassifier()
+
+if __name__ == "__main__":
+    main()
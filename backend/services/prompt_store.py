@@ -0,0 +1,128 @@
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+from langchain import hub
+from langchain_core.load import dumps, loads
+from langchain_core.prompts import BasePromptTemplate
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PromptStore:
+    """hub 프롬프트를 프로세스 단위로 캐시하고, 마지막으로 받은 프롬프트를 디스크 스냅샷으로 보관하는 저장소"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(PromptStore, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):  # 초기화 여부 확인
+            self.ttl = settings.PROMPT_CACHE_TTL
+            self.snapshot_dir = settings.PROMPT_SNAPSHOT_DIR
+            self.prompts: Dict[str, Tuple[BasePromptTemplate, float]] = {}
+            self.refreshing = set()
+            self.revision = 0  # 캐시된 프롬프트 내용이 바뀔 때마다 증가
+            self.lock = threading.Lock()
+            self.initialized = True  # 초기화 상태 표시
+
+    # 'owner/name:commit' 형식은 버전이 고정된 프롬프트이므로 만료시키지 않는다
+    def is_pinned(self, name: str) -> bool:
+        return ':' in name.split('/')[-1]
+
+    def is_fresh(self, name: str, loaded_at: float) -> bool:
+        if self.is_pinned(name) or self.ttl <= 0:
+            return True
+        return time.time() - loaded_at < self.ttl
+
+    def snapshot_path(self, name: str) -> str:
+        filename = name.replace('/', '__').replace(':', '@') + '.json'
+        return os.path.join(self.snapshot_dir, filename)
+
+    def save_snapshot(self, name: str, prompt: BasePromptTemplate):
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            path = self.snapshot_path(name)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(dumps(prompt))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Prompt snapshot save failed for %s: %s", name, e)
+
+    def load_snapshot(self, name: str) -> BasePromptTemplate:
+        with open(self.snapshot_path(name), 'r', encoding='utf-8') as f:
+            return loads(f.read())
+
+    # hub에서 프롬프트를 받아 캐시/스냅샷 갱신, 실패하면 기존 캐시나 스냅샷으로 대체
+    def fetch(self, name: str) -> BasePromptTemplate:
+        try:
+            prompt = hub.pull(name)
+            self.save_snapshot(name, prompt)
+        except Exception as e:
+            cached = self.prompts.get(name)
+            if cached is not None:
+                logger.warning("Prompt pull failed for %s, keeping cached prompt: %s", name, e)
+                prompt = cached[0]
+            else:
+                logger.warning("Prompt pull failed for %s, loading snapshot: %s", name, e)
+                prompt = self.load_snapshot(name)
+        with self.lock:
+            cached = self.prompts.get(name)
+            if cached is None or dumps(cached[0]) != dumps(prompt):
+                self.revision += 1
+            self.prompts[name] = (prompt, time.time())
+        return prompt
+
+    # 만료된 프롬프트를 백그라운드에서 갱신 (요청 경로에서는 기존 캐시를 그대로 사용)
+    def refresh_in_background(self, name: str):
+        with self.lock:
+            if name in self.refreshing:
+                return
+            self.refreshing.add(name)
+
+        def run():
+            try:
+                self.fetch(name)
+            finally:
+                self.refreshing.discard(name)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # 프롬프트 조회 함수 - 호출자가 수정해도 캐시가 오염되지 않도록 복사본을 반환
+    def get(self, name: str) -> BasePromptTemplate:
+        cached = self.prompts.get(name)
+        if cached is None:
+            prompt = self.fetch(name)
+        else:
+            prompt = cached[0]
+            if not self.is_fresh(name, cached[1]):
+                self.refresh_in_background(name)
+        return copy.deepcopy(prompt)
+
+    # 만료된 프롬프트만 백그라운드 갱신 요청 (I/O 없음)
+    def refresh_expired(self):
+        for name, (_, loaded_at) in list(self.prompts.items()):
+            if not self.is_fresh(name, loaded_at):
+                self.refresh_in_background(name)
+
+    def preload(self, names: Iterable[str]):
+        for name in names:
+            self.fetch(name)
+
+    # 캐시된 프롬프트 내용 기준의 버전 해시
+    def version(self) -> str:
+        digest = hashlib.sha256()
+        for name in sorted(self.prompts):
+            digest.update(name.encode('utf-8'))
+            digest.update(dumps(self.prompts[name][0]).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+
+prompt_store = PromptStore()
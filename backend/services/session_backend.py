@@ -0,0 +1,253 @@
+import base64
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from backend.core.config import settings
+from backend.services.session_state import SessionStateStore
+
+
+# 외부 저장소용 값 인코딩 - bytes는 base64로 감싸 JSON으로 저장
+def encode_value(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        value = {"__bytes__": base64.b64encode(value).decode('ascii')}
+    return json.dumps(value, ensure_ascii=False)
+
+
+def decode_value(raw) -> Any:
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+    value = json.loads(raw)
+    if isinstance(value, dict) and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+class SessionBackend(ABC):
+    """세션 상태(client_info, 항공 대화 기록, 벡터 스토어 등)를 namespace/session_id 단위로 저장하는 저장소 인터페이스"""
+    # 여러 워커가 같은 상태를 공유하는 저장소인지 여부
+    shared = True
+
+    @abstractmethod
+    def get(self, namespace: str, session_id: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, session_id: str, value: Any):
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, session_id: str):
+        ...
+
+    @abstractmethod
+    def get_list(self, namespace: str, session_id: str) -> List[Any]:
+        ...
+
+    @abstractmethod
+    def append(self, namespace: str, session_id: str, items: Sequence[Any]):
+        ...
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+
+class InMemorySessionBackend(SessionBackend):
+    """프로세스 메모리 저장소 - namespace마다 TTL/LRU 제한이 있는 SessionStateStore 사용"""
+    shared = False
+
+    def __init__(self):
+        self.namespaces: Dict[str, SessionStateStore] = {}
+        self.lock = threading.Lock()
+
+    def store(self, namespace: str) -> SessionStateStore:
+        if namespace not in self.namespaces:
+            with self.lock:
+                if namespace not in self.namespaces:
+                    self.namespaces[namespace] = SessionStateStore(f"backend:{namespace}")
+        return self.namespaces[namespace]
+
+    def get(self, namespace: str, session_id: str) -> Optional[Any]:
+        return self.store(namespace).get(session_id)
+
+    def set(self, namespace: str, session_id: str, value: Any):
+        self.store(namespace)[session_id] = value
+
+    def delete(self, namespace: str, session_id: str):
+        self.store(namespace).pop(session_id, None)
+
+    def get_list(self, namespace: str, session_id: str) -> List[Any]:
+        return list(self.store(namespace).get(session_id) or [])
+
+    def append(self, namespace: str, session_id: str, items: Sequence[Any]):
+        store = self.store(namespace)
+        with store.lock:
+            # 다시 대입해서 크기와 접근 시각을 갱신
+            store[session_id] = (store.get(session_id) or []) + list(items)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """SQLite 파일 저장소 - 같은 노드의 여러 워커가 공유하고 재시작 후에도 유지"""
+
+    def __init__(self, path: str, ttl: int):
+        self.ttl = ttl
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA busy_timeout=5000")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            "namespace TEXT NOT NULL, session_id TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, session_id))"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_list ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL, session_id TEXT NOT NULL, "
+            "value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS session_list_key ON session_list (namespace, session_id, id)"
+        )
+        self.lock = threading.Lock()
+
+    def min_updated_at(self) -> float:
+        return time.time() - self.ttl if self.ttl > 0 else 0
+
+    def get(self, namespace: str, session_id: str) -> Optional[Any]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM session_state WHERE namespace = ? AND session_id = ? AND updated_at >= ?",
+                (namespace, session_id, self.min_updated_at())
+            ).fetchone()
+        return decode_value(row[0]) if row else None
+
+    def set(self, namespace: str, session_id: str, value: Any):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO session_state (namespace, session_id, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, session_id, encode_value(value), time.time())
+            )
+
+    def delete(self, namespace: str, session_id: str):
+        with self.lock:
+            self.connection.execute("DELETE FROM session_state WHERE namespace = ? AND session_id = ?",
+                                    (namespace, session_id))
+            self.connection.execute("DELETE FROM session_list WHERE namespace = ? AND session_id = ?",
+                                    (namespace, session_id))
+
+    def get_list(self, namespace: str, session_id: str) -> List[Any]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT value FROM session_list WHERE namespace = ? AND session_id = ? AND updated_at >= ? ORDER BY id",
+                (namespace, session_id, self.min_updated_at())
+            ).fetchall()
+        return [decode_value(row[0]) for row in rows]
+
+    def append(self, namespace: str, session_id: str, items: Sequence[Any]):
+        now = time.time()
+        rows = [(namespace, session_id, encode_value(item), now) for item in items]
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    "INSERT INTO session_list (namespace, session_id, value, updated_at) VALUES (?, ?, ?, ?)", rows
+                )
+                # 목록 전체의 만료 시각을 함께 연장
+                self.connection.execute(
+                    "UPDATE session_list SET updated_at = ? WHERE namespace = ? AND session_id = ?",
+                    (now, namespace, session_id)
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                # 공유 연결이 트랜잭션 안에 남지 않도록 되돌린다
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def purge_expired(self) -> int:
+        if self.ttl <= 0:
+            return 0
+        with self.lock:
+            deleted = self.connection.execute("DELETE FROM session_state WHERE updated_at < ?",
+                                              (self.min_updated_at(),)).rowcount
+            deleted += self.connection.execute("DELETE FROM session_list WHERE updated_at < ?",
+                                               (self.min_updated_at(),)).rowcount
+        return deleted
+
+    def close(self):
+        self.connection.close()
+
+
+class RedisSessionBackend(SessionBackend):
+    """Redis 프로토콜 저장소 - 여러 노드의 워커가 공유, 만료는 서버의 EXPIRE로 처리"""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "herobot"):
+        import redis  # 선택 의존성 - Redis 백엔드를 쓸 때만 필요
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def key(self, namespace: str, session_id: str) -> str:
+        return f"{self.prefix}:{namespace}:{session_id}"
+
+    def get(self, namespace: str, session_id: str) -> Optional[Any]:
+        raw = self.client.get(self.key(namespace, session_id))
+        return decode_value(raw) if raw is not None else None
+
+    def set(self, namespace: str, session_id: str, value: Any):
+        self.client.set(self.key(namespace, session_id), encode_value(value), ex=self.ttl or None)
+
+    def delete(self, namespace: str, session_id: str):
+        self.client.delete(self.key(namespace, session_id))
+
+    def get_list(self, namespace: str, session_id: str) -> List[Any]:
+        return [decode_value(raw) for raw in self.client.lrange(self.key(namespace, session_id), 0, -1)]
+
+    def append(self, namespace: str, session_id: str, items: Sequence[Any]):
+        key = self.key(namespace, session_id)
+        pipeline = self.client.pipeline()
+        pipeline.rpush(key, *[encode_value(item) for item in items])
+        if self.ttl:
+            pipeline.expire(key, self.ttl)
+        pipeline.execute()
+
+    def close(self):
+        self.client.close()
+
+
+class BackendChatMessageHistory(BaseChatMessageHistory):
+    """SessionBackend의 목록에 메시지를 저장하는 대화 기록"""
+
+    def __init__(self, backend: SessionBackend, namespace: str, session_id: str):
+        self.backend = backend
+        self.namespace = namespace
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return messages_from_dict(self.backend.get_list(self.namespace, self.session_id))
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.backend.append(self.namespace, self.session_id, [message_to_dict(message) for message in messages])
+
+    def clear(self) -> None:
+        self.backend.delete(self.namespace, self.session_id)
+
+
+# 설정(SESSION_BACKEND: memory, sqlite, redis)에 따른 저장소 생성
+def create_session_backend() -> SessionBackend:
+    backend_type = settings.SESSION_BACKEND
+    if backend_type == "sqlite":
+        return SQLiteSessionBackend(settings.SESSION_BACKEND_URL, settings.SESSION_IDLE_TTL)
+    if backend_type == "redis":
+        return RedisSessionBackend(settings.SESSION_BACKEND_URL, settings.SESSION_IDLE_TTL)
+    return InMemorySessionBackend()
+
+
+session_backend = create_session_backend()
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 만료 훅 타입 - (session_id, value, reason)
+EvictHook = Callable[[str, Any, str], None]
+
+
+def approx_sizeof(value: Any, seen: Optional[set] = None, depth: int = 6) -> int:
+    """컨테이너와 객체 속성을 따라가며 대략적인 메모리 사용량(byte)을 계산 (depth 단계까지만)"""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value, 0)
+    if depth <= 0 or isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        size += sum(approx_sizeof(k, seen, depth - 1) + approx_sizeof(v, seen, depth - 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_sizeof(item, seen, depth - 1) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += approx_sizeof(vars(value), seen, depth - 1)
+    return size
+
+
+class SessionStateStore(MutableMapping):
+    """세션 ID를 키로 하는 상태 저장소 - 유휴 TTL, LRU 개수 제한, 대략적인 메모리 한도로 오래된 세션을 제거"""
+    registry: List['SessionStateStore'] = []
+
+    def __init__(self, name: str, idle_ttl: Optional[float] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, sizeof: Callable[[Any], int] = approx_sizeof):
+        self.name = name
+        self.idle_ttl = settings.SESSION_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.max_entries = settings.SESSION_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = settings.SESSION_MAX_BYTES if max_bytes is None else max_bytes
+        self.sizeof = sizeof
+        # session_id -> (value, 마지막 접근 시각, 크기)
+        self.entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hooks: List[EvictHook] = []
+        self.evictions: Dict[str, int] = {"ttl": 0, "lru": 0, "bytes": 0}
+        self.lock = threading.RLock()
+        SessionStateStore.registry.append(self)
+
+    # 만료 훅 등록 함수 - 제거되는 상태를 영구 저장소로 내보낼 때 사용
+    def add_evict_hook(self, hook: EvictHook):
+        self.hooks.append(hook)
+
+    def is_expired(self, accessed_at: float, now: float) -> bool:
+        return self.idle_ttl > 0 and now - accessed_at > self.idle_ttl
+
+    def __getitem__(self, session_id: str) -> Any:
+        with self.lock:
+            value, accessed_at, size = self.entries[session_id]
+            now = time.time()
+            if self.is_expired(accessed_at, now):
+                self._evict(session_id, "ttl")
+                raise KeyError(session_id)
+            # 조회는 접근 시각과 LRU 순서만 갱신 - 크기는 대입(__setitem__)이나 resize 때만 다시 계산
+            self.entries[session_id] = (value, now, size)
+            self.entries.move_to_end(session_id)
+            return value
+
+    def __setitem__(self, session_id: str, value: Any):
+        with self.lock:
+            if session_id in self.entries:
+                self.total_bytes -= self.entries[session_id][2]
+            size = self.sizeof(value)
+            self.entries[session_id] = (value, time.time(), size)
+            self.entries.move_to_end(session_id)
+            self.total_bytes += size
+            self._enforce_limits()
+
+    # 크기 재계산 함수 - 저장된 값을 다시 대입하지 않고 내부에서 변경했을 때 호출
+    def resize(self, session_id: str):
+        with self.lock:
+            value, accessed_at, size = self.entries[session_id]
+            new_size = self.sizeof(value)
+            self.total_bytes += new_size - size
+            self.entries[session_id] = (value, accessed_at, new_size)
+            self._enforce_limits()
+
+    def __delitem__(self, session_id: str):
+        with self.lock:
+            _, _, size = self.entries.pop(session_id)
+            self.total_bytes -= size
+
+    def __contains__(self, session_id: object) -> bool:
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return False
+            if self.is_expired(entry[1], time.time()):
+                self._evict(session_id, "ttl")
+                return False
+            return True
+
+    def __iter__(self) -> Iterator[str]:
+        with self.lock:
+            return iter(list(self.entries))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _evict(self, session_id: str, reason: str):
+        value, _, size = self.entries.pop(session_id)
+        self.total_bytes -= size
+        self.evictions[reason] += 1
+        for hook in self.hooks:
+            try:
+                hook(session_id, value, reason)
+            except Exception as e:
+                logger.exception("Evict hook error in %s for %s: %s", self.name, session_id, e)
+
+    # LRU 개수 제한과 메모리 한도 적용 - 가장 최근에 사용한 세션은 남긴다
+    def _enforce_limits(self):
+        while self.max_entries > 0 and len(self.entries) > self.max_entries:
+            self._evict(next(iter(self.entries)), "lru")
+        while self.max_bytes > 0 and self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            self._evict(next(iter(self.entries)), "bytes")
+
+    # 유휴 TTL이 지난 세션 일괄 제거
+    def evict_expired(self) -> int:
+        now = time.time()
+        with self.lock:
+            expired = [session_id for session_id, (_, accessed_at, _) in self.entries.items()
+                       if self.is_expired(accessed_at, now)]
+            for session_id in expired:
+                self._evict(session_id, "ttl")
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "live_sessions": len(self.entries),
+            "approx_bytes": self.total_bytes,
+            "evictions": dict(self.evictions),
+        }
+
+
+def evict_expired_sessions() -> int:
+    return sum(store.evict_expired() for store in SessionStateStore.registry)
+
+
+def session_state_stats() -> List[Dict[str, Any]]:
+    return [store.stats() for store in SessionStateStore.registry]
+
+
+# 주기적으로 만료된 세션을 정리하는 백그라운드 작업
+async def run_session_sweeper(interval: Optional[float] = None, purge_callbacks: List[Callable[[], int]] = ()):
+    interval = settings.SESSION_SWEEP_INTERVAL if interval is None else interval
+    while True:
+        await asyncio.sleep(interval)
+        evicted = evict_expired_sessions()
+        for purge in purge_callbacks:
+            evicted += await asyncio.to_thread(purge)
+        if evicted:
+            logger.info("Evicted %d idle session entries", evicted)
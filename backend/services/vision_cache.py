@@ -0,0 +1,111 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from backend.core.config import settings
+from backend.utils import image_dhash
+
+logger = logging.getLogger(__name__)
+
+
+def to_signed(value: int) -> int:
+    # SQLite INTEGER는 부호 있는 64비트이므로 해시를 int64 범위로 옮겨 저장
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class VisionResultCache:
+    """Vision web detection 결과 캐시 - 이미지 지각 해시(dHash)가 같거나 해밍 거리가 허용치 이내면 저장된 Location 재사용"""
+
+    def __init__(self, path: Optional[str] = None, max_distance: Optional[int] = None, ttl: Optional[int] = None):
+        self.max_distance = settings.VISION_CACHE_MAX_DISTANCE if max_distance is None else max_distance
+        self.ttl = settings.VISION_CACHE_TTL if ttl is None else ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path or settings.VISION_CACHE_PATH, check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS vision_cache (hash INTEGER PRIMARY KEY, location TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        # 거리 계산은 메모리의 해시 배열로 한 번에 (행 순서 = entries 순서)
+        self.hashes = np.zeros(0, dtype=np.int64)
+        self.entries: List[Tuple[str, float]] = []
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "expired": 0, "stores": 0, "unhashable": 0}
+        self.load()
+
+    def load(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT hash, location, stored_at FROM vision_cache WHERE stored_at >= ?",
+                                           (self.expires_before(),)).fetchall()
+            self.hashes = np.array([row[0] for row in rows], dtype=np.int64)
+            self.entries = [(row[1], row[2]) for row in rows]
+
+    def expires_before(self) -> float:
+        return time.time() - self.ttl if self.ttl > 0 else 0
+
+    # 이미지 바이트의 지각 해시, 디코딩할 수 없는 이미지는 None
+    def fingerprint(self, content: bytes) -> Optional[int]:
+        try:
+            return to_signed(image_dhash(content))
+        except Exception as e:
+            logger.warning("Vision cache fingerprint failed: %s", e)
+            self.stats["unhashable"] += 1
+            return None
+
+    def lookup(self, fingerprint: int) -> Optional[str]:
+        with self.lock:
+            if not self.entries:
+                self.stats["misses"] += 1
+                return None
+            # XOR 후 켜진 비트 수 = 해밍 거리
+            distances = np.unpackbits((self.hashes ^ np.int64(fingerprint)).view(np.uint8).reshape(-1, 8),
+                                      axis=1).sum(axis=1)
+            index = int(distances.argmin())
+            distance = int(distances[index])
+            if distance > self.max_distance:
+                self.stats["misses"] += 1
+                return None
+            location, stored_at = self.entries[index]
+            if self.ttl > 0 and time.time() - stored_at > self.ttl:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["exact_hits" if distance == 0 else "near_hits"] += 1
+            return location
+
+    def store(self, fingerprint: int, location: str):
+        now = time.time()
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO vision_cache (hash, location, stored_at) VALUES (?, ?, ?)",
+                                    (fingerprint, location, now))
+            matches = np.flatnonzero(self.hashes == fingerprint)
+            if matches.size:
+                self.entries[int(matches[0])] = (location, now)
+            else:
+                self.hashes = np.append(self.hashes, np.int64(fingerprint))
+                self.entries.append((location, now))
+            self.stats["stores"] += 1
+
+    def purge_expired(self) -> int:
+        if self.ttl <= 0:
+            return 0
+        with self.lock:
+            deleted = self.connection.execute("DELETE FROM vision_cache WHERE stored_at < ?",
+                                              (self.expires_before(),)).rowcount
+        if deleted:
+            self.load()
+        return deleted
+
+    def get_stats(self) -> Dict:
+        hits = self.stats["exact_hits"] + self.stats["near_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else None,
+            "entries": len(self.entries),
+            "max_distance": self.max_distance,
+        }
+
+
+vision_result_cache = VisionResultCache()
@@ -0,0 +1,128 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from google.cloud import vision
+from backend.core.config import settings
+from backend.core.telemetry import session_context, span
+
+logger = logging.getLogger(__name__)
+
+# batch_annotate_images 동기 요청 한 번에 넣을 수 있는 최대 이미지 수
+VISION_API_BATCH_LIMIT = 16
+
+# 대기열 항목 - (이미지, 결과 Future, 대기열에 넣은 시각, 요청 측 contextvars)
+PendingImage = Tuple[vision.Image, Future, float, contextvars.Context]
+
+
+class VisionExecutor:
+    """Google Vision 요청 실행기 - 짧은 시간 동안 들어온 이미지를 batch_annotate_images 한 번으로 묶어 제한된 스레드 풀에서 실행"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(VisionExecutor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, client=None):
+        if not hasattr(self, 'initialized'):  # 초기화 여부 확인
+            self.client = client
+            self.max_workers = settings.VISION_MAX_WORKERS
+            self.batch_size = max(1, min(settings.VISION_BATCH_SIZE, VISION_API_BATCH_LIMIT))
+            self.batch_window = settings.VISION_BATCH_WINDOW
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vision")
+            # 빈 작업자가 생길 때까지 배치를 보내지 않는다 - 그동안 들어온 요청은 다음 배치에 함께 담긴다
+            self.slots = threading.BoundedSemaphore(self.max_workers)
+            self.pending: "queue.Queue[PendingImage]" = queue.Queue()
+            self.lock = threading.Lock()
+            self.dispatcher: Optional[threading.Thread] = None
+            self.active_batches = 0
+            self.batch_sizes: Dict[int, int] = {}
+            self.stats = {"requests": 0, "batches": 0, "errors": 0, "api_seconds": 0.0, "queue_wait_seconds": 0.0}
+            self.initialized = True  # 초기화 상태 표시
+
+    def get_client(self):
+        if self.client is None:
+            self.client = vision.ImageAnnotatorClient()
+        return self.client
+
+    # web detection 요청을 대기열에 넣고 결과(WebDetection) Future를 반환
+    def submit(self, image: vision.Image) -> Future:
+        future = Future()
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.dispatcher is None or not self.dispatcher.is_alive():
+                self.dispatcher = threading.Thread(target=self.run_batches, name="vision-batcher", daemon=True)
+                self.dispatcher.start()
+        # 스레드 풀은 contextvars를 넘기지 않으므로 요청 측 컨텍스트(세션 ID)를 함께 넣는다
+        self.pending.put((image, future, time.monotonic(), contextvars.copy_context()))
+        return future
+
+    # 첫 요청 이후 batch_window 동안 또는 batch_size가 찰 때까지 모아서 빈 작업자에게 넘긴다
+    def run_batches(self):
+        while True:
+            batch = [self.pending.get()]
+            self.slots.acquire()
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            with self.lock:
+                self.active_batches += 1
+            # 배치는 첫 요청의 컨텍스트에서 실행 (다른 요청의 세션 ID는 span 속성으로)
+            self.pool.submit(batch[0][3].run, self.annotate_batch, batch)
+
+    def annotate_batch(self, batch: List[PendingImage]):
+        started = time.monotonic()
+        try:
+            requests = [vision.AnnotateImageRequest(
+                image=image, features=[vision.Feature(type_=vision.Feature.Type.WEB_DETECTION)]
+            ) for image, _, _, _ in batch]
+            session_ids = [context.get(session_context) for _, _, _, context in batch]
+            with span("vision_api", batch_size=len(batch), session_ids=session_ids):
+                responses = self.get_client().batch_annotate_images(requests=requests).responses
+            for (_, future, _, _), response in zip(batch, responses):
+                if response.error.code:
+                    self.stats["errors"] += 1
+                    future.set_exception(RuntimeError(f"Vision web detection failed: {response.error.message}"))
+                else:
+                    future.set_result(response.web_detection)
+            for _, future, _, _ in batch[len(responses):]:
+                self.stats["errors"] += 1
+                future.set_exception(RuntimeError("Vision web detection returned no response"))
+        except Exception as e:
+            logger.warning("Vision batch of %d images failed: %s", len(batch), e)
+            self.stats["errors"] += len(batch)
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.slots.release()
+            with self.lock:
+                self.active_batches -= 1
+                self.stats["batches"] += 1
+                self.stats["api_seconds"] += time.monotonic() - started
+                self.stats["queue_wait_seconds"] += sum(started - queued for _, _, queued, _ in batch)
+                self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+
+    def get_stats(self) -> Dict:
+        batches = self.stats["batches"]
+        sent = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            **self.stats,
+            "queue_depth": self.pending.qsize(),
+            "active_batches": self.active_batches,
+            "max_workers": self.max_workers,
+            "mean_batch_size": sent / batches if batches else None,
+            "mean_queue_wait": self.stats["queue_wait_seconds"] / sent if sent else None,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
+vision_executor = VisionExecutor()
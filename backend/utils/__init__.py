@@ -1,6 +1,7 @@
 from .image_utils import convert_to_base64, resize_image
 from .message_utils import str_to_message, process_messages
 from .format_utils import format_search_results
-from .vision_utils import save_image_from_base64, load_image_from_base64, load_image_from_path, web_detection_to_dict
+from .vision_utils import prepare_image, load_image_from_base64, load_image_from_path, web_detection_to_dict, image_dhash
 from .session_util import generate_session_id, get_session_id_from_cookie
-from .flight_utils import parse_flight_info, summarize_flight_information, validate_date
\ No newline at end of file
+from .flight_utils import parse_flight_info, summarize_flight_information, summarize_price_calendar, validate_date
+from .ranking import rank_flights, validate_strategies, ItineraryTable
\ No newline at end of file
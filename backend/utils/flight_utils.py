@@ -1,40 +1,49 @@
+import logging
 from typing import Dict, List, Optional
 from backend.databases.database import Database
+from backend.databases.reference_index import reference_index
+from backend.utils.ranking import TAG_TITLES
+from backend.core.telemetry import span
 from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
 def parse_flight_info(itineraries: List[Dict]) -> List[Dict]:
+    # 태그와 관계없이 모든 항공편을 파싱하고, 고르는 일은 ranking.rank_flights에 맡긴다
     flight_data = []
     for itinerary in itineraries:
-        if itinerary.get('tags', 0):
-            if "cheapest" in itinerary['tags'] or "shortest" in itinerary['tags']:
-                try:
-                    price = itinerary['price']['raw']
-                    leg = itinerary['legs'][0]
-                    departure_time = parse_time(leg['departure'])
-                    arrival_time = parse_time(leg['arrival'])
-                    origin_airport = leg['origin']['id']
-                    destination_airport = leg['destination']['id']
-                    direct = leg.get("stopCount", 0)
-                    carriers = leg.get("carriers", {})
-                    marketing_carriers = [carrier["name"] for carrier in carriers.get("marketing", [])]
-                    operating_carriers = [carrier["name"] for carrier in carriers.get("operating", [])]
-                    tags = itinerary['tags']
-
-                    flight_info = {
-                        'marketing_carriers': marketing_carriers,
-                        'operating_carriers': operating_carriers,
-                        'departure_time': departure_time,
-                        'arrival_time': arrival_time,
-                        'origin_airport': origin_airport,
-                        'destination_airport': destination_airport,
-                        'direct': direct,
-                        'price': price,
-                        'tags': tags
-                    }
-
-                    flight_data.append(flight_info)
-                except Exception as e:
-                    print(f"Error parsing flight info: {e}")
-                    continue
+        try:
+            price = itinerary['price']['raw']
+            leg = itinerary['legs'][0]
+            # 캐시(JSON) 저장과 요약 파싱을 위해 문자열로 보관
+            departure_time = parse_time(leg['departure']).strftime('%Y-%m-%d %H:%M:%S')
+            arrival_time = parse_time(leg['arrival']).strftime('%Y-%m-%d %H:%M:%S')
+            origin_airport = leg['origin']['id']
+            destination_airport = leg['destination']['id']
+            direct = leg.get("stopCount", 0)
+            carriers = leg.get("carriers", {})
+            marketing_carriers = [carrier["name"] for carrier in carriers.get("marketing", [])]
+            operating_carriers = [carrier["name"] for carrier in carriers.get("operating", [])]
+            tags = itinerary.get('tags', [])
+
+            flight_info = {
+                'marketing_carriers': marketing_carriers,
+                'operating_carriers': operating_carriers,
+                'departure_time': departure_time,
+                'arrival_time': arrival_time,
+                'origin_airport': origin_airport,
+                'destination_airport': destination_airport,
+                'direct': direct,
+                'duration_minutes': leg.get('durationInMinutes'),
+                'price': price,
+                'tags': tags
+            }
+
+            flight_data.append(flight_info)
+        except Exception as e:
+            logger.warning("Error parsing flight info: %s", e)
+            continue
 
     return flight_data
 def get_lowest_fare(flight_data: List[Dict]) -> Dict:
@@ -48,7 +57,6 @@ def extract_price(price_str: str) -> float:
     # 쉼표를 제거한 후 float로 변환
     return float(price_str.replace('₩', '').replace(',', ''))
 
-
 def summarize_flight_information(db, flight_data: List[Dict]) -> str:
     summary = ""
     for data in flight_data:
@@ -63,34 +71,62 @@ def summarize_flight_information(db, flight_data: List[Dict]) -> str:
         departure_dt = datetime.strptime(departure_time, '%Y-%m-%d %H:%M:%S')
         arrival_dt = datetime.strptime(arrival_time, '%Y-%m-%d %H:%M:%S')
 
-        # 소요시간 계산
-        duration = arrival_dt - departure_dt
-        duration_hours, duration_minutes = divmod(duration.total_seconds() / 60, 60)
+        # 소요시간 - 공급자가 준 값을 우선 사용 (출도착 시각은 현지 시각이라 시간대가 다르면 차이가 맞지 않는다)
+        total_minutes = data.get('duration_minutes')
+        if total_minutes is None:
+            total_minutes = (arrival_dt - departure_dt).total_seconds() / 60
+        duration_hours, duration_minutes = divmod(total_minutes, 60)
         duration_str = f"{int(duration_hours)}시간 {int(duration_minutes)}분"
 
         price = format(int(data.get('price', 0)), ',') + '원'
         marketing_carriers = data.get('marketing_carriers', [])
         operating_carriers = data.get('operating_carriers', [])
         direct = data.get('direct')
-        tags = "최저가 항공편" if "cheapest" in data.get('tags', []) else "최단거리 항공편"
+        tags = " / ".join(TAG_TITLES.get(tag, tag) for tag in data.get('tags', [])) or "항공편"
         # 예약 링크 생성
         booking_link = create_booking_link(origin_airport, destination_airport, departure_dt.strftime('%Y%m%d'))
 
         summary += (
             f"{tags}\n"
-            f"금액: {price}\n"
+            f"금액(1인): {price}\n"
             f"경유: {f'{direct}회 경유' if direct else '직항'}\n"
             f"출발: {origin}({origin_airport})에서 {departure_time}\n"
             f"도착: {destination}({destination_airport})에 {arrival_time}\n"
             f"소요 시간: {duration_str}\n"
-            f"마케팅 항공사: {','.join(marketing_carriers)}\n" if marketing_carriers else ""
-            f"운영 항공사: {','.join(operating_carriers)}\n" if operating_carriers else ""
-            f"\n"
+            + (f"마케팅 항공사: {','.join(marketing_carriers)}\n" if marketing_carriers else "")
+            + (f"운영 항공사: {','.join(operating_carriers)}\n" if operating_carriers else "")
+            + "\n"
         )
 
         summary += f"[예약 링크]({booking_link})\n\n"
     return summary
 
+# 날짜별 최저가 달력 요약 - 가장 저렴한 날짜를 먼저 보여주고 날짜별 금액을 나열
+def summarize_price_calendar(db, client_info: Dict, fares: Dict[str, Dict]) -> str:
+    if not fares:
+        return "해당 기간에 검색된 항공편이 없습니다."
+    origin_airport = str(client_info['origin_location_code']).upper()
+    destination_airport = str(client_info['destination_location_code']).upper()
+    adults = int(client_info.get('adults') or 1)
+    cheapest = min(fares.values(), key=lambda fare: fare['price'])
+
+    summary = (
+        f"{get_airports_name(db, origin_airport)}({origin_airport}) → "
+        f"{get_airports_name(db, destination_airport)}({destination_airport}) 날짜별 최저가 (1인 기준)\n"
+        f"가장 저렴한 날: {cheapest['date']} {format(int(cheapest['price']), ',')}원\n\n"
+    )
+    for date in sorted(fares):
+        fare = fares[date]
+        mark = " ★" if fare is cheapest else ""
+        direct = fare.get('direct')
+        stops = "" if direct is None else (f" ({direct}회 경유)" if direct else " (직항)")
+        summary += f"{date}: {format(int(fare['price']), ',')}원{stops}{mark}\n"
+
+    booking_link = create_booking_link(origin_airport, destination_airport,
+                                       cheapest['date'].replace('-', ''), adults)
+    summary += f"\n[가장 저렴한 날 예약 링크]({booking_link})\n"
+    return summary
+
 def parse_time(time: str) -> datetime:
     return datetime.fromisoformat(time)
 
@@ -105,24 +141,20 @@ def create_skyscanner_link(**kwargs) -> str:
     return f"/flights/search-one-way?fromEntityId={kwargs['originLocationCode']}&toEntityId={kwargs['destinationLocationCode']}&departureDate={kwargs['departureDate']}&adults={kwargs['adults']}&cabinClass=economy&currency=KRW"
 
 def get_airline_data(db: Database, airline_code: str) -> Optional[str]:
-    try:
-        return db.fetch_data(table="carriers", params={"carrierCode": airline_code})[0][1]
-    except IndexError:
-        print(f"No data found for airline code: {airline_code}")
-        return None
-    except Exception as e:
-        print(f"Database error: {e}")
-        return None
+    # 항공사 이름은 메모리 참조 인덱스에서 조회 (DB 왕복 없음)
+    with span("carrier_lookup"):
+        carrier_name = reference_index.get_carrier_name(airline_code)
+    if carrier_name is None:
+        logger.info("No data found for airline code: %s", airline_code)
+    return carrier_name
 
 def get_airports_name(db: Database, iata: str) -> Optional[str]:
-    try:
-        return db.fetch_data(table="airports", columns="AIRPORT_NAME", params={"IATA": iata})[0][0]
-    except IndexError:
-        print(f"No data found for IATA code: {iata}")
-        return None
-    except Exception as e:
-        print(f"Database error: {e}")
-        return None
+    # 공항 이름은 메모리 참조 인덱스에서 조회 (DB 왕복 없음)
+    with span("airport_lookup"):
+        airport_name = reference_index.get_airport_name(iata)
+    if airport_name is None:
+        logger.info("No data found for IATA code: %s", iata)
+    return airport_name
 
 
 def validate_date(date_str: str) -> str:
@@ -1,9 +1,11 @@
+import logging
 import re
 import json
 from typing import Optional, List, Dict
 from backend.model.messages import Message, CustomHumanMessage, CustomAIMessage
 from langchain_core.messages import BaseMessage
-from backend.utils.vision_utils import save_image_from_base64
+
+logger = logging.getLogger(__name__)
 
 def str_to_message(response: str, session_id: str) -> Optional[Message]:
     try:
@@ -11,25 +13,22 @@ def str_to_message(response: str, session_id: str) -> Optional[Message]:
         match = re.search(r'\{.*\}', response, re.DOTALL)
         if match:
             json_str = match.group()
-            print(f"json_str: {json_str}")
+            logger.debug("json_str: %s", json_str)
 
             message_instance = json.loads(json_str)
             message_instance['session_id'] = session_id
-            print(f"message_instance: {message_instance}")
+            logger.debug("message_instance: %s", message_instance)
+            # 이미지는 data URL 그대로 두고 Vision 요청 시 메모리에서 디코딩 (파일로 저장하지 않는다)
             response_message = Message(**message_instance)
-            if "image" in message_instance:
-                response_message.image = save_image_from_base64(message_instance['image'])
             return response_message
 
         else:
             raise ValueError("JSON 형식이 잘못되었습니다.")
     except (json.JSONDecodeError, ValueError) as e:
-        print("JSON 디코드 오류:", e)
-        print(f"response: {response}")
+        logger.warning("JSON 디코드 오류: %s, response: %s", e, response)
         return Message(type='message',sender='hero', session_id=session_id, message=response)
     except Exception as e:
-        print("예기치 않은 오류 발생:", e)
-        print(f"response: {response}")
+        logger.exception("예기치 않은 오류 발생: %s, response: %s", e, response)
         return Message(type='message',sender='hero', session_id=session_id, message=response)
 
 def process_messages(messages: List[Dict]) -> str:
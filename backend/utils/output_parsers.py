@@ -1,7 +1,8 @@
 from langchain_core.output_parsers import BaseOutputParser
-from typing import Union, Optional
+from typing import Union, Optional, Iterable, Tuple
 
 import json
+import re
 from langchain_core.outputs import Generation
 from backend.model.messages import Message
 from langchain_core.messages import BaseMessage
@@ -40,4 +41,86 @@ class MessageOutputParser(BaseOutputParser):
 
     @property
     def _type(self) -> str:
-        return "message_output_parser"
\ No newline at end of file
+        return "message_output_parser"
+
+class MessageFieldStreamer:
+    """LLM이 생성 중인 JSON 응답에서 message 필드 문자열만 점진적으로 디코딩하는 스트리머"""
+    MESSAGE_KEY = re.compile(r'"message"\s*:\s*"')
+    TYPE_KEY = re.compile(r'"type"\s*:\s*"([^"]*)"')
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    HEX4 = re.compile(r'[0-9a-fA-F]{4}')
+
+    def __init__(self, accept_types: Optional[Iterable[str]] = None):
+        self.accept_types = set(accept_types) if accept_types else None
+        self.buffer = ""
+        self.type: Optional[str] = None
+        self.position: Optional[int] = None  # message 문자열 내 다음 디코딩 위치
+        self.decoded = ""
+        self.emitted = 0
+        self.finished = False
+
+    # 청크를 받아 새로 전송 가능한 message 텍스트를 반환
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk or ""
+        if self.type is None:
+            match = self.TYPE_KEY.search(self.buffer)
+            if match:
+                self.type = match.group(1)
+        if self.position is None:
+            match = self.MESSAGE_KEY.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+        self._decode()
+
+        # type을 확인하기 전에는 보류하고, 허용하지 않는 type이면 스트리밍하지 않는다
+        if self.accept_types is not None and (self.type is None or self.type not in self.accept_types):
+            return ""
+        delta = self.decoded[self.emitted:]
+        self.emitted = len(self.decoded)
+        return delta
+
+    def _decode(self):
+        buffer = self.buffer
+        i = self.position
+        while not self.finished and i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.finished = True
+                i += 1
+            elif char == '\\':
+                if i + 1 >= len(buffer):
+                    break
+                escape = buffer[i + 1]
+                if escape == 'u':
+                    decoded = self._decode_unicode(buffer, i)
+                    if decoded is None:
+                        break
+                    text, i = decoded
+                    self.decoded += text
+                else:
+                    self.decoded += self.ESCAPES.get(escape, escape)
+                    i += 2
+            else:
+                self.decoded += char
+                i += 1
+        self.position = i
+
+    # \uXXXX 디코딩 - 더 받아야 하면 None, 잘못된 이스케이프는 그대로 내보내고 서로게이트 쌍은 합친다
+    # (스트리밍은 부가 기능이므로 실패하지 않고, 최종 답변은 파싱된 Message가 담당)
+    def _decode_unicode(self, buffer: str, i: int) -> Optional[Tuple[str, int]]:
+        if i + 6 > len(buffer):
+            return None
+        if not self.HEX4.fullmatch(buffer[i + 2:i + 6]):
+            return buffer[i:i + 2], i + 2
+        code = int(buffer[i + 2:i + 6], 16)
+        if 0xD800 <= code < 0xDC00:
+            if i + 12 > len(buffer):
+                return None
+            low = buffer[i + 6:i + 12]
+            if low[:2] == '\\u' and self.HEX4.fullmatch(low[2:]) and 0xDC00 <= int(low[2:], 16) < 0xE000:
+                return chr(0x10000 + ((code - 0xD800) << 10) + (int(low[2:], 16) - 0xDC00)), i + 12
+            return '\ufffd', i + 6
+        if 0xDC00 <= code < 0xE000:
+            return '\ufffd', i + 6
+        return chr(code), i + 6
@@ -0,0 +1,120 @@
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+
+class ItineraryTable:
+    """항공편 목록을 열 단위 배열(금액, 소요시간, 경유, 출발시각, 항공사)로 보관하고 벡터 연산으로 순위를 계산"""
+
+    def __init__(self, flight_data: List[Dict]):
+        self.flight_data = flight_data
+        count = len(flight_data)
+        self.price = np.fromiter((float(data.get('price', 0)) for data in flight_data), dtype=np.float64, count=count)
+        self.stops = np.fromiter((int(data.get('direct') or 0) for data in flight_data), dtype=np.int32, count=count)
+        departure = np.array([data['departure_time'] for data in flight_data], dtype='datetime64[s]')
+        arrival = np.array([data['arrival_time'] for data in flight_data], dtype='datetime64[s]')
+        self.departure = departure.astype(np.int64)
+        # 공급자가 소요시간(분)을 주면 사용하고, 없으면 출도착 시각 차이로 계산
+        given = np.fromiter((float(data.get('duration_minutes') or np.nan) for data in flight_data),
+                            dtype=np.float64, count=count)
+        computed = (arrival - departure).astype(np.int64) / 60.0
+        self.duration = np.where(np.isnan(given), computed, given)
+        carriers = [(data.get('marketing_carriers') or [''])[0] for data in flight_data]
+        self.carrier_names, self.carrier = np.unique(np.array(carriers, dtype=str), return_inverse=True)
+
+    def __len__(self) -> int:
+        return len(self.flight_data)
+
+    # 금액/소요시간/경유 모두에서 다른 항공편에 밀리지 않는 항공편(파레토 최적) 인덱스
+    def pareto_front(self) -> np.ndarray:
+        objectives = np.column_stack([self.price, self.duration, self.stops.astype(np.float64)])
+        no_worse = (objectives[:, None, :] <= objectives[None, :, :]).all(axis=2)
+        better = (objectives[:, None, :] < objectives[None, :, :]).any(axis=2)
+        dominated = (no_worse & better).any(axis=0)
+        return np.flatnonzero(~dominated)
+
+    # 전략 점수(낮을수록 좋음) 기준 상위 k개 인덱스, 동점이면 금액이 낮은 순
+    def top_k(self, strategy: str, k: int = 1) -> np.ndarray:
+        scores = RANKING_STRATEGIES[strategy](self)
+        order = np.lexsort((self.price, scores))
+        order = order[np.isfinite(scores[order])]
+        return order[:k]
+
+
+def cheapest(table: ItineraryTable) -> np.ndarray:
+    return table.price
+
+
+def fastest(table: ItineraryTable) -> np.ndarray:
+    return table.duration
+
+
+def fewest_stops(table: ItineraryTable) -> np.ndarray:
+    # 경유 수가 같으면 소요시간이 짧은 순
+    return table.stops * 1e6 + table.duration
+
+
+def best_value(table: ItineraryTable) -> np.ndarray:
+    # 파레토 최적 항공편 중 최저가/최단시간 대비 비율과 경유 수를 합산
+    scores = np.full(len(table), np.inf)
+    front = table.pareto_front()
+    price = table.price[front] / max(table.price[front].min(), 1.0)
+    duration = table.duration[front] / max(table.duration[front].min(), 1.0)
+    scores[front] = price + duration + 0.25 * table.stops[front]
+    return scores
+
+
+RANKING_STRATEGIES: Dict[str, Callable[[ItineraryTable], np.ndarray]] = {
+    "cheapest": cheapest,
+    "fastest": fastest,
+    "fewest_stops": fewest_stops,
+    "best_value": best_value,
+}
+
+# 전략별 결과 태그 (summarize_flight_information의 제목에 사용)
+STRATEGY_TAGS = {
+    "cheapest": "cheapest",
+    "fastest": "shortest",
+    "fewest_stops": "fewest_stops",
+    "best_value": "best_value",
+}
+
+# 결과 태그별 요약 제목 - 제목이 없는 태그(register_strategy로 추가한 전략 등)는 태그 이름을 그대로 보여준다
+TAG_TITLES = {
+    "cheapest": "최저가 항공편",
+    "shortest": "최단거리 항공편",
+    "fewest_stops": "최소 경유 항공편",
+    "best_value": "추천 항공편",
+}
+
+
+def register_strategy(name: str, strategy: Callable[[ItineraryTable], np.ndarray], tag: Optional[str] = None,
+                      title: Optional[str] = None):
+    RANKING_STRATEGIES[name] = strategy
+    STRATEGY_TAGS[name] = tag or name
+    if title:
+        TAG_TITLES[tag or name] = title
+
+
+# 설정된 전략 이름 검증 - 알 수 없는 이름이 있으면 검색마다 KeyError가 나지 않도록 시작 시 실패
+def validate_strategies(strategies: Sequence[str]) -> List[str]:
+    if not strategies:
+        raise ValueError("At least one flight ranking strategy is required")
+    unknown = [name for name in strategies if name not in RANKING_STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown flight ranking strategies {unknown}, "
+                         f"available: {', '.join(RANKING_STRATEGIES)}")
+    return list(strategies)
+
+
+# 전략별 상위 k개 항공편을 골라 태그를 붙여 반환 - 여러 전략에 뽑힌 항공편은 태그를 합친다
+def rank_flights(flight_data: List[Dict], strategies: Sequence[str] = ("cheapest", "fastest"), k: int = 1) -> List[Dict]:
+    if not flight_data:
+        return []
+    table = ItineraryTable(flight_data)
+    selected: Dict[int, Dict] = {}
+    for strategy in strategies:
+        for index in table.top_k(strategy, k).tolist():
+            if index not in selected:
+                selected[index] = {**flight_data[index], 'tags': []}
+            selected[index]['tags'].append(STRATEGY_TAGS[strategy])
+    return list(selected.values())
@@ -1,42 +1,53 @@
 import base64
-from PIL import Image, ImageFilter
+from PIL import Image
 import io
-from typing import Dict
-import os
+from typing import Dict, Optional
 from backend.core.config import settings
 
 
-def save_image_from_base64(data: str, filename: str = 'img.jpg') -> str:
-    # 데이터 URL 형식의 base64 문자열 처리
-    if ',' in data:
-        header, data = data.split(',', 1)
-
-    # base64 문자열을 바이트로 변환
-    data_bytes = base64.b64decode(data)
-
-    # 파일 저장 경로 설정
-    root_path = settings.ROOT_DIR
-    file_path = os.path.join(root_path, "backend", "datas", filename)
-
-    # 파일 저장
-    with open(file_path, 'wb') as f:
-        f.write(data_bytes)
-
-    return file_path
+# Vision에 보낼 이미지 바이트 - 해상도와 크기가 한도 이내면 원본 그대로, 넘으면 메모리에서 축소해 JPEG으로 재인코딩
+def prepare_image(data: bytes, max_resolution: Optional[int] = None, max_bytes: Optional[int] = None) -> bytes:
+    max_resolution = max_resolution or settings.VISION_MAX_RESOLUTION
+    max_bytes = max_bytes or settings.VISION_MAX_IMAGE_BYTES
+    image = Image.open(io.BytesIO(data))
+    if (image.format in ('JPEG', 'PNG') and max(image.size) <= max_resolution and len(data) <= max_bytes):
+        return data
+    # JPEG은 디코딩 단계에서 1/2, 1/4, 1/8로 줄여 읽는다 (draft는 요청 크기 이상을 유지)
+    image.draft('RGB', (max_resolution, max_resolution))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((max_resolution, max_resolution))
+    quality = settings.VISION_JPEG_QUALITY
+    while True:
+        byte_stream = io.BytesIO()
+        image.save(byte_stream, format='JPEG', quality=quality)
+        if byte_stream.tell() <= max_bytes or quality <= 40:
+            return byte_stream.getvalue()
+        quality -= 15
 
 def load_image_from_path(path: str) -> bytes:
-    content = Image.open(path)
-    if content.mode == 'RGBA':
-        content = content.convert('RGB')
-    sharpened = content.filter(ImageFilter.SHARPEN)
-    byte_stream = io.BytesIO()
-    sharpened.save(byte_stream, format='JPEG')
-    byte_stream.seek(0)
-    return byte_stream.read()
+    with open(path, 'rb') as f:
+        return prepare_image(f.read())
 
+# data URL 형식(또는 순수 base64) 문자열을 바이트로 한 번만 디코딩
 def load_image_from_base64(data: str) -> bytes:
-    base64_data = data.split(',')[1]
-    return base64.b64decode(base64_data)
+    if ',' in data:
+        data = data.split(',', 1)[1]
+    return base64.b64decode(data)
+
+# 차이 해시(dHash) - 축소한 흑백 이미지에서 가로로 이웃한 픽셀의 밝기 비교 결과를 64비트 정수로 만든다
+def image_dhash(data: bytes, hash_size: int = 8) -> int:
+    image = Image.open(io.BytesIO(data))
+    # JPEG은 디코딩 단계에서 축소해 전체 해상도 디코딩을 피한다
+    image.draft('L', (hash_size * 8, hash_size * 8))
+    pixels = list(image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
 
 def web_detection_to_dict(annotations) -> Dict:
     result = {
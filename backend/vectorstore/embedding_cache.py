@@ -0,0 +1,192 @@
+import contextvars
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from backend.core.config import settings
+from backend.core.telemetry import session_context, span
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """내용 해시 기반 임베딩 캐시 - 메모리 LRU + SQLite(float32 바이트), 캐시에 없는 문장은 모아서 한 번에 임베딩"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(CachedEmbeddings, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        if not hasattr(self, 'initialized'):  # 초기화 여부 확인
+            self.embeddings = embeddings or OpenAIEmbeddings()
+            self.model = str(getattr(self.embeddings, 'model', ''))
+            self.max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES
+            self.batch_size = settings.EMBEDDING_BATCH_SIZE
+            self.batch_window = settings.EMBEDDING_BATCH_WINDOW
+            self.wait_timeout = settings.EMBEDDING_WAIT_TIMEOUT
+            self.memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+            self.lock = threading.Lock()
+            self.connection = sqlite3.connect(settings.EMBEDDING_CACHE_PATH, check_same_thread=False,
+                                              isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            # 임베딩 대기열 - 같은 키는 하나의 요청을 함께 기다린다
+            # (키, 문장, 요청 측 contextvars) - 배치 스레드는 contextvars를 넘겨받지 못하므로 함께 넣는다
+            self.pending: "queue.Queue[Tuple[str, str, contextvars.Context]]" = queue.Queue()
+            self.inflight: Dict[str, Future] = {}
+            self.worker: Optional[threading.Thread] = None
+            self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0,
+                          "api_calls": 0, "embedded_texts": 0, "errors": 0, "store_errors": 0, "timeouts": 0}
+            self.initialized = True  # 초기화 상태 표시
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode('utf-8')).hexdigest()[:32]
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    # 메모리 -> 디스크 순으로 조회해서 찾은 벡터를 반환
+    def lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                vector = self.memory.get(key)
+                if vector is not None:
+                    self.memory.move_to_end(key)
+                    found[key] = vector
+            self.stats["memory_hits"] += len(found)
+            missing = [key for key in keys if key not in found]
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    found[key] = vector
+                self.stats["disk_hits"] += len(rows)
+        return found
+
+    def store(self, vectors: Dict[str, np.ndarray]):
+        with self.lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany("INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)",
+                                            [(key, vector.tobytes()) for key, vector in vectors.items()])
+                self.connection.execute("COMMIT")
+            except BaseException:
+                # 공유 연결이 트랜잭션 안에 남지 않도록 되돌린다
+                self.connection.execute("ROLLBACK")
+                raise
+
+    # 캐시에 없는 문장을 대기열에 넣고 결과 Future를 반환 (이미 요청 중이면 같은 Future)
+    def submit(self, key: str, text: str) -> Future:
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            future = Future()
+            self.inflight[key] = future
+            self.stats["misses"] += 1
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.run_batches, name="embedding-batcher", daemon=True)
+                self.worker.start()
+        self.pending.put((key, text, contextvars.copy_context()))
+        return future
+
+    # 첫 요청 이후 batch_window 동안 또는 batch_size가 찰 때까지 모아서 한 번에 임베딩
+    def run_batches(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                # 배치는 첫 요청의 컨텍스트에서 실행 (다른 요청의 세션 ID는 span 속성으로)
+                batch[0][2].run(self.embed_batch, batch)
+            except Exception as e:
+                # 배치 스레드가 죽으면 이후 요청이 모두 멈추므로 기록만 하고 계속
+                logger.exception("Embedding batch failed: %s", e)
+
+    def embed_batch(self, batch: List[Tuple[str, str, contextvars.Context]]):
+        keys = [key for key, _, _ in batch]
+        try:
+            session_ids = [context.get(session_context) for _, _, context in batch]
+            with span("embedding_api", batch_size=len(batch), session_ids=session_ids):
+                vectors = np.asarray(self.embeddings.embed_documents([text for _, text, _ in batch]),
+                                     dtype=np.float32)
+            self.stats["api_calls"] += 1
+            self.stats["embedded_texts"] += len(batch)
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+            results = dict(zip(keys, vectors))
+        except Exception as e:
+            self.stats["errors"] += 1
+            with self.lock:
+                futures = [self.inflight.pop(key, None) for key in keys]
+            for future in futures:
+                if future is not None:
+                    future.set_exception(e)
+            return
+        # 대기 시간이 지나 목록에서 빠진 요청은 건너뛴다
+        with self.lock:
+            futures = [self.inflight.pop(key, None) for key in keys]
+        for key, future in zip(keys, futures):
+            if future is not None:
+                future.set_result(results[key])
+        # 결과를 먼저 돌려준 뒤 저장 - 디스크 저장 실패는 다음 조회 때 다시 임베딩될 뿐이므로 기록만 한다
+        try:
+            self.store(results)
+        except Exception as e:
+            self.stats["store_errors"] += 1
+            logger.warning("Failed to persist %d embeddings: %s", len(results), e)
+
+    def embed_vectors(self, texts: List[str]) -> np.ndarray:
+        keys = [self.make_key(text) for text in texts]
+        found = self.lookup(list(dict.fromkeys(keys)))
+        futures = {key: self.submit(key, text) for key, text in zip(keys, texts) if key not in found}
+        for key, future in futures.items():
+            try:
+                found[key] = future.result(timeout=self.wait_timeout)
+            except FutureTimeoutError:
+                # 멈춘 요청에 이후 호출이 합류하지 않도록 대기 목록에서 뺀다
+                with self.lock:
+                    if self.inflight.get(key) is future:
+                        del self.inflight[key]
+                    self.stats["timeouts"] += 1
+                raise
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([found[key] for key in keys])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_vectors(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_vectors([text])[0].tolist()
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "memory_entries": len(self.memory), "inflight": len(self.inflight)}
@@ -0,0 +1,149 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from backend.core.config import settings
+from backend.services.prompt_store import prompt_store
+from backend.vectorstore.embedding_cache import CachedEmbeddings
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().lower()
+
+
+class SemanticResponseCache:
+    """일반 질문(message) 답변의 전역 시맨틱 캐시 - 정규화한 질문의 임베딩이 임계값 이상으로 비슷하면 저장된 답변을 재사용"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(SemanticResponseCache, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):  # 초기화 여부 확인
+            self.path = settings.RESPONSE_CACHE_PATH
+            self.threshold = settings.RESPONSE_CACHE_THRESHOLD
+            self.ttl = settings.RESPONSE_CACHE_TTL
+            self.embeddings = CachedEmbeddings()
+            self.store: Optional[FAISS] = None
+            self.store_version = ""  # 인덱스의 답변을 만든 프롬프트 버전
+            self.prompt_revision = -1
+            self.prompt_version = ""
+            self.unsaved = 0
+            self.lock = threading.RLock()
+            self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "invalidations": 0}
+            self.initialized = True  # 초기화 상태 표시
+
+    # 정규화 후 내적 = 코사인 유사도
+    def create_store(self, question: str, embedding: List[float], metadata: Dict) -> FAISS:
+        return FAISS.from_embeddings([(question, embedding)], self.embeddings, metadatas=[metadata],
+                                     distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT, normalize_L2=True)
+
+    def load(self):
+        with self.lock:
+            if not os.path.exists(os.path.join(self.path, "index.faiss")):
+                return
+            # 직접 저장한 인덱스만 역직렬화하므로 pickle 로드를 허용
+            self.store = FAISS.load_local(self.path, self.embeddings, allow_dangerous_deserialization=True,
+                                          distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT, normalize_L2=True)
+            documents = list(self.store.docstore._dict.values())
+            self.store_version = documents[0].metadata["prompt_version"] if documents else ""
+
+    def save(self):
+        with self.lock:
+            if self.store is not None and self.unsaved:
+                self.store.save_local(self.path)
+                self.unsaved = 0
+
+    # 프롬프트 내용이 바뀌면 이전 프롬프트로 만든 답변을 모두 버린다
+    def current_version(self) -> str:
+        if self.prompt_revision != prompt_store.revision:
+            self.prompt_revision = prompt_store.revision
+            self.prompt_version = prompt_store.version()
+        return self.prompt_version
+
+    def ensure_version(self):
+        version = self.current_version()
+        if self.store is not None and self.store_version != version:
+            self.invalidate()
+        self.store_version = version
+
+    def invalidate(self):
+        with self.lock:
+            self.store = None
+            self.unsaved = 0
+            self.stats["invalidations"] += 1
+            for name in ("index.faiss", "index.pkl"):
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        with self.lock:
+            self.ensure_version()
+            if self.store is None:
+                self.stats["misses"] += 1
+                return None
+        # 임베딩 API 호출은 잠금 밖에서
+        embedding = self.embeddings.embed_query(normalize_question(question))
+        with self.lock:
+            if self.store is None:
+                self.stats["misses"] += 1
+                return None
+            document, score = self.store.similarity_search_with_score_by_vector(embedding, k=1)[0]
+            metadata = document.metadata
+            if score < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            if self.ttl > 0 and time.time() - metadata["created_at"] > self.ttl:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return dict(metadata["response"])
+
+    def store_response(self, question: str, response: Dict):
+        question = normalize_question(question)
+        embedding = self.embeddings.embed_query(question)
+        with self.lock:
+            self.ensure_version()
+            metadata = {"response": response, "created_at": time.time(), "prompt_version": self.store_version}
+            if self.store is None:
+                self.store = self.create_store(question, embedding, metadata)
+            else:
+                self.store.add_embeddings([(question, embedding)], metadatas=[metadata])
+            self.stats["stores"] += 1
+            self.unsaved += 1
+            if self.unsaved >= settings.RESPONSE_CACHE_SAVE_EVERY:
+                self.save()
+
+    # TTL이 지난 답변 삭제 후 디스크에 반영 (세션 정리 작업에서 주기적으로 호출)
+    def purge_expired(self) -> int:
+        with self.lock:
+            if self.store is None:
+                return 0
+            now = time.time()
+            expired = [doc_id for doc_id, document in self.store.docstore._dict.items()
+                       if self.ttl > 0 and now - document.metadata["created_at"] > self.ttl]
+            if len(expired) == self.store.index.ntotal:
+                self.invalidate()
+            elif expired:
+                self.store.delete(expired)
+                self.unsaved += len(expired)
+            self.save()
+            return len(expired)
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else None,
+            "entries": self.store.index.ntotal if self.store is not None else 0,
+            "threshold": self.threshold,
+        }
+
+
+response_cache = SemanticResponseCache()
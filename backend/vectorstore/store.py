@@ -1,9 +1,21 @@
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from typing import List, Dict
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+import faiss
+import numpy as np
+from backend.core.config import settings
+from backend.vectorstore.embedding_cache import CachedEmbeddings
+
+logger = logging.getLogger(__name__)
 
 
 class VectorStore:
+    """모든 세션이 공유하는 FAISS 인덱스 - 문서/임베딩은 SQLite에, 인덱스는 디스크 파일(mmap 로드)에 보관하고 세션 ID로 필터링"""
     _instance = None
 
     def __new__(cls, *args, **kwargs):
@@ -13,12 +25,129 @@ class VectorStore:
 
     def __init__(self):
         if not hasattr(self, 'initialized'):  # 초기화 여부 확인
-            self.embeddings = OpenAIEmbeddings()
-            self.vector_stores: Dict[str, FAISS] = {}
+            self.embeddings = CachedEmbeddings()
+            self.index_dir = settings.VECTOR_INDEX_DIR
+            self.index_path = os.path.join(self.index_dir, "index.faiss")
+            self.meta_path = os.path.join(self.index_dir, "index.json")
+            os.makedirs(self.index_dir, exist_ok=True)
+            # 문서 저장소 - 같은 노드의 워커들이 공유하는 기준 데이터 (임베딩 포함, 재시작 시 다시 임베딩하지 않음)
+            self.connection = sqlite3.connect(os.path.join(self.index_dir, "documents.db"),
+                                              check_same_thread=False, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA busy_timeout=5000")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, content TEXT NOT NULL, "
+                "length INTEGER NOT NULL, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS documents_session ON documents (session_id, length)"
+            )
+            self.lock = threading.RLock()
+            self.index: Optional[faiss.Index] = None
+            self.max_id = 0  # 인덱스에 반영된 마지막 문서 ID
+            self.unsaved = 0
+            self.load()
             self.initialized = True  # 초기화 상태 표시
 
+    # 내적 인덱스 + 문서 ID 매핑 (정규화한 벡터의 내적 = 코사인 유사도)
+    @staticmethod
+    def create_index(dimension: int) -> faiss.Index:
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+
+    # 저장된 인덱스를 mmap으로 열고, 이후에 추가된 문서만 이어서 반영
+    def load(self):
+        with self.lock:
+            if os.path.exists(self.index_path) and os.path.exists(self.meta_path):
+                with open(self.meta_path, 'r') as f:
+                    self.max_id = json.load(f)["max_id"]
+                try:
+                    self.index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP)
+                except RuntimeError:
+                    # mmap을 지원하지 않는 faiss 빌드에서는 일반 로드
+                    self.index = faiss.read_index(self.index_path)
+            self.sync()
+
+    # 다른 워커가 추가한 문서를 SQLite에서 읽어 인덱스에 반영 (저장된 임베딩 사용)
+    def sync(self):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, embedding FROM documents WHERE id > ? ORDER BY id", (self.max_id,)
+            ).fetchall()
+            if not rows:
+                return
+            ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            vectors = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            self.add_to_index(ids, vectors)
+
+    def add_to_index(self, ids: np.ndarray, vectors: np.ndarray):
+        if self.index is None:
+            self.index = self.create_index(vectors.shape[1])
+        self.index.add_with_ids(vectors, ids)
+        self.max_id = max(self.max_id, int(ids.max()))
+        self.unsaved += len(ids)
+        if self.unsaved >= settings.VECTOR_INDEX_SAVE_EVERY:
+            self.save()
+
+    # 인덱스 파일 저장 - 임시 파일에 쓴 뒤 교체 (mmap으로 열린 이전 파일은 그대로 유지됨)
+    def save(self):
+        with self.lock:
+            if self.index is None or not self.unsaved:
+                return
+            faiss.write_index(self.index, self.index_path + ".tmp")
+            os.replace(self.index_path + ".tmp", self.index_path)
+            with open(self.meta_path + ".tmp", 'w') as f:
+                json.dump({"max_id": self.max_id}, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+            self.unsaved = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.embeddings.embed_vectors(texts)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    # 세션 문서 추가 - 새 문서만 임베딩해서 인덱스에 이어 붙인다
+    def add_texts(self, session_id: str, texts: List[str]):
+        texts = [text for text in texts if text]
+        if not texts:
+            return
+        vectors = self.embed(texts)
+        now = time.time()
+        with self.lock:
+            self.sync()
+            self.connection.execute("BEGIN")
+            ids = []
+            try:
+                for text, vector in zip(texts, vectors):
+                    cursor = self.connection.execute(
+                        "INSERT INTO documents (session_id, content, length, embedding, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (session_id, text, len(text), vector.tobytes(), now)
+                    )
+                    ids.append(cursor.lastrowid)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                # 공유 연결이 트랜잭션 안에 남지 않도록 되돌린다
+                self.connection.execute("ROLLBACK")
+                raise
+            self.add_to_index(np.asarray(ids, dtype=np.int64), vectors)
+
+    # 세션 문서 삭제
+    def delete_session(self, session_id: str) -> int:
+        with self.lock:
+            ids = [row[0] for row in self.connection.execute(
+                "SELECT id FROM documents WHERE session_id = ?", (session_id,)
+            ).fetchall()]
+            if not ids:
+                return 0
+            self.connection.execute("DELETE FROM documents WHERE session_id = ?", (session_id,))
+            if self.index is not None:
+                self.index.remove_ids(faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64)))
+                self.unsaved += len(ids)
+            return len(ids)
+
     def create_vectorstore_from_embed_text(self, texts: List[str], session_id: str):
-        self.vector_stores[session_id] = FAISS.from_texts(texts, embedding=self.embeddings)
+        self.delete_session(session_id)
+        self.add_texts(session_id, texts)
 
     def initialize_vector_store(self, session_id: str, messages: str):
         combined_messages = []
@@ -35,32 +164,44 @@ class VectorStore:
         if current_message:
             combined_messages.append(current_message)
 
-        print(f"All messages for session {session_id}: {combined_messages}")
+        logger.debug("All messages for session %s: %s", session_id, combined_messages)
         if combined_messages:
             self.create_vectorstore_from_embed_text(combined_messages, session_id)
         else:
             self.create_vectorstore_from_embed_text([], session_id)
 
-    def add_texts(self, session_id: str, texts: List[str]):
-        if session_id not in self.vector_stores:
-            self.initialize_vector_store(session_id, '\n'.join(texts))
-        else:
-            self.vector_stores[session_id].add_texts(texts)
-
-    def semantic_search(self, session_id: str, query: str, k: int = 5, score_threshold: float = 0.7) -> List[str]:
-        if session_id not in self.vector_stores:
-            print(f"No vector store found for session {session_id}")
-            return []
-        retriever = self.vector_stores[session_id].as_retriever(
-            search_type='similarity_score_threshold',
-            search_kwargs={"score_threshold": score_threshold}
-        )
-        relevanced_doc = retriever.invoke(query)
-        print(relevanced_doc)
-        filtered_results = [document.page_content for document in relevanced_doc if len(document.page_content) > 50]
-        print(f"Filtered results for query '{query}' in session {session_id}: {filtered_results}")
-
-        return filtered_results[:k]
+    # 세션 문서 검색 - 세션 ID/최소 길이 조건은 ID 선택자로, 점수 임계값은 range search 반경으로 인덱스 질의에 포함
+    def semantic_search(self, session_id: str, query: str, k: int = 5, score_threshold: float = 0.7,
+                        min_length: int = 50) -> List[str]:
+        query_vector = self.embed([query])
+        with self.lock:
+            self.sync()
+            candidate_ids = np.fromiter((row[0] for row in self.connection.execute(
+                "SELECT id FROM documents WHERE session_id = ? AND length > ?", (session_id, min_length)
+            )), dtype=np.int64)
+            if self.index is None or not len(candidate_ids):
+                logger.debug("No documents found for session %s", session_id)
+                return []
+            # 이전 점수와 같은 기준이 되도록 코사인 유사도로 변환 - IndexFlatL2의 d는 제곱 거리(= 2 - 2cos)이므로
+            # relevance = 1 - d/√2 = 1 - (2 - 2cos)/√2, 즉 cos = 1 - (1 - relevance)/√2
+            radius = 1 - (1 - score_threshold) / math.sqrt(2)
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(candidate_ids))
+            _, scores, ids = self.index.range_search(query_vector, radius, params=params)
+            top = ids[np.argsort(-scores)[:k]]
+            if not len(top):
+                return []
+            # 연결은 쓰기 작업과 공유하므로 본문 조회도 잠금 안에서
+            placeholders = ",".join("?" * len(top))
+            contents = dict(self.connection.execute(
+                f"SELECT id, content FROM documents WHERE id IN ({placeholders})", [int(i) for i in top]
+            ).fetchall())
+        results = [contents[int(i)] for i in top if int(i) in contents]
+        logger.debug("Results for query '%s' in session %s: %s", query, session_id, results)
+        return results
+
+    def close(self):
+        self.save()
+        self.connection.close()
 
 
 if __name__ == "__main__":